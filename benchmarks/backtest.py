@@ -0,0 +1,100 @@
+"""Benchmark and correctness check of the backtest of games.
+
+The counts of each prize tier are compared with the counts of all (game, draw) pairs
+matched one by one with bit masks (`match_counts`), on random games and the draws stored.
+
+Usage:
+    python benchmarks/backtest.py [--games N ...] [--pairwise-limit N] [--seed S]
+
+The exit code is 1 if the counts are different from the pairwise counts.
+"""
+import argparse
+import json
+import pathlib
+import sys
+import time
+from typing import (
+    Any,
+    Dict,
+    List
+)
+
+import numpy as np
+
+SRC = pathlib.Path(__file__).resolve().parent.parent / "src"
+
+sys.path.insert(0, str(SRC))
+
+from codec import (  # noqa: E402
+    TOTAL_GAMES,
+    unrank_games
+)
+from game_array import HAS_BITWISE_COUNT  # noqa: E402
+from game_backtest import (  # noqa: E402
+    PRIZE_TIERS,
+    draws_between,
+    match_counts,
+    prize_tiers,
+    tier_counts_by_draw
+)
+
+
+def pairwise_tier_counts(games: np.ndarray, draws: np.ndarray, dates: np.ndarray, chunk_size: int) -> np.ndarray:
+    """Count the plays on each prize tier of each draw matching all pairs, a chunk of games at a time."""
+    counts = np.zeros((len(draws), len(PRIZE_TIERS) + 1), dtype=np.int64)
+    offsets = np.arange(len(draws)) * (len(PRIZE_TIERS) + 1)
+
+    for start in range(0, len(games), chunk_size):
+        numbers, stars = match_counts(games[start:start + chunk_size], draws)
+        tiers = prize_tiers(numbers, stars, dates)
+        counts += np.bincount((tiers + offsets).ravel(), minlength=counts.size).reshape(counts.shape)
+
+    return counts[:, 1:]
+
+
+def main() -> int:
+    """Run the benchmark and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, nargs="+", default=[10000, 100000, 1000000], help="Numbers of games.")
+    parser.add_argument(
+        "--pairwise-limit", type=int, default=100000,
+        help="Largest number of games to also match pair by pair, it is much slower."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random games.")
+    args = parser.parse_args()
+
+    draws, dates = draws_between()
+    rng = np.random.default_rng(args.seed)
+
+    results: List[Dict[str, Any]] = []
+    failed = False
+    for n in args.games:
+        games = unrank_games(rng.integers(0, TOTAL_GAMES, n))
+
+        start = time.perf_counter()
+        counts = tier_counts_by_draw(games, draws, dates)
+        result: Dict[str, Any] = {
+            "games": n,
+            "draws": len(draws),
+            "plays": n * len(draws),
+            "seconds": time.perf_counter() - start,
+            "hardware_popcount": HAS_BITWISE_COUNT
+        }
+
+        if n <= args.pairwise_limit:
+            start = time.perf_counter()
+            expected = pairwise_tier_counts(games, draws, dates, chunk_size=256)
+            result["pairwise_seconds"] = time.perf_counter() - start
+            result["matches_pairwise"] = bool(np.array_equal(counts, expected))
+            failed = failed or not result["matches_pairwise"]
+
+        results.append(result)
+
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
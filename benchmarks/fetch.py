@@ -0,0 +1,245 @@
+"""Check of reading the results web pages against a local stand-in server.
+
+A server on localhost serves the pages saved on `benchmarks/fixtures`, one page for each draw date,
+and answers as the results site can: a redirect, a `503 Service Unavailable` the first time a page
+is asked for, and `304 Not Modified` to conditional requests. The results are read twice with
+`fetch_euro_millions_results` and a cache on a temporary folder, the second time checking the pages
+with the server, and compared with the results parsed from the fixtures.
+
+Usage:
+    python benchmarks/fetch.py [--workers N]
+
+The exit code is 1 if any check fails.
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import pathlib
+import sys
+import tempfile
+import threading
+import time
+from datetime import (
+    date,
+    timedelta
+)
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer
+)
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple
+)
+
+SRC = pathlib.Path(__file__).resolve().parent.parent / "src"
+FIXTURES = pathlib.Path(__file__).resolve().parent / "fixtures"
+
+sys.path.insert(0, str(SRC))
+
+import profiling  # noqa: E402
+from scrapper import (  # noqa: E402
+    PageCache,
+    fetch_euro_millions_results,
+    parse_result_page
+)
+
+# Position, on the dates, of the page that is redirected, of the page that fails once and of the slow page
+REDIRECTED = 1
+FAILING = 2
+SLOW = 0
+
+# Seconds the slow page takes, so the pages are read out of order
+SLOW_SECONDS = 0.2
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Server of the fixture pages, it counts the connections and the answers of each status.
+
+    Parameters
+    ----------
+    pages : Dict[str, bytes]
+        Content of the page of each address.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, pages: Dict[str, bytes]):
+        """Listen on a free port of localhost."""
+        super().__init__(("127.0.0.1", 0), FixtureHandler)
+        self.pages = pages
+        self.failed: set = set()
+        self.connections = 0
+        self.statuses: Dict[int, int] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        """Get the main address of the results on the server."""
+        return f"http://127.0.0.1:{self.server_address[1]}/results/"
+
+    def record(self, connection: bool = False, status: Optional[int] = None):
+        """Count a new connection or an answer."""
+        with self.lock:
+            if connection:
+                self.connections += 1
+            if status is not None:
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Answer the requests of the results pages, keeping the connections alive."""
+
+    protocol_version = "HTTP/1.1"
+    server: FixtureServer
+
+    def setup(self):
+        """Count the new connection."""
+        super().setup()
+        self.server.record(connection=True)
+
+    def log_message(self, format: str, *args: Any):
+        """Don't log the requests."""
+
+    def answer(self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None):
+        """Send an answer with its length, so the connection can be reused."""
+        self.server.record(status=status)
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        """Answer a request of a page."""
+        page = self.server.pages.get(self.path)
+        if page is None:
+            self.answer(404)
+            return
+
+        kind = page_kind(self.path)
+        if kind == REDIRECTED and self.path.startswith("/results/"):
+            self.answer(302, headers={"Location": self.path.replace("/results/", "/moved/")})
+            return
+
+        if kind == FAILING:
+            with self.server.lock:
+                first = self.path not in self.server.failed
+                self.server.failed.add(self.path)
+            if first:
+                self.answer(503)
+                return
+
+        if kind == SLOW:
+            time.sleep(SLOW_SECONDS)
+
+        etag = '"' + hashlib.sha256(page).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.answer(304, headers={"ETag": etag})
+        else:
+            self.answer(200, page, {"ETag": etag, "Content-Type": "text/html; charset=utf-8"})
+
+
+# Position of each date on the addresses of the pages, filled by `serve_fixtures`
+_positions: Dict[str, int] = {}
+
+
+def page_kind(path: str) -> int:
+    """Get the position of the date of a page address, it tells how the server answers it."""
+    return _positions[path.rsplit("/", 1)[-1]]
+
+
+def serve_fixtures(fixtures: List[pathlib.Path], dates: List[date]) -> FixtureServer:
+    """Start a server of one fixture page for each date, on a thread."""
+    pages: Dict[str, bytes] = {}
+    for position, (fixture, dt) in enumerate(zip(fixtures, dates)):
+        name = f"{dt:%d-%m-%Y}"
+        _positions[name] = position
+        pages[f"/results/{name}"] = pages[f"/moved/{name}"] = fixture.read_bytes()
+
+    server = FixtureServer(pages)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+def fetch_all(
+    dates: List[date],
+    server: FixtureServer,
+    cache: PageCache,
+    workers: int
+) -> Tuple[List[Tuple[date, Optional[Dict[str, Any]], Optional[str]]], Dict[str, float]]:
+    """Read the results of all dates from the server, with the profiling counters of the run."""
+    profiler = profiling.enable()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            fetched = list(fetch_euro_millions_results(
+                dates, workers=workers, retries=2, base_url=server.base_url, cache=cache
+            ))
+    finally:
+        profiling.disable()
+
+    return fetched, dict(profiler.counters)
+
+
+def main() -> int:
+    """Run the checks and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2, help="Number of web pages read at the same time.")
+    args = parser.parse_args()
+
+    fixtures = sorted(FIXTURES.glob("*.html"))
+    # Recent draws, so the pages stored are checked with the server on the second read
+    dates = [date.today() - timedelta(days=i) for i in range(len(fixtures))]
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = [(dt, parse_result_page(fixture.read_bytes()), None) for dt, fixture in zip(dates, fixtures)]
+
+    server = serve_fixtures(fixtures, dates)
+    checks: List[Dict[str, Any]] = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="euromillions-fetch-") as folder:
+            cache = PageCache(pathlib.Path(folder), ttl=0)
+
+            first, counters = fetch_all(dates, server, cache, args.workers)
+            checks.append({
+                "check": "results_in_order", "ok": first == expected,
+                "dates": [str(dt) for dt, _, _ in first]
+            })
+            checks.append({
+                "check": "retry_on_503", "ok": server.statuses.get(503) == 1 and counters.get("http_retries") == 1,
+                "retries": counters.get("http_retries", 0)
+            })
+            checks.append({"check": "redirect", "ok": server.statuses.get(302) == 1})
+
+            second, counters = fetch_all(dates, server, cache, args.workers)
+            checks.append({"check": "cached_results", "ok": second == expected})
+            checks.append({
+                "check": "not_modified",
+                "ok": counters.get("cache_not_modified") == len(dates) and server.statuses.get(304) == len(dates),
+                "not_modified": counters.get("cache_not_modified", 0)
+            })
+
+        # Each thread of each read keeps one connection, the failed and redirected requests reuse it
+        requests = sum(server.statuses.values())
+        checks.append({
+            "check": "keep_alive", "ok": server.connections <= 2 * args.workers,
+            "connections": server.connections, "requests": requests
+        })
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    json.dump(checks, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+    return 0 if all(check["ok"] for check in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
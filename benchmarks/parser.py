@@ -0,0 +1,130 @@
+"""Benchmark and correctness check of the results web page parser.
+
+The parser is compared with the previous implementation (BeautifulSoup + pandas.read_html)
+on the pages saved on `benchmarks/fixtures`, with the standard library parser and with lxml.
+
+Usage:
+    python benchmarks/parser.py [--repeat N]
+
+The exit code is 1 if any parser gives a result different from the previous implementation.
+"""
+import argparse
+import contextlib
+import io
+import json
+import pathlib
+import sys
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional
+)
+
+SRC = pathlib.Path(__file__).resolve().parent.parent / "src"
+FIXTURES = pathlib.Path(__file__).resolve().parent / "fixtures"
+
+sys.path.insert(0, str(SRC))
+
+from scrapper import (  # noqa: E402
+    BALLS_DIV_ID,
+    HAS_LXML,
+    parse_result_page
+)
+
+
+def legacy_parse_result_page(page: bytes) -> Optional[Dict[str, Any]]:
+    """Extract the result with the previous implementation (two full parses of the page)."""
+    import numpy as np
+    import pandas as pd
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page, 'html.parser')
+    balls = soup.find('div', {'id': BALLS_DIV_ID})
+    if balls is None:
+        return None
+
+    numbers = []
+    stars = []
+    for li in balls.find_all('li'):
+        if li.attrs['class'][1] == 'ball':
+            numbers.append(int(li.getText()))
+        elif li.attrs['class'][1] == 'lucky-star':
+            stars.append(int(li.getText()))
+
+    prizes = soup.find('table', {'class': "table breakdown mobFormat"})
+    if prizes is None:
+        return {'draw': tuple(numbers) + tuple(stars)}
+
+    try:
+        df = pd.read_html(io.StringIO(str(prizes)), flavor='bs4')[0]
+
+        main_prize = int(float(df.iloc[0, 1][1:].replace(',', '')))
+        winners = 0 if type(df.iloc[0, 4]) != np.int64 else int(df.iloc[0, 4])  # noqa: E721
+    except Exception:
+        return {'draw': tuple(numbers) + tuple(stars)}
+
+    return {
+        'draw': tuple(numbers) + tuple(stars),
+        'winners': winners,
+        'prize': main_prize
+    }
+
+
+def quiet(parse: Callable[[bytes], Optional[Dict[str, Any]]], page: bytes) -> Optional[Dict[str, Any]]:
+    """Run a parser without printing its warnings."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return parse(page)
+
+
+def best_time(parse: Callable[[bytes], Optional[Dict[str, Any]]], page: bytes, repeat: int) -> float:
+    """Get the shortest time, in seconds, to parse a page."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        quiet(parse, page)
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main() -> int:
+    """Run the benchmark and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="Number of runs of each parser on each page.")
+    args = parser.parse_args()
+
+    parsers: Dict[str, Callable[[bytes], Optional[Dict[str, Any]]]] = {
+        "legacy": legacy_parse_result_page,
+        "stdlib": lambda page: parse_result_page(page, use_lxml=False),
+    }
+    if HAS_LXML:
+        parsers["lxml"] = lambda page: parse_result_page(page, use_lxml=True)
+
+    results: List[Dict[str, Any]] = []
+    failed = False
+    for fixture in sorted(FIXTURES.glob("*.html")):
+        page = fixture.read_bytes()
+        expected = quiet(legacy_parse_result_page, page)
+
+        for name, parse in parsers.items():
+            result = quiet(parse, page)
+            failed = failed or result != expected
+            results.append({
+                "fixture": fixture.name,
+                "parser": name,
+                "seconds": best_time(parse, page, args.repeat),
+                "matches_legacy": result == expected,
+                "result": result
+            })
+
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
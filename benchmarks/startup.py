@@ -0,0 +1,120 @@
+"""Benchmark of the start up time of the command line clients.
+
+Each command runs on a new process, the same way cron jobs and scripts call it,
+and the heavy modules loaded are checked from the `-X importtime` report.
+
+Usage:
+    python benchmarks/startup.py [--repeat N] [--max-seconds S]
+
+The exit code is 1 if a command loads a module it doesn't need or takes longer than the limit.
+"""
+import argparse
+import json
+import pathlib
+import subprocess
+import sys
+import time
+from typing import (
+    Dict,
+    List,
+    Set,
+    Tuple
+)
+
+SRC = pathlib.Path(__file__).resolve().parent.parent / "src"
+
+HEAVY_MODULES = {"numpy", "pandas", "bs4"}
+
+# Command and the heavy modules it is allowed to load
+COMMANDS: List[Tuple[List[str], Set[str]]] = [
+    (["database.py", "--help"], set()),
+    (["database.py", "status"], set()),
+    (["database.py", "export", "--help"], set()),
+    (["database.py", "full-update", "--help"], set()),
+    (["database.py", "backfill", "--help"], set()),
+    (["game.py", "--help"], set()),
+    (["backtest.py", "--help"], set()),
+    (["service.py", "--help"], set()),
+]
+
+
+def loaded_modules(command: List[str]) -> Set[str]:
+    """Get the top level modules loaded by a command.
+
+    Parameters
+    ----------
+    command : List[str]
+        Script and arguments.
+
+    Returns
+    -------
+    Set[str]
+        Names of the top level modules imported.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", str(SRC / command[0])] + command[1:],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True
+    )
+
+    return {
+        line.rsplit("|", 1)[1].strip().split(".")[0]
+        for line in proc.stderr.splitlines() if line.startswith("import time:")
+    }
+
+
+def run_time(command: List[str], repeat: int) -> float:
+    """Get the best wall time of a command.
+
+    Parameters
+    ----------
+    command : List[str]
+        Script and arguments.
+    repeat : int
+        Number of runs.
+
+    Returns
+    -------
+    float
+        The shortest time, in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, str(SRC / command[0])] + command[1:], stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main() -> int:
+    """Run the benchmark and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs of each command.")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Maximum start up time of each command.")
+    args = parser.parse_args()
+
+    results: List[Dict] = []
+    failed = False
+    for command, allowed in COMMANDS:
+        unexpected = sorted((loaded_modules(command) & HEAVY_MODULES) - allowed)
+        seconds = run_time(command, args.repeat)
+        too_slow = args.max_seconds is not None and seconds > args.max_seconds
+
+        failed = failed or bool(unexpected) or too_slow
+        results.append({
+            "command": " ".join(command),
+            "seconds": round(seconds, 4),
+            "unexpected_modules": unexpected,
+            "too_slow": too_slow
+        })
+
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,463 @@
+"""Offline benchmark suite of the generator, the rules, the storage and the parser.
+
+The benchmarks run on synthetic databases with random draws, created on a temporary folder,
+and on the pages saved on `benchmarks/fixtures`, so they need no network and never touch `database.db`.
+Each benchmark is timed for each history size (draws stored) and number of tickets it depends on.
+The fast functions are called many times on each timed run (see `best_time`), the results are the time of a call.
+
+Usage:
+    python benchmarks/suite.py [--draws N ...] [--tickets N ...] [--repeat N] [--only NAME ...]
+                               [--output FILE] [--compare FILE] [--tolerance R]
+
+The results are printed as JSON, or written to --output. With --compare, each result is compared with
+the same benchmark and sizes of a previous run, and the exit code is 1 if any is slower than the tolerance.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import itertools
+import json
+import os
+import pathlib
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import (
+    date,
+    timedelta
+)
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple
+)
+
+import numpy as np
+
+SRC = pathlib.Path(__file__).resolve().parent.parent / "src"
+FIXTURES = pathlib.Path(__file__).resolve().parent / "fixtures"
+
+sys.path.insert(0, str(SRC))
+
+from codec import (  # noqa: E402
+    NUMBER_COMBINATIONS,
+    TOTAL_GAMES,
+    unrank_games
+)
+from constants import (  # noqa: E402
+    K_NUMBERS,
+    MAX_NUMBER,
+    MAX_STAR,
+    GameType
+)
+from game_generator import (  # noqa: E402
+    WEIGHTS_FILE,
+    generate_multiple_games,
+    get_combination_weights,
+    get_games_and_stats,
+    get_type_probabilities
+)
+from game_rules import (  # noqa: E402
+    DEFAULT_RULES,
+    DrawnGameIndex,
+    RuleSet,
+    already_happen
+)
+from scrapper import (  # noqa: E402
+    HAS_LXML,
+    parse_result_page
+)
+from snapshot import snapshot_files  # noqa: E402
+from sqlite import (  # noqa: E402
+    close_connection,
+    export_database,
+    init_database,
+    insert_new_result,
+    insert_results_bulk
+)
+
+# Rules checked on the rules benchmarks, the default rules plus all extra rules
+ALL_RULES = ["sum=75-180", "max-run=2", "decades=3", "low-high=1"]
+
+# Dates of the synthetic draws, one a day from this date
+FIRST_DATE = date(1800, 1, 1)
+
+# Results inserted one at a time on each run of the insert benchmark
+SINGLE_INSERTS = 50
+
+# Lookups of a single game on each run of the already_happen benchmark
+SINGLE_LOOKUPS = 1000
+
+# Each timed run calls the function until it takes at least this time, as `timeit.Timer.autorange`
+MIN_RUN_SECONDS = 0.2
+
+# Timed runs shorter than this are mostly noise of the timer and the scheduler, they never fail a comparison
+MIN_COMPARED_SECONDS = 1e-3
+
+Result = Dict[str, Any]
+
+# Shortest time of a call, in seconds, and number of calls on each timed run
+Timing = Tuple[float, int]
+
+
+def random_draws(n: int, rng: np.random.Generator) -> np.ndarray:
+    """Generate random draws, numbers and stars different on each draw.
+
+    Parameters
+    ----------
+    n : int
+        Number of draws.
+    rng : np.random.Generator
+        Random number generator.
+
+    Returns
+    -------
+    np.ndarray
+        Array with shape (n, 7), the last two values are stars.
+    """
+    numbers = np.argsort(rng.random((n, MAX_NUMBER)), axis=1)[:, :K_NUMBERS] + 1
+    stars = np.argsort(rng.random((n, MAX_STAR)), axis=1)[:, :2] + 1
+
+    return np.concatenate((numbers, stars), axis=1)
+
+
+def random_results(draws: np.ndarray, first: date) -> List[Tuple[date, Dict[str, Any]]]:
+    """Build results to be inserted, one draw a day from the first date."""
+    return [
+        (first + timedelta(days=i), {'draw': tuple(draw), 'winners': 0, 'prize': 17000000})
+        for i, draw in enumerate(draws.tolist())
+    ]
+
+
+def _call_counts() -> Iterator[int]:
+    """Yield the number of calls of each timed run while looking for a long enough run: 1, 2, 5, 10, 20, 50, ..."""
+    for power in itertools.count():
+        for base in (1, 2, 5):
+            yield base * 10 ** power
+
+
+def _timed_run(func: Callable[[], Any], calls: int, setup: Optional[Callable[[], Any]] = None) -> float:
+    """Get the time, in seconds, of some calls to a function, without the time of the setup.
+
+    The garbage collector is disabled while the calls run, as `timeit` does, so its pauses are not timed.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        if setup is None:
+            start = time.perf_counter()
+            for _ in range(calls):
+                func()
+            return time.perf_counter() - start
+
+        seconds = 0.0
+        for _ in range(calls):
+            setup()
+            start = time.perf_counter()
+            func()
+            seconds += time.perf_counter() - start
+
+        return seconds
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def best_time(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Timing:
+    """Get the shortest time, in seconds, of a call to a function.
+
+    As `timeit.Timer.autorange`, the number of calls of a run grows until the run takes at least
+    MIN_RUN_SECONDS, so the fast functions are not timed by a single call below the timer noise.
+    The run that reaches that time is the first of the runs kept.
+
+    Parameters
+    ----------
+    func : Callable[[], Any]
+        Function to be timed.
+    repeat : int
+        Number of runs.
+    setup : Optional[Callable[[], Any]], optional
+        Function run before each call and not timed, by default None.
+
+    Returns
+    -------
+    Timing
+        The shortest time of a call on all runs and the number of calls of each run.
+    """
+    for calls in _call_counts():
+        seconds = _timed_run(func, calls, setup)
+        if seconds >= MIN_RUN_SECONDS:
+            break
+
+    times = [seconds] + [_timed_run(func, calls, setup) for _ in range(repeat - 1)]
+
+    return min(times) / calls, calls
+
+
+def result(benchmark: str, timing: Timing, items: int, **sizes: Any) -> Result:
+    """Build the result of a benchmark, with the items (e.g. tickets or rows) per second."""
+    seconds, calls = timing
+    return {
+        "benchmark": benchmark,
+        **sizes,
+        "seconds": seconds,
+        "calls": calls,
+        "per_second": items / seconds if seconds > 0 else None
+    }
+
+
+@contextlib.contextmanager
+def synthetic_database(draws: int, seed: int) -> Iterator[float]:
+    """Create a database with random draws on a temporary folder and work on it.
+
+    The database file, and the files stored next to it, are relative to the working directory,
+    so the working directory is the temporary folder while the context is open.
+
+    Yields
+    ------
+    Iterator[float]
+        The time, in seconds, to insert all draws at once.
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="euromillions-benchmark-") as folder:
+        os.chdir(folder)
+        close_connection()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                init_database()
+
+            results = random_results(random_draws(draws, np.random.default_rng(seed)), FIRST_DATE)
+            start = time.perf_counter()
+            insert_results_bulk(results, fast=True)
+            yield time.perf_counter() - start
+        finally:
+            close_connection()
+            os.chdir(cwd)
+
+
+def storage_benchmarks(draws: int, repeat: int, insert_seconds: float) -> Iterator[Result]:
+    """Time loading the draws, the lookups of drawn games and the inserts and exports of the database."""
+    yield result("insert_results_bulk", (insert_seconds, 1), draws, draws=draws)
+
+    def drop_snapshot():
+        for filename in snapshot_files():
+            if filename.exists():
+                filename.unlink()
+
+    yield result(
+        "get_games_and_stats_cold", best_time(get_games_and_stats, repeat, drop_snapshot), draws, draws=draws
+    )
+    yield result("get_games_and_stats", best_time(get_games_and_stats, repeat), draws, draws=draws)
+
+    games = get_games_and_stats()[0]
+    index = DrawnGameIndex(games)
+    lookups = games[np.random.default_rng(0).integers(0, len(games), SINGLE_LOOKUPS)]
+
+    def lookup_all():
+        for game in lookups:
+            already_happen(game, index)
+
+    yield result("already_happen", best_time(lookup_all, repeat), SINGLE_LOOKUPS, draws=draws)
+
+    with tempfile.TemporaryDirectory() as folder:
+        filename = str(pathlib.Path(folder) / "results.csv")
+        with contextlib.redirect_stdout(io.StringIO()):
+            timing = best_time(lambda: export_database(filename), repeat)
+    yield result("export_database", timing, draws, draws=draws)
+
+    # Last, it adds draws to the database: new dates after the synthetic history on each call
+    rng = np.random.default_rng(draws)
+    new_results = itertools.chain.from_iterable(
+        random_results(random_draws(SINGLE_INSERTS, rng), FIRST_DATE + timedelta(days=draws + i * SINGLE_INSERTS))
+        for i in itertools.count()
+    )
+
+    def insert_some():
+        for _ in range(SINGLE_INSERTS):
+            insert_new_result(*next(new_results))
+
+    yield result("insert_new_result", best_time(insert_some, repeat), SINGLE_INSERTS, draws=draws)
+
+
+def generator_benchmarks(draws: int, tickets: List[int], repeat: int) -> Iterator[Result]:
+    """Time the probabilities of the combinations, the generation and the lookups of generated games."""
+    game_types = [GameType.random, GameType.high_frequency]
+    games, *stats = get_games_and_stats()
+    probabilities = get_type_probabilities(game_types, tuple(stats))
+
+    def drop_weights():
+        if WEIGHTS_FILE.exists():
+            WEIGHTS_FILE.unlink()
+
+    timing = best_time(lambda: get_combination_weights(stats[0], stats[3], probabilities), repeat, drop_weights)
+    yield result("get_combination_weights_cold", timing, len(game_types), draws=draws)
+
+    index = DrawnGameIndex(games)
+    rng = np.random.default_rng(draws)
+    for n in tickets:
+        timing = best_time(lambda: generate_multiple_games(game_types, n, seed=0), repeat)
+        yield result("generate_multiple_games", timing, n * len(game_types), draws=draws, tickets=n)
+
+        candidates = unrank_games(rng.integers(0, TOTAL_GAMES, n))
+        timing = best_time(lambda: index.contains(candidates), repeat)
+        yield result("drawn_game_index", timing, n, draws=draws, tickets=n)
+
+
+def rules_benchmarks(tickets: List[int], repeat: int) -> Iterator[Result]:
+    """Time the rules on blocks of tickets and on all combinations of numbers."""
+    rng = np.random.default_rng(0)
+    rule_set = RuleSet.from_specs(ALL_RULES)
+    for n in tickets:
+        candidates = unrank_games(rng.integers(0, TOTAL_GAMES, n))
+        yield result("rules_check", best_time(lambda: rule_set.check(candidates), repeat), n, tickets=n)
+
+    # All combinations of numbers are checked
+    for name, specs in (("default", []), ("all", ALL_RULES)):
+        rule_set = RuleSet.from_specs(specs)
+        timing = best_time(rule_set.valid_numbers, repeat)
+        yield result("rules_valid_numbers", timing, NUMBER_COMBINATIONS, rules=",".join(DEFAULT_RULES + tuple(specs)))
+
+
+def parser_benchmarks(repeat: int) -> Iterator[Result]:
+    """Time the parser on the pages saved on the fixtures."""
+    parsers = {"stdlib": False}
+    if HAS_LXML:
+        parsers["lxml"] = True
+
+    for fixture in sorted(FIXTURES.glob("*.html")):
+        page = fixture.read_bytes()
+        for name, use_lxml in parsers.items():
+            with contextlib.redirect_stdout(io.StringIO()):
+                timing = best_time(lambda: parse_result_page(page, use_lxml=use_lxml), repeat)
+            yield result("parse_result_page", timing, 1, fixture=fixture.name, parser=name)
+
+
+def git_commit() -> Optional[str]:
+    """Get the commit of the working tree, None if it is not a git repository."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=str(SRC), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_key(item: Result) -> Tuple[Tuple[str, Any], ...]:
+    """Get the benchmark and the sizes of a result, to find the same result on another run."""
+    return tuple(sorted((k, v) for k, v in item.items() if k not in ("seconds", "calls", "per_second")))
+
+
+def compare(results: List[Result], previous: List[Result], tolerance: float) -> List[Result]:
+    """Compare the results with the results of a previous run.
+
+    Parameters
+    ----------
+    results : List[Result]
+        Results of this run.
+    previous : List[Result]
+        Results of the previous run, the results without a match are skipped.
+    tolerance : float
+        Highest ratio of the time to the previous time not reported as slower, minus one.
+
+    Returns
+    -------
+    List[Result]
+        For each result on both runs, the sizes, both times, their ratio and if it is slower.
+        A result is never slower when a timed run of either time is shorter than MIN_COMPARED_SECONDS.
+    """
+    before = {result_key(item): item for item in previous}
+
+    comparison = []
+    for item in results:
+        key = result_key(item)
+        if key not in before:
+            continue
+
+        seconds, previous_seconds = item["seconds"], before[key]["seconds"]
+        # Results of older runs don't have the calls, they were timed by a single call
+        run_seconds = min(seconds * item.get("calls", 1), previous_seconds * before[key].get("calls", 1))
+
+        ratio = seconds / previous_seconds if previous_seconds > 0 else None
+        comparison.append({
+            **dict(key),
+            "seconds": seconds,
+            "previous_seconds": previous_seconds,
+            "ratio": ratio,
+            "slower": ratio is not None and ratio > 1 + tolerance and run_seconds >= MIN_COMPARED_SECONDS
+        })
+
+    return comparison
+
+
+BENCHMARKS = ("storage", "generator", "rules", "parser")
+
+
+def main() -> int:
+    """Run the benchmarks and print the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--draws", type=int, nargs="+", default=[1000, 10000, 100000], help="Numbers of draws on the database."
+    )
+    parser.add_argument(
+        "--tickets", type=int, nargs="+", default=[1, 100, 10000, 1000000], help="Numbers of tickets generated."
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs of each benchmark, the best is kept.")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS, help="Benchmarks to be run.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic draws.")
+    parser.add_argument("--output", type=pathlib.Path, help="File to write the results, by default stdout.")
+    parser.add_argument("--compare", type=pathlib.Path, help="Results of a previous run to compare with.")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25,
+        help="Fraction a benchmark can be slower than on the previous run before failing."
+    )
+    args = parser.parse_args()
+
+    results: List[Result] = []
+    if "storage" in args.only or "generator" in args.only:
+        for draws in args.draws:
+            with synthetic_database(draws, args.seed) as insert_seconds:
+                # The generator runs first, the storage benchmarks insert more draws at the end
+                if "generator" in args.only:
+                    results.extend(generator_benchmarks(draws, args.tickets, args.repeat))
+                if "storage" in args.only:
+                    results.extend(storage_benchmarks(draws, args.repeat, insert_seconds))
+
+    if "rules" in args.only:
+        results.extend(rules_benchmarks(args.tickets, args.repeat))
+    if "parser" in args.only:
+        results.extend(parser_benchmarks(args.repeat))
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+            "seed": args.seed
+        },
+        "results": results
+    }
+
+    failed = False
+    if args.compare is not None:
+        report["comparison"] = compare(results, json.loads(args.compare.read_text())["results"], args.tolerance)
+        failed = any(item["slower"] for item in report["comparison"])
+
+    with (open(args.output, "w") if args.output else contextlib.nullcontext(sys.stdout)) as stream:
+        json.dump(report, stream, indent=2)
+        stream.write("\n")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
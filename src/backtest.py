@@ -0,0 +1,129 @@
+"""Module with client commands to backtest games against the draws stored."""
+import pathlib
+from datetime import datetime
+from typing import (
+    List,
+    Optional
+)
+
+import typer
+
+from constants import (
+    HALF_LIFE_DAYS,
+    WINDOW_DAYS,
+    BacktestPeriod,
+    GameType,
+    OutputFormat
+)
+
+
+def backtest_games(
+    game_types: List[GameType] = typer.Option(
+        None, "--type", "-t", show_choices=True,
+        help="Game type to generate and backtest. It can be multiple types at once."
+    ),
+    number_of_games: int = typer.Option(
+        1000, "--num-of-games", "-n", show_default=True,
+        help="Number of games generate for each type."
+    ),
+    rules: List[str] = typer.Option(
+        None, "--rule", "-r",
+        help="Extra rule for the games generated (see the game command). It can be multiple rules at once."
+    ),
+    seed: Optional[int] = typer.Option(
+        None, "--seed", "-s",
+        help="Seed to repeat the games generated."
+    ),
+    window: int = typer.Option(
+        WINDOW_DAYS, "--window", min=1, show_default=True,
+        help="Days before the last draw used by the recent-high-frequency and recent-low-frequency types."
+    ),
+    half_life: float = typer.Option(
+        HALF_LIFE_DAYS, "--half-life", min=0.001, show_default=True,
+        help="Days for the weight of a draw to halve on the decayed-high-frequency and decayed-low-frequency types."
+    ),
+    games_file: Optional[pathlib.Path] = typer.Option(
+        None, "--input", "-i", exists=True, dir_okay=False, readable=True,
+        help="CSV file with the games to backtest (see game --format csv), instead of generating them."
+    ),
+    since: Optional[datetime] = typer.Option(
+        None, formats=["%Y-%m-%d"],
+        help="First draw date to backtest. By default the first draw."
+    ),
+    until: Optional[datetime] = typer.Option(
+        None, formats=["%Y-%m-%d"],
+        help="Last draw date to backtest. By default the last draw stored."
+    ),
+    period: BacktestPeriod = typer.Option(
+        BacktestPeriod.all, "--period", "-p", show_default=True,
+        help="Time window of each summary."
+    ),
+    output_format: OutputFormat = typer.Option(
+        OutputFormat.text, "--format", "-f", show_default=True,
+        help="Format of the results. CSV and NDJSON have one summary per line."
+    ),
+    output: Optional[pathlib.Path] = typer.Option(
+        None, "--output", "-o", dir_okay=False, writable=True,
+        help="File to write the results. By default the results are written to stdout."
+    )
+):
+    """
+    Backtest games on the draws stored.
+
+    Each game plays on every draw and the summaries count the plays that won each prize tier,
+    by game type and time window. The games are generated, or read from a file with --input.
+    """
+    # Imported here, so the help and the option parsing don't load numpy
+    from game_backtest import (
+        backtest,
+        draws_between
+    )
+    from game_generator import (
+        NotEnoughGamesError,
+        iter_multiple_games
+    )
+    from game_output import (
+        read_games,
+        write_backtest
+    )
+    from game_rules import RuleSet
+    from sqlite import DatabaseNotInitializedError
+
+    to_stderr = output_format != OutputFormat.text
+
+    try:
+        draws, dates = draws_between(since and since.date(), until and until.date())
+
+        if games_file is not None:
+            with open(games_file, newline='') as stream:
+                summaries = backtest(read_games(stream), draws, dates, period)
+        else:
+            try:
+                rule_set = RuleSet.from_specs(rules or [])
+            except ValueError as e:
+                raise typer.BadParameter(str(e), param_hint="'--rule'")
+
+            batches = iter_multiple_games(
+                game_types or [GameType.random, GameType.high_frequency, GameType.low_frequency],
+                number_of_games, rule_set, seed, batch_size=100000, window=window, half_life=half_life
+            )
+            summaries = backtest(((gt.value, games) for gt, games in batches), draws, dates, period)
+
+    except (DatabaseNotInitializedError, ValueError, NotEnoughGamesError) as e:
+        typer.echo(typer.style("ERROR: ", fg=typer.colors.RED, bold=True) + str(e), err=to_stderr)
+        raise typer.Exit(code=1)
+
+    if len(draws) == 0:
+        typer.echo(
+            typer.style("WARNING: ", fg=typer.colors.YELLOW, bold=True) + "There are no draws to backtest.",
+            err=to_stderr
+        )
+
+    with typer.open_file(str(output) if output else '-', mode='w') as stream:
+        write_backtest(summaries, output_format, stream)
+
+
+if __name__ == "__main__":
+    app = typer.Typer(add_completion=False)
+    app.command()(backtest_games)
+    app()
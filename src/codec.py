@@ -0,0 +1,175 @@
+"""Module to encode games as ranks on the space of all possible games.
+
+A game is 5 numbers out of 50 plus 2 stars out of 12, so there are
+2,118,760 * 66 = 139,838,160 possible games. Each game is mapped to a
+dense rank, numbers and stars use the combinatorial number system (colex order):
+
+    rank = number_rank * STAR_COMBINATIONS + star_rank
+"""
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+
+from constants import (
+    K_NUMBERS,
+    K_STARS,
+    MAX_NUMBER,
+    MAX_STAR
+)
+
+
+def _binomial_table(n: int, k: int) -> np.ndarray:
+    """Build a table where the value on [i, j] is the binomial coefficient C(i, j).
+
+    Parameters
+    ----------
+    n : int
+        Highest value of i.
+    k : int
+        Highest value of j.
+
+    Returns
+    -------
+    np.ndarray
+        Array with shape (n + 1, k + 1).
+    """
+    table: List[List[int]] = [[0] * (k + 1) for _ in range(n + 1)]
+    for i in range(n + 1):
+        table[i][0] = 1
+        for j in range(1, min(i, k) + 1):
+            table[i][j] = table[i - 1][j - 1] + (table[i - 1][j] if j < i else 0)
+
+    return np.array(table, dtype=np.int64)
+
+
+BINOMIAL = _binomial_table(MAX_NUMBER, K_NUMBERS)
+
+NUMBER_COMBINATIONS = int(BINOMIAL[MAX_NUMBER, K_NUMBERS])
+STAR_COMBINATIONS = int(BINOMIAL[MAX_STAR, K_STARS])
+TOTAL_GAMES = NUMBER_COMBINATIONS * STAR_COMBINATIONS
+
+
+def rank_combinations(values: np.ndarray) -> np.ndarray:
+    """Rank combinations of values with the combinatorial number system.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Combinations with shape (N, k), values start at 1 and the order does not matter.
+
+    Returns
+    -------
+    np.ndarray
+        Array with the rank of each combination.
+    """
+    values = np.sort(np.asarray(values, dtype=np.int64), axis=-1) - 1
+    k = values.shape[-1]
+
+    return BINOMIAL[values, np.arange(1, k + 1)].sum(axis=-1)
+
+
+def unrank_combinations(ranks: np.ndarray, k: int) -> np.ndarray:
+    """Get the combinations of values for the given ranks.
+
+    Parameters
+    ----------
+    ranks : np.ndarray
+        Ranks of the combinations.
+    k : int
+        Number of values on each combination.
+
+    Returns
+    -------
+    np.ndarray
+        Combinations with shape (N, k) with the values, starting at 1, sorted on each row.
+    """
+    ranks = np.array(ranks, dtype=np.int64, ndmin=1)
+    values = np.empty((len(ranks), k), dtype=np.int64)
+
+    for i in range(k, 0, -1):
+        # Highest value c with C(c, i) <= rank, the column is non-decreasing on c
+        c = np.searchsorted(BINOMIAL[:, i], ranks, side='right') - 1
+        ranks = ranks - BINOMIAL[c, i]
+        values[:, i - 1] = c
+
+    return values + 1
+
+
+@lru_cache(maxsize=None)
+def combinations_table(n: int, k: int) -> np.ndarray:
+    """Build all combinations of k values out of n, ordered by rank.
+
+    The first C(c, j) combinations of j values only use the values up to c, so the table of
+    j values is built from the table of j - 1 values adding the highest value of each block.
+
+    Parameters
+    ----------
+    n : int
+        Number of values, the values are 1 to n.
+    k : int
+        Number of values on each combination.
+
+    Returns
+    -------
+    np.ndarray
+        Read only array with shape (C(n, k), k), the row i is the combination with rank i, sorted.
+    """
+    table = np.zeros((1, 0), dtype=np.int8)
+    for j in range(1, k + 1):
+        # Number of combinations for each highest value c = j - 1, ..., n - 1 (0-based)
+        counts = BINOMIAL[j - 1:n, j - 1]
+        new_table = np.empty((int(counts.sum()), j), dtype=np.int8)
+
+        offset = 0
+        for c, count in zip(range(j - 1, n), counts):
+            new_table[offset:offset + count, :-1] = table[:count]
+            new_table[offset:offset + count, -1] = c
+            offset += count
+
+        table = new_table
+    table += 1
+    table.setflags(write=False)
+    return table
+
+
+def rank_games(games: np.ndarray) -> np.ndarray:
+    """Encode games as ranks.
+
+    Parameters
+    ----------
+    games : np.ndarray
+        Block of games with shape (N, 7), the last two values of each game are stars.
+
+    Returns
+    -------
+    np.ndarray
+        Array with the rank of each game.
+    """
+    games = np.atleast_2d(games)
+
+    return (
+        rank_combinations(games[:, :K_NUMBERS]) * STAR_COMBINATIONS +
+        rank_combinations(games[:, K_NUMBERS:])
+    )
+
+
+def unrank_games(ranks: np.ndarray) -> np.ndarray:
+    """Decode ranks as games.
+
+    Parameters
+    ----------
+    ranks : np.ndarray
+        Ranks of the games.
+
+    Returns
+    -------
+    np.ndarray
+        Block of games with shape (N, 7), the last two values of each game are stars.
+    """
+    number_ranks, star_ranks = np.divmod(np.array(ranks, dtype=np.int64, ndmin=1), STAR_COMBINATIONS)
+
+    return np.concatenate((
+        unrank_combinations(number_ranks, K_NUMBERS),
+        unrank_combinations(star_ranks, K_STARS)
+    ), axis=1)
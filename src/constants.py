@@ -0,0 +1,48 @@
+"""Module with the definitions shared by all modules.
+
+It must only import the standard library, so the commands that don't
+generate games start without loading numpy or pandas.
+"""
+from enum import Enum
+
+# A game has 5 numbers, from 1 to 50, and 2 stars, from 1 to 12
+K_NUMBERS = 5
+K_STARS = 2
+
+MAX_NUMBER = 50
+MAX_STAR = 12
+
+# Days before the last draw used by the recent frequency types
+WINDOW_DAYS = 365
+
+# Days for the weight of a draw to halve on the decayed frequency types
+HALF_LIFE_DAYS = 180.0
+
+
+class GameType(str, Enum):
+    """Class of type of games."""
+
+    random = "random"
+    high_frequency = "high-frequency"
+    low_frequency = "low-frequency"
+    recent_high_frequency = "recent-high-frequency"
+    recent_low_frequency = "recent-low-frequency"
+    decayed_high_frequency = "decayed-high-frequency"
+    decayed_low_frequency = "decayed-low-frequency"
+    co_occurrence = "co-occurrence"
+
+
+class OutputFormat(str, Enum):
+    """Class of formats to write the games generated."""
+
+    text = "text"
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+class BacktestPeriod(str, Enum):
+    """Class of time windows to summarize the backtest of the games."""
+
+    all = "all"
+    year = "year"
+    month = "month"
@@ -0,0 +1,263 @@
+"""Module with how many times each pair, and each triplet, of values were drawn together.
+
+With the draws one-hot encoded as a matrix X (one row per draw, one column per value),
+the pair counts are X.T @ X in a single pass: the diagonal has the frequency of each value
+and the cell [i, j] how many draws had both values. The counts only add up, so new draws
+are added to the counts stored instead of counting all draws again.
+"""
+import os
+import pathlib
+from typing import (
+    Optional,
+    Tuple
+)
+
+import numpy as np
+
+from codec import rank_combinations
+from constants import (
+    K_NUMBERS,
+    K_STARS,
+    MAX_NUMBER,
+    MAX_STAR
+)
+from frequency import value_counts
+from snapshot import load_snapshot
+from sqlite import DBFILE
+
+# Counts of the draws stored, next to the database
+COOCCURRENCE_FILE = DBFILE.with_name("cooccurrence.npz")
+
+# Positions of the 10 triplets of numbers of a draw
+_TRIPLETS = np.array([
+    (i, j, k) for i in range(K_NUMBERS) for j in range(i + 1, K_NUMBERS) for k in range(j + 1, K_NUMBERS)
+])
+
+
+def pair_counts(values: np.ndarray, max_value: int) -> np.ndarray:
+    """Count how many draws had each pair of values.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Values of each draw with shape (N, k), from 1 to max_value.
+    max_value : int
+        Highest possible value.
+
+    Returns
+    -------
+    np.ndarray
+        Symmetric array with shape (max_value, max_value), the cell [i, j] counts the values i + 1 and j + 1
+        drawn together and the diagonal counts each value.
+    """
+    one_hot = value_counts(values, max_value).astype(np.float64)
+
+    # The product runs on BLAS, the counts are exact integers on float64
+    return np.rint(one_hot.T @ one_hot).astype(np.int64)
+
+
+def triplet_ranks(numbers: np.ndarray) -> np.ndarray:
+    """Get the rank of each triplet of numbers of each draw (see `codec.rank_combinations`).
+
+    Parameters
+    ----------
+    numbers : np.ndarray
+        Numbers of each draw with shape (N, 5).
+
+    Returns
+    -------
+    np.ndarray
+        Array with shape (N * 10,) with the ranks of the triplets, 0 to C(50, 3) - 1.
+    """
+    numbers = np.asarray(numbers).reshape(-1, K_NUMBERS)
+    return rank_combinations(numbers[:, _TRIPLETS].reshape(-1, 3))
+
+
+class CooccurrenceTable:
+    """Counts of the pairs of numbers, of the pairs of stars and, optionally, of the triplets of numbers drawn.
+
+    Only the triplets drawn are kept (at most 10 for each draw out of C(50, 3)),
+    as their ranks sorted and the count of each one.
+
+    Parameters
+    ----------
+    triplets : bool, optional
+        Count the triplets of numbers too, by default False.
+    """
+
+    def __init__(self, triplets: bool = False):
+        """Initialize the counts without draws."""
+        self.numbers = np.zeros((MAX_NUMBER, MAX_NUMBER), dtype=np.int64)
+        self.stars = np.zeros((MAX_STAR, MAX_STAR), dtype=np.int64)
+        # Draws counted, sorted by date, to find the draws not counted yet
+        self.draws = np.empty((0, K_NUMBERS + K_STARS), dtype=np.uint8)
+        self.dates = np.empty(0, dtype="datetime64[D]")
+
+        self.triplets = triplets
+        self.triplet_ranks = np.empty(0, dtype=np.int64)
+        self.triplet_counts = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        """Return the number of draws counted."""
+        return len(self.dates)
+
+    def update(self, draws: np.ndarray, dates: np.ndarray):
+        """Add new draws to the counts.
+
+        Parameters
+        ----------
+        draws : np.ndarray
+            Draws with shape (N, 7), the last two values are stars, numbers and stars sorted.
+        dates : np.ndarray
+            Date of each draw, none of them already counted.
+        """
+        draws = np.asarray(draws).reshape(-1, K_NUMBERS + K_STARS)
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        if len(draws) == 0:
+            return
+
+        self.numbers += pair_counts(draws[:, :K_NUMBERS], MAX_NUMBER)
+        self.stars += pair_counts(draws[:, K_NUMBERS:], MAX_STAR)
+
+        if self.triplets:
+            ranks, inverse = np.unique(
+                np.concatenate((self.triplet_ranks, triplet_ranks(draws[:, :K_NUMBERS]))), return_inverse=True
+            )
+            weights = np.concatenate((self.triplet_counts, np.ones(len(draws) * len(_TRIPLETS), dtype=np.int64)))
+            self.triplet_ranks = ranks
+            self.triplet_counts = np.bincount(inverse, weights=weights, minlength=len(ranks)).astype(np.int64)
+
+        dates = np.concatenate((self.dates, dates))
+        order = np.argsort(dates, kind='stable')
+        self.draws = np.concatenate((self.draws, draws.astype(np.uint8)))[order]
+        self.dates = dates[order]
+
+    def count_triplets(self, numbers: np.ndarray) -> np.ndarray:
+        """Count how many draws had each triplet of numbers.
+
+        Parameters
+        ----------
+        numbers : np.ndarray
+            Triplets of numbers with shape (N, 3), in any order.
+
+        Returns
+        -------
+        np.ndarray
+            Array with the count of each triplet.
+
+        Raises
+        ------
+        ValueError
+            If the triplets were not counted.
+        """
+        if not self.triplets:
+            raise ValueError("The triplets of numbers were not counted.")
+
+        ranks = rank_combinations(np.asarray(numbers).reshape(-1, 3))
+        if len(self.triplet_ranks) == 0:
+            return np.zeros(len(ranks), dtype=np.int64)
+
+        idx = np.minimum(np.searchsorted(self.triplet_ranks, ranks), len(self.triplet_ranks) - 1)
+        return np.where(self.triplet_ranks[idx] == ranks, self.triplet_counts[idx], 0)
+
+    def save(self, filename: pathlib.Path = COOCCURRENCE_FILE):
+        """Save the counts on a file, replacing it atomically.
+
+        Parameters
+        ----------
+        filename : pathlib.Path, optional
+            File to be written, by default COOCCURRENCE_FILE.
+        """
+        tmp = filename.with_name(f"{filename.name}.{os.getpid()}.tmp")
+        with open(tmp, 'wb') as f:
+            np.savez(
+                f, numbers=self.numbers, stars=self.stars, draws=self.draws, dates=self.dates,
+                triplets=np.array(self.triplets), triplet_ranks=self.triplet_ranks, triplet_counts=self.triplet_counts
+            )
+        os.replace(tmp, filename)
+
+    @classmethod
+    def load(cls, filename: pathlib.Path = COOCCURRENCE_FILE) -> Optional['CooccurrenceTable']:
+        """Load the counts saved on a file.
+
+        Parameters
+        ----------
+        filename : pathlib.Path, optional
+            File with the counts, by default COOCCURRENCE_FILE.
+
+        Returns
+        -------
+        Optional[CooccurrenceTable]
+            The counts, None if the file doesn't exist or can't be read.
+        """
+        if not filename.exists():
+            return None
+
+        try:
+            with np.load(filename) as data:
+                table = cls(bool(data['triplets']))
+                for name in ('numbers', 'stars', 'draws', 'dates', 'triplet_ranks', 'triplet_counts'):
+                    setattr(table, name, data[name])
+        except (OSError, ValueError, KeyError):
+            return None
+
+        return table
+
+    @classmethod
+    def from_snapshot(cls, triplets: bool = False) -> 'CooccurrenceTable':
+        """Get the counts of the draws of the snapshot of the database.
+
+        The counts stored are used if the draws they counted are still the same,
+        only the draws inserted since are added, and the counts are stored again.
+
+        Parameters
+        ----------
+        triplets : bool, optional
+            Count the triplets of numbers too, by default False.
+
+        Returns
+        -------
+        CooccurrenceTable
+            The counts of all draws stored.
+        """
+        draws, dates = load_snapshot()
+
+        table = cls.load()
+        counted = np.zeros(len(dates), dtype=bool)
+        if table is not None:
+            counted = np.isin(dates, table.dates)
+            changed = (
+                (triplets and not table.triplets) or
+                np.count_nonzero(counted) != len(table) or
+                not np.array_equal(draws[counted], table.draws)
+            )
+            if changed:
+                # A draw counted was removed or changed, all draws are counted again
+                table = None
+                counted[:] = False
+
+        if table is None or not counted.all():
+            if table is None:
+                table = cls(triplets)
+            table.update(draws[~counted], dates[~counted])
+            table.save()
+
+        return table
+
+    def affinity(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the affinity of each pair of numbers and of each pair of stars.
+
+        It is the count of the pair plus one, so the pairs never drawn can still be chosen,
+        and zero for a value with itself.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            Arrays with shape (50, 50) and (12, 12), indexed by value - 1.
+        """
+        numbers = self.numbers + 1.0
+        stars = self.stars + 1.0
+        np.fill_diagonal(numbers, 0)
+        np.fill_diagonal(stars, 0)
+
+        return numbers, stars
@@ -1,34 +1,96 @@
 """Module with client commands to the database."""
+import pathlib
+from collections import Counter
 from datetime import (
+    date,
     datetime,
     timedelta
 )
+from itertools import islice
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple
+)
 
 import typer
 
+import profiling
 from sqlite import (
+    DatabaseNotInitializedError,
+    ExportFormat,
+    FetchStatus,
+    check_database,
     delete_database,
+    ensure_tables,
     export_database,
+    get_fetch_journal,
     get_number_of_results,
     get_last_draw_date,
     get_result_by_date,
+    get_result_dates,
     init_database,
-    insert_new_result
+    insert_new_result,
+    insert_results_bulk,
+    rebuild_frequency_tables,
+    record_fetches
 )
 
+from draw_schedule import (
+    FIRST_DRAW_DATE,
+    draw_dates,
+    is_draw_date
+)
 from scrapper import (
+    EURO_MAIN_URL,
+    FINAL_AFTER,
+    PageCache,
+    fetch_euro_millions_results,
     get_euro_millions_result
 )
 
-from utils import (
-    days_between,
-    print_game
-)
+from utils import print_game
 
 
 app = typer.Typer(add_completion=False)
 
 
+@app.callback()
+def main(
+    ctx: typer.Context,
+    profile: Optional[pathlib.Path] = typer.Option(
+        None, "--profile", dir_okay=False, writable=True,
+        help="File to write a JSON report with the time of each stage and the counters of the command."
+    )
+):
+    """Manage the database of Euromillions results."""
+    if profile is not None:
+        profiling.enable()
+        ctx.call_on_close(lambda: profiling.write_report(profile, ctx.invoked_subcommand))
+
+
+def require_database(migrate: bool = False):
+    """Check the database was initialized, or exit with an error.
+
+    Parameters
+    ----------
+    migrate : bool, optional
+        Create the tables missing on databases created by older versions, by default False.
+        Only the commands that write on the database change it.
+    """
+    try:
+        if migrate:
+            ensure_tables()
+        else:
+            check_database()
+    except DatabaseNotInitializedError as e:
+        typer.echo(typer.style("ERROR: ", fg=typer.colors.RED, bold=True) + str(e))
+        raise typer.Exit(code=1)
+
+
 @app.command(name='init')
 def initialize(overwrite: bool = typer.Option(False, help='Overwrite existing database.', show_default=True)):
     """
@@ -59,6 +121,8 @@ def database_status():
     Last draw date stored |
     Last results stored.
     """
+    require_database()
+
     last_draw_date = get_last_draw_date()
     result = get_result_by_date(last_draw_date)
     total = get_number_of_results()
@@ -80,6 +144,203 @@ def database_status():
         typer.secho("\tNo result found", fg=typer.colors.YELLOW)
 
 
+def save_result(draw_date: date, result: Optional[Dict[str, Any]]):
+    """Save a result on the database and print it.
+
+    Parameters
+    ----------
+    draw_date : date
+        Date of the draw.
+    result : Optional[Dict[str, Any]]
+        Result extracted from the web page, None if there is no result.
+    """
+    if result:
+        if insert_new_result(draw_date, result):
+            typer.echo("Result saved!")
+            print_game(result['draw'])
+
+
+def save_results(results: List[Tuple[date, Dict[str, Any]]]) -> List[bool]:
+    """Save many results on the database, in a single transaction, and print them.
+
+    Parameters
+    ----------
+    results : List[Tuple[date, Dict[str, Any]]]
+        Date of the draw and the result extracted from the web page.
+
+    Returns
+    -------
+    List[bool]
+        For each result, True if it was saved.
+    """
+    if not results:
+        return []
+
+    inserted = insert_results_bulk(results, fast=True)
+    for (dt, result), saved in zip(results, inserted):
+        if saved:
+            typer.echo(
+                "Result saved for " +
+                typer.style(f"{dt:%Y-%m-%d}", fg=typer.colors.GREEN, bold=True)
+            )
+            print_game(result['draw'])
+
+    return inserted
+
+
+def fetch_and_save(
+    dates: List[date],
+    workers: int,
+    rate_limit: float,
+    retries: int,
+    base_url: str,
+    batch_size: int,
+    cache: Optional[PageCache]
+) -> Counter:
+    """Read the results of some dates, save them in batches and record each date on the fetch journal.
+
+    Offline, the dates whose page is not stored are counted as failed but not recorded,
+    as nothing was read from the server they must be read again online without waiting.
+
+    Parameters
+    ----------
+    dates : List[date]
+        Draw dates to be read.
+    workers : int
+        Number of web pages read at the same time.
+    rate_limit : float
+        Maximum number of requests per second, 0 means no limit.
+    retries : int
+        Number of times to try again a failed request.
+    base_url : str
+        Main address of the results web pages.
+    batch_size : int
+        Number of results saved on the database at once.
+    cache : Optional[PageCache]
+        Pages stored on disk, None to always read from the server.
+
+    Returns
+    -------
+    Counter
+        Number of dates of each fetch status.
+    """
+    results = fetch_euro_millions_results(dates, workers, rate_limit, retries, base_url, cache)
+    offline = cache is not None and cache.offline
+    statuses: Counter = Counter()
+
+    batch: List[Tuple[date, Dict[str, Any]]] = []
+    journal: List[Tuple[date, FetchStatus, Optional[str]]] = []
+
+    def flush():
+        for (dt, _), saved in zip(batch, save_results(batch)):
+            if saved:
+                journal.append((dt, FetchStatus.saved, None))
+            else:
+                journal.append((dt, FetchStatus.failed, "The result was not saved on the database."))
+
+        record_fetches(journal)
+        statuses.update(status for _, status, _ in journal)
+        batch.clear()
+        journal.clear()
+
+    for idx, dt in enumerate(dates):
+        typer.echo(f"Processing day {idx+1}")
+        # Results are parsed when consumed, so messages come after the day being processed
+        _, result, error = next(results)
+        if error is not None and offline:
+            statuses[FetchStatus.failed] += 1
+        elif error is not None:
+            journal.append((dt, FetchStatus.failed, error))
+        elif result:
+            batch.append((dt, result))
+        else:
+            journal.append((dt, FetchStatus.empty, None))
+
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+
+    return statuses
+
+
+def select_backfill_dates(
+    dates: List[date],
+    stored: Set[date],
+    journal: Dict[date, Any],
+    backoff: float,
+    max_attempts: int,
+    now: datetime
+) -> Tuple[List[date], List[date], List[date]]:
+    """Select the draw dates to read again, from the results stored and the fetch journal.
+
+    A date is read again if its result is not stored and it was never read, it failed and its backoff passed,
+    or its page had no result before the result was final (see `scrapper.FINAL_AFTER`).
+
+    Parameters
+    ----------
+    dates : List[date]
+        Draw dates of the range.
+    stored : Set[date]
+        Dates with a result stored.
+    journal : Dict[date, Any]
+        Entry of the fetch journal of each date read before.
+    backoff : float
+        Seconds to wait after the first failure of a date, doubling on each attempt.
+    max_attempts : int
+        Failures in a row after which a date is not read again, 0 means no limit.
+    now : datetime
+        Current time.
+
+    Returns
+    -------
+    Tuple[List[date], List[date], List[date]]
+        The dates to read, the failed dates still waiting for their backoff and the failed dates given up.
+    """
+    to_fetch, waiting, given_up = [], [], []
+    for dt in dates:
+        if dt in stored:
+            continue
+
+        entry = journal.get(dt)
+        if entry is None or entry['status'] == FetchStatus.saved:
+            # Never read, or saved and deleted since
+            to_fetch.append(dt)
+        elif entry['status'] == FetchStatus.empty:
+            # The page had no result: known empty only if it was read when the result was already final
+            if entry['last_attempt'].date() < dt + FINAL_AFTER:
+                to_fetch.append(dt)
+        elif max_attempts and entry['attempts'] >= max_attempts:
+            given_up.append(dt)
+        elif now < entry['last_attempt'] + timedelta(seconds=backoff * 2 ** (entry['attempts'] - 1)):
+            waiting.append(dt)
+        else:
+            to_fetch.append(dt)
+
+    return to_fetch, waiting, given_up
+
+
+def open_cache(cache: bool, offline: bool) -> Optional[PageCache]:
+    """Get the cache of web pages for the command line options.
+
+    Parameters
+    ----------
+    cache : bool
+        Store the web pages read on disk and reuse them.
+    offline : bool
+        Only use the web pages stored on disk.
+
+    Returns
+    -------
+    Optional[PageCache]
+        The cache, None if it is not used.
+    """
+    if not cache and not offline:
+        return None
+
+    return PageCache(offline=offline)
+
+
 @app.command(name='update')
 def update_result(
     draw_date: datetime = typer.Option(
@@ -87,6 +348,21 @@ def update_result(
         formats=["%Y-%m-%d"],
         help="Date to get Euromillions draw numbers.",
         show_default=True
+    ),
+    force: bool = typer.Option(
+        False,
+        help="Get the results even if the date is not on the draws calendar.",
+        show_default=True
+    ),
+    cache: bool = typer.Option(
+        True,
+        help="Store the web pages read on disk and reuse them.",
+        show_default=True
+    ),
+    offline: bool = typer.Option(
+        False,
+        help="Only use the web pages stored on disk.",
+        show_default=True
     )
 ):
     """
@@ -94,51 +370,203 @@ def update_result(
 
     If --draw_date is not passed, it will update with the date of the first Euromillions result.
     """
+    require_database(migrate=True)
+
+    if not force and not is_draw_date(draw_date.date()):
+        typer.echo(
+            typer.style("WARNING: ", fg=typer.colors.YELLOW, bold=True) +
+            f"There is no draw on {draw_date:%Y-%m-%d} (use --force to get it anyway)."
+        )
+        return
+
     typer.echo(
         "Getting results for: " +
         typer.style(f"{draw_date:%Y-%m-%d}", fg=typer.colors.GREEN, bold=True)
     )
 
-    result = get_euro_millions_result(draw_date.date())
-
-    if result:
-        if insert_new_result(draw_date.date(), result):
-            typer.echo("Result saved!")
-            print_game(result['draw'])
+    save_result(draw_date.date(), get_euro_millions_result(draw_date.date(), cache=open_cache(cache, offline)))
 
 
 @app.command(name='full-update')
 def full_update(
     max_days: int = typer.Option(
         default=None,
-        help="Runs the update for a maximun number of days"
+        help="Runs the update for a maximun number of draw days"
+    ),
+    workers: int = typer.Option(
+        default=4,
+        min=1,
+        help="Number of web pages read at the same time.",
+        show_default=True
+    ),
+    rate_limit: float = typer.Option(
+        default=5.0,
+        help="Maximum number of requests per second, 0 means no limit.",
+        show_default=True
+    ),
+    retries: int = typer.Option(
+        default=3,
+        help="Number of times to try again a failed request.",
+        show_default=True
+    ),
+    base_url: str = typer.Option(
+        default=EURO_MAIN_URL,
+        help="Main address of the results web pages.",
+        show_default=True
+    ),
+    batch_size: int = typer.Option(
+        default=50,
+        help="Number of results saved on the database at once.",
+        show_default=True
+    ),
+    cache: bool = typer.Option(
+        True,
+        help="Store the web pages read on disk and reuse them.",
+        show_default=True
+    ),
+    offline: bool = typer.Option(
+        False,
+        help="Only use the web pages stored on disk.",
+        show_default=True
     )
 ):
     """Update Euromillions results from last date stored until today."""
-    start = datetime(2004, 2, 13)
-    current_date = datetime.today()
+    require_database(migrate=True)
+
+    start = FIRST_DRAW_DATE
+    current_date = date.today()
 
     last_date = get_last_draw_date()
     if last_date:
-        start = datetime(last_date.year, last_date.month, last_date.day) + timedelta(days=1)
+        start = last_date + timedelta(days=1)
 
-    for idx, dt in days_between(start, current_date):
-        typer.echo(f"Processing day {idx+1}")
-        update_result(dt)
-        if max_days and idx + 1 == max_days:
-            break
+    dates = list(islice(draw_dates(start, current_date), max_days))
+    fetch_and_save(dates, workers, rate_limit, retries, base_url, batch_size, open_cache(cache, offline))
 
     typer.echo("Update process finished.")
 
 
+@app.command(name='backfill')
+def backfill(
+    since: datetime = typer.Option(
+        FIRST_DRAW_DATE.isoformat(), formats=["%Y-%m-%d"],
+        help="First date to check for missing results.",
+        show_default=True
+    ),
+    until: Optional[datetime] = typer.Option(
+        None, formats=["%Y-%m-%d"],
+        help="Last date to check for missing results. By default today."
+    ),
+    backoff: float = typer.Option(
+        default=300.0,
+        help="Seconds to wait before reading again a date that failed, it doubles on each attempt.",
+        show_default=True
+    ),
+    max_attempts: int = typer.Option(
+        default=8,
+        help="Attempts after which a date that failed is not read again, 0 means no limit.",
+        show_default=True
+    ),
+    workers: int = typer.Option(
+        default=4,
+        min=1,
+        help="Number of web pages read at the same time.",
+        show_default=True
+    ),
+    rate_limit: float = typer.Option(
+        default=5.0,
+        help="Maximum number of requests per second, 0 means no limit.",
+        show_default=True
+    ),
+    retries: int = typer.Option(
+        default=3,
+        help="Number of times to try again a failed request.",
+        show_default=True
+    ),
+    base_url: str = typer.Option(
+        default=EURO_MAIN_URL,
+        help="Main address of the results web pages.",
+        show_default=True
+    ),
+    batch_size: int = typer.Option(
+        default=50,
+        help="Number of results saved on the database at once.",
+        show_default=True
+    ),
+    cache: bool = typer.Option(
+        True,
+        help="Store the web pages read on disk and reuse them.",
+        show_default=True
+    ),
+    offline: bool = typer.Option(
+        False,
+        help="Only use the web pages stored on disk.",
+        show_default=True
+    )
+):
+    """
+    Read again only the draw dates without a result stored.
+
+    The fetch journal keeps the outcome of each date read. Dates whose page had no result
+    once it was final are skipped, and dates that failed are retried with a backoff.
+    """
+    require_database(migrate=True)
+
+    end = min(until.date(), date.today()) if until else date.today()
+    dates = list(draw_dates(since.date(), end + timedelta(days=1)))
+
+    to_fetch, waiting, given_up = select_backfill_dates(
+        dates, get_result_dates(), get_fetch_journal(), backoff, max_attempts, datetime.now()
+    )
+
+    typer.echo(
+        "Dates to read: " +
+        typer.style(str(len(to_fetch)), fg=typer.colors.GREEN, bold=True) +
+        f" of {len(dates)} draw dates."
+    )
+    if waiting:
+        typer.echo(f"Dates waiting to be read again after failing: {len(waiting)}.")
+    if given_up:
+        typer.echo(
+            typer.style("WARNING: ", fg=typer.colors.YELLOW, bold=True) +
+            f"Dates not read again after {max_attempts} attempts: {len(given_up)} "
+            f"(first {given_up[0]:%Y-%m-%d}, use --max-attempts 0 to read them)."
+        )
+
+    statuses = fetch_and_save(to_fetch, workers, rate_limit, retries, base_url, batch_size, open_cache(cache, offline))
+
+    typer.echo(
+        "Backfill finished: " +
+        ", ".join(f"{statuses[status]} {status.value}" for status in FetchStatus) + "."
+    )
+
+
+@app.command(name='rebuild-stats')
+def rebuild_stats():
+    """Count again the frequency of each number and star from all results stored."""
+    require_database(migrate=True)
+
+    rebuild_frequency_tables()
+    typer.echo("Frequency tables rebuilt.")
+
+
 @app.command(name='export')
-def export_database_to_csv(filename: str = typer.Option(
-    default="euromillions.csv",
-    help="CSV filename, it can be an absolute path."
-)):
-    """Export all results on the database to a CSV file."""
-    export_database(filename)
-    typer.echo("Database exported.")
+def export_database_to_csv(
+    filename: str = typer.Option(
+        default="euromillions.csv",
+        help="Export filename, it can be an absolute path."
+    ),
+    file_format: ExportFormat = typer.Option(
+        ExportFormat.csv, "--format",
+        help="File format: CSV, gzip compressed CSV, NDJSON, NumPy npz or Parquet (needs pyarrow).",
+        show_default=True
+    )
+):
+    """Export all results on the database to a file (CSV by default)."""
+    require_database()
+
+    if export_database(filename, file_format):
+        typer.echo("Database exported.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+"""Module with the calendar of Euromillions draws."""
+from datetime import (
+    date,
+    timedelta
+)
+from typing import (
+    Container,
+    Iterable,
+    Iterator,
+    Set
+)
+
+# Draws happen on Fridays since the first draw and also on Tuesdays since May 2011
+FIRST_DRAW_DATE = date(2004, 2, 13)
+TUESDAY_DRAWS_START = date(2011, 5, 10)
+
+TUESDAY = 1
+FRIDAY = 4
+
+# Special dates out of the regular calendar
+EXTRA_DRAW_DATES: Set[date] = set()
+SKIPPED_DRAW_DATES: Set[date] = set()
+
+
+def _is_regular_draw_date(dt: date) -> bool:
+    """Check if a date is on the regular calendar of draws."""
+    weekday = dt.weekday()
+    return dt >= FIRST_DRAW_DATE and (weekday == FRIDAY or (weekday == TUESDAY and dt >= TUESDAY_DRAWS_START))
+
+
+def is_draw_date(
+    dt: date,
+    extra: Container[date] = EXTRA_DRAW_DATES,
+    skipped: Container[date] = SKIPPED_DRAW_DATES
+) -> bool:
+    """Check if there is a draw on a given date.
+
+    Parameters
+    ----------
+    dt : date
+        Date to be checked.
+    extra : Container[date], optional
+        Dates with a draw out of the regular calendar, by default EXTRA_DRAW_DATES.
+    skipped : Container[date], optional
+        Dates of the regular calendar without a draw, by default SKIPPED_DRAW_DATES.
+
+    Returns
+    -------
+    bool
+        True if there is a draw on the date, otherwise False.
+    """
+    if dt in extra:
+        return True
+
+    return dt not in skipped and _is_regular_draw_date(dt)
+
+
+def draw_dates(
+    start: date,
+    end: date,
+    extra: Iterable[date] = EXTRA_DRAW_DATES,
+    skipped: Container[date] = SKIPPED_DRAW_DATES
+) -> Iterator[date]:
+    """Yield all draw dates between two dates, including the start and excluding the end date.
+
+    Parameters
+    ----------
+    start : date
+        Initial date.
+    end : date
+        Final date, not included.
+    extra : Iterable[date], optional
+        Dates with a draw out of the regular calendar, by default EXTRA_DRAW_DATES.
+    skipped : Container[date], optional
+        Dates of the regular calendar without a draw, by default SKIPPED_DRAW_DATES.
+
+    Yields
+    ------
+    Iterator[date]
+        The draw dates in order.
+    """
+    extra_dates = sorted(dt for dt in extra if start <= dt < end)
+
+    dt = max(start, FIRST_DRAW_DATE)
+    while dt < end:
+        if dt not in skipped and _is_regular_draw_date(dt):
+            while extra_dates and extra_dates[0] <= dt:
+                extra_dt = extra_dates.pop(0)
+                if extra_dt < dt:
+                    yield extra_dt
+            yield dt
+
+        # Jump to the next Tuesday or Friday
+        weekday = dt.weekday()
+        dt += timedelta(days=min((day - weekday - 1) % 7 + 1 for day in (TUESDAY, FRIDAY)))
+
+    yield from extra_dates
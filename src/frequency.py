@@ -0,0 +1,139 @@
+"""Module with the frequency of numbers and stars on windows of draws and with time decay.
+
+The cumulative counts of each value over the draws (prefix sums) give the counts on any window
+of draws with a single subtraction, and the time decayed counts are recomputed from them on each call.
+"""
+from datetime import (
+    date,
+    timedelta
+)
+from typing import (
+    Optional,
+    Tuple
+)
+
+import numpy as np
+
+from constants import (
+    K_NUMBERS,
+    K_STARS,
+    MAX_NUMBER,
+    MAX_STAR
+)
+from snapshot import load_snapshot
+
+
+def value_counts(values: np.ndarray, max_value: int) -> np.ndarray:
+    """Count each value on each draw (one-hot encoding of the draws).
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Values of each draw with shape (N, k), from 1 to max_value.
+    max_value : int
+        Highest possible value.
+
+    Returns
+    -------
+    np.ndarray
+        Array with shape (N, max_value), the column j is the count of the value j + 1.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    rows = np.arange(len(values))[:, None] * max_value
+
+    return np.bincount((rows + values - 1).ravel(), minlength=len(values) * max_value).reshape(-1, max_value)
+
+
+class FrequencyTable:
+    """Cumulative counts of each number and star over the draws.
+
+    The row i has the counts of the first i draws, so the counts of the draws i to j - 1 are the row j minus the row i.
+
+    Parameters
+    ----------
+    draws : np.ndarray
+        Draws with shape (N, 7), the last two values are stars, sorted by date.
+    dates : np.ndarray
+        Date of each draw.
+    """
+
+    def __init__(self, draws: np.ndarray, dates: np.ndarray):
+        """Build the cumulative counts of the draws."""
+        draws = np.asarray(draws).reshape(-1, K_NUMBERS + K_STARS)
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+
+        self.numbers = np.zeros((len(draws) + 1, MAX_NUMBER), dtype=np.int32)
+        self.stars = np.zeros((len(draws) + 1, MAX_STAR), dtype=np.int32)
+        np.cumsum(value_counts(draws[:, :K_NUMBERS], MAX_NUMBER), axis=0, out=self.numbers[1:])
+        np.cumsum(value_counts(draws[:, K_NUMBERS:], MAX_STAR), axis=0, out=self.stars[1:])
+
+    @classmethod
+    def from_snapshot(cls) -> 'FrequencyTable':
+        """Build the table with the draws of the snapshot of the database."""
+        return cls(*load_snapshot())
+
+    def __len__(self) -> int:
+        """Return the number of draws."""
+        return len(self.dates)
+
+    def counts(self, start: Optional[date] = None, end: Optional[date] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Count each number and star on the draws between two dates.
+
+        Parameters
+        ----------
+        start : Optional[date], optional
+            First date, by default None (since the first draw).
+        end : Optional[date], optional
+            Last date, included, by default None (up to the last draw).
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The counts of the numbers 1 to 50 and the counts of the stars 1 to 12.
+        """
+        first = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, "D"), side='left'))
+        last = len(self) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, "D"), side='right'))
+        last = max(first, last)
+
+        return self.numbers[last] - self.numbers[first], self.stars[last] - self.stars[first]
+
+    def last_days(self, days: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Count each number and star on the draws of the last days, up to the last draw.
+
+        Parameters
+        ----------
+        days : int
+            Number of days of the window, the last draw date included.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The counts of the numbers 1 to 50 and the counts of the stars 1 to 12.
+        """
+        if len(self) == 0:
+            return self.counts()
+
+        last_date = self.dates[-1].astype(date)
+        return self.counts(last_date - timedelta(days=days - 1), last_date)
+
+    def decayed(self, half_life: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Count each number and star with a weight that halves every half life, up to the last draw.
+
+        Parameters
+        ----------
+        half_life : float
+            Number of days for the weight of a draw to halve.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The decayed counts of the numbers 1 to 50 and of the stars 1 to 12.
+        """
+        if half_life <= 0:
+            raise ValueError("The half life must be greater than zero.")
+        if len(self) == 0:
+            return np.zeros(MAX_NUMBER), np.zeros(MAX_STAR)
+
+        weights = 0.5 ** ((self.dates[-1] - self.dates).astype(np.float64) / half_life)
+        # Counts of each draw are the differences of the cumulative counts
+        return weights @ np.diff(self.numbers, axis=0), weights @ np.diff(self.stars, axis=0)
@@ -1,18 +1,23 @@
 """Module with client commands to generate new games."""
+import pathlib
 from typing import (
-    List
+    List,
+    Optional
 )
 
 import typer
 
-from game_generator import (
+import profiling
+from constants import (
+    HALF_LIFE_DAYS,
+    WINDOW_DAYS,
     GameType,
-    generate_multiple_games
+    OutputFormat
 )
-from utils import print_game
 
 
 def generate_games(
+    ctx: typer.Context,
     game_types: List[GameType] = typer.Option(
         None, "--type", "-t", show_choices=True,
         help="Game type. It can be multiple types at once."
@@ -20,18 +25,98 @@ def generate_games(
     number_of_games: int = typer.Option(
         1, "--num-of-games", "-n", show_default=True,
         help="Number of games generate for each type."
+    ),
+    rules: List[str] = typer.Option(
+        None, "--rule", "-r",
+        help=(
+            "Extra rule for the games, e.g. sum=75-180, max-run=2, decades=3 or low-high=1. "
+            "It can be multiple rules at once."
+        )
+    ),
+    workers: int = typer.Option(
+        1, "--workers", "-w", min=1, show_default=True,
+        help="Number of processes generating games at the same time."
+    ),
+    seed: Optional[int] = typer.Option(
+        None, "--seed", "-s",
+        help="Seed to repeat the games. The same seed and workers always give the same games for the same database."
+    ),
+    window: int = typer.Option(
+        WINDOW_DAYS, "--window", min=1, show_default=True,
+        help="Days before the last draw used by the recent-high-frequency and recent-low-frequency types."
+    ),
+    half_life: float = typer.Option(
+        HALF_LIFE_DAYS, "--half-life", min=0.001, show_default=True,
+        help="Days for the weight of a draw to halve on the decayed-high-frequency and decayed-low-frequency types."
+    ),
+    output_format: OutputFormat = typer.Option(
+        OutputFormat.text, "--format", "-f", show_default=True,
+        help="Format of the games. CSV and NDJSON are written in bulk, without colors, and the messages go to stderr."
+    ),
+    output: Optional[pathlib.Path] = typer.Option(
+        None, "--output", "-o", dir_okay=False, writable=True,
+        help="File to write the games. By default the games are written to stdout."
+    ),
+    batch_size: int = typer.Option(
+        100000, "--batch-size", show_default=True,
+        help="Number of games generated and written at once. Larger batches are faster but use more memory."
+    ),
+    profile: Optional[pathlib.Path] = typer.Option(
+        None, "--profile", dir_okay=False, writable=True,
+        help="File to write a JSON report with the time of each stage and the counters of the run."
     )
 ):
     """Generate multiple games for each game type passed."""
+    if profile is not None:
+        profiling.enable()
+        ctx.call_on_close(lambda: profiling.write_report(profile, "game"))
+
     if not game_types:
         game_types = [GameType.random, GameType.high_frequency, GameType.low_frequency]
 
-    games = generate_multiple_games(game_types, number_of_games)
+    # Imported here, so the help and the option parsing don't load numpy
+    from game_generator import (
+        NotEnoughGamesError,
+        iter_multiple_games
+    )
+    from game_output import write_games
+    from game_rules import RuleSet
+    from sqlite import DatabaseNotInitializedError
+
+    if batch_size < 1:
+        raise typer.BadParameter("The batch size must be at least 1.", param_hint="'--batch-size'")
+
+    try:
+        rule_set = RuleSet.from_specs(rules or [])
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="'--rule'")
+
+    # Keep stdout only with the games, so it can be piped to other programs
+    to_stderr = output_format != OutputFormat.text
+
+    batches = iter_multiple_games(game_types, number_of_games, rule_set, seed, workers, batch_size, window, half_life)
+    try:
+        with typer.open_file(str(output) if output else '-', mode='w') as stream:
+            write_games(batches, output_format, stream)
+    except (DatabaseNotInitializedError, NotEnoughGamesError) as e:
+        typer.echo(typer.style("ERROR: ", fg=typer.colors.RED, bold=True) + str(e), err=to_stderr)
+        raise typer.Exit(code=1)
+
+    if rules:
+        # The games are sampled only from the combinations of numbers that pass the rules
+        if rule_set.exclusions:
+            typer.echo("Combinations of numbers excluded by rule:", err=to_stderr)
+            counts = rule_set.exclusions
+        else:
+            typer.echo("Games rejected by rule:", err=to_stderr)
+            counts = rule_set.rejections
+
+        for name, count in counts.items():
+            typer.echo(f"\t{name}: " + typer.style(str(count), fg=typer.colors.GREEN, bold=True), err=to_stderr)
 
-    for gt, lst in games:
-        typer.echo("Games of type " + typer.style(gt.value, fg=typer.colors.GREEN, bold=True))
-        for g in lst:
-            print_game(g)
+    # The same counts as above, also when no extra rule was given
+    for name, count in (rule_set.exclusions or rule_set.rejections).items():
+        profiling.count(f"{'excluded' if rule_set.exclusions else 'rejected'}_by_rule.{name}", count)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,345 @@
+"""Module with a compact representation of games as bit masks.
+
+Each game is a uint64 where the bits 0 to 49 are the numbers and the bits 50 to 61 are the stars,
+so the order of the values does not matter, equal games have equal masks and the values
+matched by two games are the bits set on both masks.
+"""
+from typing import (
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union
+)
+
+import numpy as np
+
+from constants import (
+    K_NUMBERS,
+    K_STARS,
+    MAX_NUMBER,
+    MAX_STAR
+)
+
+# Bits 0 to 49 of a game key are the numbers, the stars start after them
+STARS_SHIFT = MAX_NUMBER
+
+NUMBERS_MASK = (1 << MAX_NUMBER) - 1
+STARS_MASK = ((1 << MAX_STAR) - 1) << STARS_SHIFT
+
+HAS_BITWISE_COUNT = hasattr(np, "bitwise_count")
+
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    """Count the bits set on each value.
+
+    It uses `np.bitwise_count` if available (NumPy 2), otherwise it counts
+    the bits in parallel inside the 64 bits word (SWAR).
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Array of uint64 values.
+
+    Returns
+    -------
+    np.ndarray
+        Array of uint8 with the number of bits set on each value.
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    if HAS_BITWISE_COUNT:
+        return np.bitwise_count(values)
+
+    values = values - ((values >> np.uint64(1)) & _M1)
+    values = (values & _M2) + ((values >> np.uint64(2)) & _M2)
+    values = (values + (values >> np.uint64(4))) & _M4
+    return ((values * _H01) >> np.uint64(56)).astype(np.uint8)
+
+
+def _bit_count(value: int) -> int:
+    """Count the bits set on an integer."""
+    return bin(value).count('1')
+
+
+class Game:
+    """A game stored as a bit mask.
+
+    It behaves as the tuple of its values, the five numbers and the two stars sorted,
+    so it can be used where a game tuple is expected (e.g. `utils.print_game`).
+
+    Parameters
+    ----------
+    key : int
+        Bit mask of the game (see `game_keys`).
+    """
+
+    __slots__ = ('key',)
+
+    def __init__(self, key: int):
+        """Initialize the game with its bit mask."""
+        self.key = int(key)
+
+    @classmethod
+    def from_tuple(cls, values: Sequence[int]) -> 'Game':
+        """Create a game from its values.
+
+        Parameters
+        ----------
+        values : Sequence[int]
+            The five numbers followed by the two stars, in any order.
+
+        Returns
+        -------
+        Game
+            The game with the given values.
+
+        Raises
+        ------
+        ValueError
+            If the values are not a valid game.
+        """
+        if len(values) != K_NUMBERS + K_STARS:
+            raise ValueError(f"A game has {K_NUMBERS} numbers and {K_STARS} stars, got {len(values)} values.")
+
+        key = 0
+        parts = ((values[:K_NUMBERS], MAX_NUMBER, 0), (values[K_NUMBERS:], MAX_STAR, STARS_SHIFT))
+        for part, max_value, shift in parts:
+            for value in part:
+                if not 1 <= value <= max_value:
+                    raise ValueError(f"Invalid game {tuple(values)}, the value {value} is out of range.")
+                key |= 1 << (int(value) - 1 + shift)
+
+        if _bit_count(key) != K_NUMBERS + K_STARS:
+            raise ValueError(f"Invalid game {tuple(values)}, the numbers and stars must be different.")
+
+        return cls(key)
+
+    @property
+    def numbers(self) -> Tuple[int, ...]:
+        """Return the numbers sorted."""
+        return tuple(i + 1 for i in range(MAX_NUMBER) if self.key >> i & 1)
+
+    @property
+    def stars(self) -> Tuple[int, ...]:
+        """Return the stars sorted."""
+        return tuple(i + 1 for i in range(MAX_STAR) if self.key >> (i + STARS_SHIFT) & 1)
+
+    def to_tuple(self) -> Tuple[int, ...]:
+        """Return the values of the game, the numbers followed by the stars, sorted."""
+        return self.numbers + self.stars
+
+    def matches(self, other: 'Game') -> Tuple[int, int]:
+        """Count the numbers and the stars of a game matched by another game.
+
+        Parameters
+        ----------
+        other : Game
+            The other game, e.g. a draw.
+
+        Returns
+        -------
+        Tuple[int, int]
+            The numbers matched and the stars matched.
+        """
+        matched = self.key & other.key
+        return _bit_count(matched & NUMBERS_MASK), _bit_count(matched & STARS_MASK)
+
+    def __eq__(self, other: object) -> bool:
+        """Check if two games have the same values."""
+        if isinstance(other, Game):
+            return self.key == other.key
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        """Return the hash of the bit mask."""
+        return hash(self.key)
+
+    def __len__(self) -> int:
+        """Return the number of values of the game."""
+        return K_NUMBERS + K_STARS
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate over the values of the game."""
+        return iter(self.to_tuple())
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[int, Tuple[int, ...]]:
+        """Return a value, or a tuple of values, of the game."""
+        return self.to_tuple()[index]
+
+    def __repr__(self) -> str:
+        """Return the representation of the game with its values."""
+        return f"Game.from_tuple({self.to_tuple()})"
+
+
+def game_keys(games: Union[np.ndarray, 'GameArray', Game]) -> np.ndarray:
+    """Encode games as integer keys.
+
+    Each key is a bit mask where the bits 0 to 49 are the numbers and
+    the bits 50 to 61 are the stars, so the order of the values does not matter.
+
+    Parameters
+    ----------
+    games : Union[np.ndarray, GameArray, Game]
+        Game to be encoded, or a block of games with one game per row.
+
+    Returns
+    -------
+    np.ndarray
+        The key of the game, or an array with one key per row.
+    """
+    if isinstance(games, GameArray):
+        return games.keys
+    if isinstance(games, Game):
+        return np.uint64(games.key)
+
+    games = np.asarray(games, dtype=np.uint64)
+    shifts = games - np.uint64(1)
+    shifts[..., K_NUMBERS:] += np.uint64(STARS_SHIFT)
+
+    return np.bitwise_or.reduce(np.left_shift(np.uint64(1), shifts), axis=-1)
+
+
+class GameArray:
+    """Block of games stored as one uint64 bit mask for each game.
+
+    Parameters
+    ----------
+    keys : Optional[np.ndarray], optional
+        Bit masks of the games (see `game_keys`), by default None (no games).
+    """
+
+    __slots__ = ('keys',)
+
+    def __init__(self, keys: Optional[np.ndarray] = None):
+        """Initialize the block with the bit masks of the games."""
+        self.keys = np.asarray(keys if keys is not None else [], dtype=np.uint64).reshape(-1)
+
+    @classmethod
+    def from_games(cls, games: np.ndarray) -> 'GameArray':
+        """Create a block from an array of games.
+
+        Parameters
+        ----------
+        games : np.ndarray
+            Block of games with shape (N, 7), the last two values of each game are stars.
+
+        Returns
+        -------
+        GameArray
+            The block with the given games.
+        """
+        return cls(game_keys(np.asarray(games).reshape(-1, K_NUMBERS + K_STARS)))
+
+    @classmethod
+    def from_tuples(cls, games: Iterable[Sequence[int]]) -> 'GameArray':
+        """Create a block from game tuples, checking each game.
+
+        Parameters
+        ----------
+        games : Iterable[Sequence[int]]
+            Games as the five numbers followed by the two stars, e.g. the results on the database.
+
+        Returns
+        -------
+        GameArray
+            The block with the given games.
+
+        Raises
+        ------
+        ValueError
+            If a game is not valid.
+        """
+        return cls(np.fromiter((Game.from_tuple(game).key for game in games), dtype=np.uint64))
+
+    def to_games(self) -> np.ndarray:
+        """Decode the games as an array.
+
+        Returns
+        -------
+        np.ndarray
+            Array of uint8 with shape (N, 7), numbers and stars sorted on each game.
+        """
+        bits = np.unpackbits(self.keys.astype('<u8').view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+        positions = np.nonzero(bits)[1].reshape(-1, K_NUMBERS + K_STARS).astype(np.uint8)
+        positions[:, K_NUMBERS:] -= STARS_SHIFT
+
+        return positions + 1
+
+    def to_tuples(self) -> List[Tuple[int, ...]]:
+        """Decode the games as tuples, the numbers followed by the stars, sorted."""
+        return [tuple(game) for game in self.to_games().tolist()]
+
+    def matches(self, other: 'GameArray') -> Tuple[np.ndarray, np.ndarray]:
+        """Count the numbers and stars of each game matched by each game of another block.
+
+        Parameters
+        ----------
+        other : GameArray
+            The other block of games, e.g. the draws.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            The numbers matched and the stars matched, both with shape (len(self), len(other)).
+        """
+        matched = self.keys[:, None] & other.keys[None, :]
+        stars = popcount(matched >> np.uint64(STARS_SHIFT))
+
+        return popcount(matched) - stars, stars
+
+    def unique(self) -> 'GameArray':
+        """Return the block without repeated games, sorted by bit mask."""
+        keys = np.sort(self.keys)
+        return GameArray(keys[np.r_[True, keys[1:] != keys[:-1]]])
+
+    def isin(self, other: 'GameArray') -> np.ndarray:
+        """Check which games are on another block.
+
+        Parameters
+        ----------
+        other : GameArray
+            Block of games to look up.
+
+        Returns
+        -------
+        np.ndarray
+            Boolean mask, True for each game that is on the other block.
+        """
+        keys = np.sort(other.keys)
+        if len(keys) == 0:
+            return np.zeros(len(self), dtype=bool)
+
+        idx = np.searchsorted(keys, self.keys)
+        idx[idx == len(keys)] = 0
+        return keys[idx] == self.keys
+
+    def __len__(self) -> int:
+        """Return the number of games."""
+        return len(self.keys)
+
+    def __iter__(self) -> Iterator[Game]:
+        """Iterate over the games."""
+        return (Game(key) for key in self.keys.tolist())
+
+    def __getitem__(self, index: Union[int, slice, np.ndarray]) -> Union[Game, 'GameArray']:
+        """Return a game, or a block of games for a slice or a mask."""
+        if isinstance(index, (int, np.integer)):
+            return Game(self.keys[index])
+        return GameArray(self.keys[index])
+
+    def __contains__(self, game: Union[Game, Sequence[int]]) -> bool:
+        """Check if a game, or a game tuple, is on the block."""
+        if not isinstance(game, Game):
+            game = Game.from_tuple(game)
+        return bool((self.keys == np.uint64(game.key)).any())
+
+    def __repr__(self) -> str:
+        """Return the representation of the block with the number of games."""
+        return f"GameArray(<{len(self)} games>)"
@@ -0,0 +1,329 @@
+"""Module to backtest games against the draws already stored.
+
+A game plays on every draw, each (game, draw) pair is a play that wins a prize tier
+based on the numbers and stars matched. The plays are not counted one by one:
+the games are grouped by stars and, for each draw, the number of games containing
+each subset of the draw numbers gives the exact number of games matching each count of numbers.
+"""
+from datetime import date
+from itertools import combinations
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union
+)
+
+import numpy as np
+
+from codec import (
+    BINOMIAL,
+    STAR_COMBINATIONS,
+    rank_combinations,
+    unrank_combinations
+)
+from constants import (
+    K_NUMBERS,
+    K_STARS,
+    MAX_NUMBER,
+    BacktestPeriod
+)
+from draw_schedule import TUESDAY_DRAWS_START
+from game_array import (
+    GameArray,
+    popcount
+)
+from snapshot import load_snapshot
+
+# Numbers and stars matched of each prize tier, from the first tier (jackpot) to the last one
+PRIZE_TIERS: Tuple[Tuple[int, int], ...] = (
+    (5, 2), (5, 1), (5, 0), (4, 2), (4, 1), (3, 2), (4, 0), (2, 2), (3, 1), (3, 0), (1, 2), (2, 1), (2, 0)
+)
+TIER_NAMES = tuple(f"{numbers}+{stars}" for numbers, stars in PRIZE_TIERS)
+
+# The last tier (2 numbers and no stars) started with the Tuesday draws
+LAST_TIER_START = TUESDAY_DRAWS_START
+
+# Subsets of numbers with more combinations than this are counted sorting the keys, instead of a dense table
+DENSE_COUNT_LIMIT = 1 << 22
+
+
+def match_counts(
+    games: Union[np.ndarray, GameArray],
+    draws: Union[np.ndarray, GameArray]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Count the numbers and stars matched by each game on each draw.
+
+    Parameters
+    ----------
+    games : Union[np.ndarray, GameArray]
+        Block of games with shape (M, 7), the last two values of each game are stars.
+    draws : Union[np.ndarray, GameArray]
+        Block of draws with shape (D, 7).
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The numbers matched and the stars matched, both with shape (M, D).
+    """
+    if not isinstance(games, GameArray):
+        games = GameArray.from_games(games)
+    if not isinstance(draws, GameArray):
+        draws = GameArray.from_games(draws)
+
+    return games.matches(draws)
+
+
+def prize_tiers(numbers: np.ndarray, stars: np.ndarray, draw_dates: np.ndarray) -> np.ndarray:
+    """Get the prize tier of each play.
+
+    Parameters
+    ----------
+    numbers : np.ndarray
+        Numbers matched, with shape (M, D).
+    stars : np.ndarray
+        Stars matched, with shape (M, D).
+    draw_dates : np.ndarray
+        Date of each draw, with shape (D,).
+
+    Returns
+    -------
+    np.ndarray
+        The prize tier, from 1 to 13, or 0 if the play didn't win a prize.
+    """
+    tiers = np.zeros((K_NUMBERS + 1, K_STARS + 1), dtype=np.uint8)
+    for tier, (n, s) in enumerate(PRIZE_TIERS, 1):
+        tiers[n, s] = tier
+
+    result = tiers[numbers, stars]
+    before = np.asarray(draw_dates, dtype="datetime64[D]") < np.datetime64(LAST_TIER_START)
+    result[:, before] = np.where(result[:, before] == len(PRIZE_TIERS), 0, result[:, before])
+
+    return result
+
+
+def _rank_terms(numbers: np.ndarray) -> np.ndarray:
+    """Get the terms of the ranks of the subsets of numbers.
+
+    The numbers must be sorted on each row, so all subsets are sorted and the rank of a subset
+    is the sum of C(value - 1, position) of its values (see `rank_combinations`).
+
+    Parameters
+    ----------
+    numbers : np.ndarray
+        Numbers with shape (N, 5), sorted on each row.
+
+    Returns
+    -------
+    np.ndarray
+        Array with shape (5, 6, N), the value on [c, i, :] is the term of the column c at the position i.
+    """
+    positions = np.arange(K_NUMBERS + 1)[None, :, None]
+    return BINOMIAL[np.asarray(numbers, dtype=np.int64).T[:, None, :] - 1, positions]
+
+
+def _subset_ranks(terms: np.ndarray, size: int) -> np.ndarray:
+    """Rank all subsets of a given size of the numbers of each row, with shape (C(5, size), N)."""
+    return np.stack([
+        sum(terms[column, i] for i, column in enumerate(columns, 1))
+        for columns in combinations(range(K_NUMBERS), size)
+    ])
+
+
+def _count_keys(keys: np.ndarray, queries: np.ndarray, size: int) -> np.ndarray:
+    """Count how many times each query is on the keys, the keys and queries are between 0 and size."""
+    if size <= DENSE_COUNT_LIMIT:
+        return np.bincount(keys, minlength=size)[queries]
+
+    keys = np.sort(keys)
+    order = np.argsort(queries, axis=None)
+    sorted_queries = queries.ravel()[order]
+
+    counts = np.empty(queries.size, dtype=np.int64)
+    counts[order] = (
+        np.searchsorted(keys, sorted_queries, side='right') - np.searchsorted(keys, sorted_queries, side='left')
+    )
+    return counts.reshape(queries.shape)
+
+
+def _star_masks(stars: np.ndarray) -> np.ndarray:
+    """Encode combinations of stars as bit masks."""
+    return np.bitwise_or.reduce(np.left_shift(np.uint64(1), np.asarray(stars, dtype=np.uint64) - np.uint64(1)), axis=-1)
+
+
+def tier_counts_by_draw(games: np.ndarray, draws: np.ndarray, draw_dates: np.ndarray) -> np.ndarray:
+    """Count the plays of the games on each prize tier of each draw.
+
+    For a group of games with the same stars, the sum of the number of games containing each subset
+    of j numbers of a draw is the sum of C(matched, j) over the games. These sums, for j = 0 to 5,
+    give the exact number of games matching each count of numbers (binomial moments inversion).
+    The cost grows with the number of games plus the number of draws, not with the plays.
+
+    Parameters
+    ----------
+    games : np.ndarray
+        Block of games with shape (M, 7), the last two values of each game are stars.
+    draws : np.ndarray
+        Block of draws with shape (D, 7).
+    draw_dates : np.ndarray
+        Date of each draw, with shape (D,).
+
+    Returns
+    -------
+    np.ndarray
+        Array with shape (D, 13) with the plays that won each prize tier (see `PRIZE_TIERS`) on each draw.
+    """
+    games = np.asarray(games, dtype=np.int64).reshape(-1, K_NUMBERS + K_STARS)
+    draws = np.asarray(draws, dtype=np.int64).reshape(-1, K_NUMBERS + K_STARS)
+    terms = _rank_terms(np.sort(games[:, :K_NUMBERS], axis=1))
+    draw_terms = _rank_terms(np.sort(draws[:, :K_NUMBERS], axis=1))
+
+    groups = rank_combinations(games[:, K_NUMBERS:])
+    all_groups = np.arange(STAR_COMBINATIONS)
+
+    # Sum over the games of C(numbers matched, j), for each draw, number of values j and group of stars
+    moments = np.empty((len(draws), K_NUMBERS + 1, STAR_COMBINATIONS), dtype=np.int64)
+    moments[:, 0] = np.bincount(groups, minlength=STAR_COMBINATIONS)
+    for j in range(1, K_NUMBERS + 1):
+        size = int(BINOMIAL[MAX_NUMBER, j]) * STAR_COMBINATIONS
+        keys = _subset_ranks(terms, j) * STAR_COMBINATIONS + groups
+        queries = _subset_ranks(draw_terms, j)[:, :, None] * STAR_COMBINATIONS + all_groups
+
+        moments[:, j] = _count_keys(keys.ravel(), queries, size).sum(axis=0)
+
+    # Games matching exactly k numbers: sum of (-1)^(j - k) * C(j, k) * moment j, for j >= k
+    k, j = np.indices((K_NUMBERS + 1, K_NUMBERS + 1))
+    inversion = np.where(j >= k, 1 - 2 * ((j - k) % 2), 0) * BINOMIAL[j, k]
+    numbers_matched = np.einsum('kj,djg->dkg', inversion, moments)
+
+    stars_matched = popcount(
+        _star_masks(draws[:, K_NUMBERS:])[:, None] & _star_masks(unrank_combinations(all_groups, K_STARS))[None, :]
+    )
+
+    counts = np.empty((len(draws), len(PRIZE_TIERS)), dtype=np.int64)
+    for tier, (n, s) in enumerate(PRIZE_TIERS):
+        counts[:, tier] = (numbers_matched[:, n] * (stars_matched == s)).sum(axis=1)
+
+    before = np.asarray(draw_dates, dtype="datetime64[D]") < np.datetime64(LAST_TIER_START)
+    counts[before, len(PRIZE_TIERS) - 1] = 0
+
+    return counts
+
+
+def window_labels(draw_dates: np.ndarray, period: BacktestPeriod) -> np.ndarray:
+    """Get the time window of each draw.
+
+    Parameters
+    ----------
+    draw_dates : np.ndarray
+        Date of each draw.
+    period : BacktestPeriod
+        Length of the time windows.
+
+    Returns
+    -------
+    np.ndarray
+        Array of str with the window of each draw, e.g. 2020 or 2020-05.
+    """
+    draw_dates = np.asarray(draw_dates, dtype="datetime64[D]")
+    if period == BacktestPeriod.all:
+        return np.full(len(draw_dates), "all")
+
+    unit = "Y" if period == BacktestPeriod.year else "M"
+    return np.datetime_as_string(draw_dates.astype(f"datetime64[{unit}]"))
+
+
+class BacktestSummary(NamedTuple):
+    """Results of the games of a strategy on the draws of a time window."""
+
+    strategy: str
+    window: str
+    games: int
+    draws: int
+    tiers: Tuple[int, ...]
+
+    @property
+    def plays(self) -> int:
+        """Return the number of plays, each game plays on all draws."""
+        return self.games * self.draws
+
+    @property
+    def wins(self) -> int:
+        """Return the number of plays that won a prize."""
+        return sum(self.tiers)
+
+
+def backtest(
+    batches: Iterable[Tuple[str, np.ndarray]],
+    draws: np.ndarray,
+    draw_dates: np.ndarray,
+    period: BacktestPeriod = BacktestPeriod.all
+) -> List[BacktestSummary]:
+    """Backtest the games of each strategy on all draws.
+
+    Parameters
+    ----------
+    batches : Iterable[Tuple[str, np.ndarray]]
+        Strategy and a batch of its games, the batches of a strategy are added up.
+    draws : np.ndarray
+        Block of draws with shape (D, 7), sorted by date.
+    draw_dates : np.ndarray
+        Date of each draw.
+    period : BacktestPeriod, optional
+        Length of the time windows, by default BacktestPeriod.all.
+
+    Returns
+    -------
+    List[BacktestSummary]
+        The results of each strategy on each time window, in the order the strategies come.
+    """
+    counts: Dict[str, np.ndarray] = {}
+    games: Dict[str, int] = {}
+    for strategy, batch in batches:
+        if strategy not in counts:
+            counts[strategy] = np.zeros((len(draws), len(PRIZE_TIERS)), dtype=np.int64)
+            games[strategy] = 0
+
+        if len(batch) > 0 and len(draws) > 0:
+            counts[strategy] += tier_counts_by_draw(batch, draws, draw_dates)
+        games[strategy] += len(batch)
+
+    labels = window_labels(draw_dates, period)
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]]) if len(labels) else np.empty(0, dtype=np.int64)
+    sizes = np.diff(np.r_[starts, len(labels)])
+
+    summaries = []
+    for strategy, by_draw in counts.items():
+        by_window = np.add.reduceat(by_draw, starts, axis=0) if len(starts) else by_draw
+        for start, size, tiers in zip(starts, sizes, by_window.tolist()):
+            summaries.append(BacktestSummary(strategy, str(labels[start]), games[strategy], int(size), tuple(tiers)))
+
+    return summaries
+
+
+def draws_between(start: Optional[date] = None, end: Optional[date] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the draws stored between two dates.
+
+    Parameters
+    ----------
+    start : Optional[date], optional
+        First date, by default None (since the first draw).
+    end : Optional[date], optional
+        Last date, included, by default None (up to the last draw).
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The draws, with shape (D, 7), and their dates, sorted by date.
+    """
+    draws, dates = load_snapshot()
+    keep = np.ones(len(dates), dtype=bool)
+    if start is not None:
+        keep &= dates >= np.datetime64(start, "D")
+    if end is not None:
+        keep &= dates <= np.datetime64(end, "D")
+
+    return np.asarray(draws[keep]), np.asarray(dates[keep])
@@ -1,46 +1,93 @@
 """Module to generate a games."""
-from enum import Enum
+import hashlib
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from typing import (
+    Any,
+    Dict,
+    Iterator,
     List,
     Optional,
+    Sequence,
     Tuple
 )
 
 import numpy as np
-import pandas as pd
 
+from codec import (
+    NUMBER_COMBINATIONS,
+    STAR_COMBINATIONS,
+    combinations_table,
+    rank_games,
+    unrank_games
+)
+from constants import (
+    HALF_LIFE_DAYS,
+    K_NUMBERS,
+    K_STARS,
+    MAX_NUMBER,
+    MAX_STAR,
+    WINDOW_DAYS,
+    GameType
+)
+from cooccurrence import CooccurrenceTable
+from frequency import FrequencyTable
+from game_array import game_keys
 from game_rules import (
-    already_happen,
-    has_only_even,
-    has_only_odd
+    DrawnGameIndex,
+    RuleSet
+)
+from profiling import (
+    count,
+    disable,
+    enable,
+    is_enabled,
+    stage
+)
+from snapshot import load_snapshot
+from sqlite import (
+    DBFILE,
+    get_frequencies
 )
-from sqlite import connect
 
 
-NUMBER_COLS = ['n1', 'n2', 'n3', 'n4', 'n5']
-STAR_COLS = ['s1', 's2']
+# Probability of each combination of numbers and stars, stored next to the database
+WEIGHTS_FILE = DBFILE.with_name("weights.npz")
 
-K_NUMBERS = 5
-K_STARS = 2
 
+# Combinations on each block when calculating the probabilities of the affinity types
+AFFINITY_BLOCK_SIZE = 1 << 18
 
-class GameType(str, Enum):
-    """Class of type of games."""
+# Candidates rejected in a row after which the games that pass the rules are taken as exhausted
+MAX_REJECTED_IN_ROW = 100_000
 
-    random = "random"
-    high_frequency = "high-frequency"
-    low_frequency = "low-frequency"
 
+class NotEnoughGamesError(Exception):
+    """Error raised when more games are requested than the games left that pass the rules."""
 
-def get_games_and_stats() -> Tuple[np.ndarray, ...]:
-    """Retrieve all games stored and calculate main statistics.
+
+def get_games() -> np.ndarray:
+    """Retrieve all games stored.
+
+    The games come from the memory mapped snapshot of the database.
+
+    Returns
+    -------
+    np.ndarray
+        An array with all games stored into the database, one game per row, numbers and stars sorted.
+    """
+    games, _ = load_snapshot()
+    return games
+
+
+def get_stats() -> Tuple[np.ndarray, ...]:
+    """Retrieve the frequency of numbers and stars and calculate main statistics.
 
     Returns
     -------
     Tuple[np.ndarray, ...]
         The function returns:
-        - An array with all games stored into the database
-
         - An array with all unique numbers
         - An array with the normal probability of each number (Higher the frequency -> Higher the probability)
         - An array with the inverse probability of each number (Lower the frequency -> Higher the probability)
@@ -50,13 +97,10 @@ def get_games_and_stats() -> Tuple[np.ndarray, ...]:
         - An array with the inverse probability of each star (Lower the frequency -> Higher the probability)
 
     """
-    with connect() as con:
-        data = pd.read_sql('select * from euro_results', con, parse_dates=['dt'])
-
-    games = data.loc[:, NUMBER_COLS + STAR_COLS].values
+    number_frequencies, star_frequencies = get_frequencies()
 
-    numbers, number_counts = np.unique(data.loc[:, NUMBER_COLS], return_counts=True)
-    stars, star_counts = np.unique(data.loc[:, STAR_COLS], return_counts=True)
+    numbers, number_counts = np.array(number_frequencies, dtype=np.int64).reshape(-1, 2).T
+    stars, star_counts = np.array(star_frequencies, dtype=np.int64).reshape(-1, 2).T
 
     # Higher the frequency - Higher the probability
     number_probs = number_counts / number_counts.sum()
@@ -66,10 +110,144 @@ def get_games_and_stats() -> Tuple[np.ndarray, ...]:
     number_inv_probs = (1 / number_counts) / (1 / number_counts).sum()
     star_inv_probs = (1 / star_counts) / (1 / star_counts).sum()
 
-    return games, numbers, number_probs, number_inv_probs, stars, star_probs, star_inv_probs
+    return numbers, number_probs, number_inv_probs, stars, star_probs, star_inv_probs
+
+
+def frequency_probabilities(counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Calculate the normal and the inverse probability of each value from its counts.
+
+    One is added to every count, so a value without counts can still be chosen
+    and doesn't get an infinite inverse probability.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        Counts of each value, they can be decayed (not integer).
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The normal probability (Higher the frequency -> Higher the probability)
+        and the inverse probability (Lower the frequency -> Higher the probability) of each value.
+    """
+    counts = np.asarray(counts, dtype=np.float64) + 1
+
+    return counts / counts.sum(), (1 / counts) / (1 / counts).sum()
+
+
+def get_type_probabilities(
+    game_types: Sequence[GameType],
+    stats: Tuple[np.ndarray, ...],
+    window: int = WINDOW_DAYS,
+    half_life: float = HALF_LIFE_DAYS
+) -> Dict[GameType, Tuple[Optional[np.ndarray], Optional[np.ndarray]]]:
+    """Get the probability of each number and star value for each game type.
+
+    The recent types use the frequencies on the last days and the decayed types the frequencies
+    where the weight of each draw halves every half life, both from the cumulative counts of the draws.
+
+    Parameters
+    ----------
+    game_types : Sequence[GameType]
+        Game types to be generated.
+    stats : Tuple[np.ndarray, ...]
+        Statistics of numbers and stars of all draws (see `get_stats`).
+    window : int, optional
+        Days before the last draw used by the recent types, by default WINDOW_DAYS.
+    half_life : float, optional
+        Days for the weight of a draw to halve on the decayed types, by default HALF_LIFE_DAYS.
+
+    Returns
+    -------
+    Dict[GameType, Tuple[Optional[np.ndarray], Optional[np.ndarray]]]
+        Probabilities of the values of `stats` for each game type, None for the same probability.
+    """
+    nums, p_nums, pinv_nums, stars, p_stars, pinv_stars = stats
+
+    probabilities: Dict[GameType, Tuple[Optional[np.ndarray], Optional[np.ndarray]]] = {
+        GameType.random: (None, None),
+        GameType.high_frequency: (p_nums, p_stars),
+        GameType.low_frequency: (pinv_nums, pinv_stars),
+        # The first value is chosen by its frequency, the next ones by their affinity (see `get_type_affinities`)
+        GameType.co_occurrence: (p_nums, p_stars)
+    }
+
+    recent = (GameType.recent_high_frequency, GameType.recent_low_frequency)
+    decayed = (GameType.decayed_high_frequency, GameType.decayed_low_frequency)
+
+    counts: Dict[Tuple[GameType, GameType], Tuple[np.ndarray, np.ndarray]] = {}
+    if set(recent + decayed).intersection(game_types):
+        table = FrequencyTable.from_snapshot()
+        if set(recent).intersection(game_types):
+            counts[recent] = table.last_days(window)
+        if set(decayed).intersection(game_types):
+            counts[decayed] = table.decayed(half_life)
+
+    for (high, low), (number_counts, star_counts) in counts.items():
+        p_type_nums, pinv_type_nums = frequency_probabilities(number_counts[nums - 1])
+        p_type_stars, pinv_type_stars = frequency_probabilities(star_counts[stars - 1])
+
+        probabilities[high] = (p_type_nums, p_type_stars)
+        probabilities[low] = (pinv_type_nums, pinv_type_stars)
+
+    return {gt: probabilities[gt] for gt in game_types}
 
 
-def choose_numbers(values: np.ndarray, k: int, probability: Optional[np.ndarray] = None) -> np.ndarray:
+def get_type_affinities(
+    game_types: Sequence[GameType],
+    numbers: np.ndarray,
+    stars: np.ndarray
+) -> Dict[GameType, Tuple[np.ndarray, np.ndarray]]:
+    """Get the affinity of each pair of number values and of star values for the game types chosen by affinity.
+
+    The affinity of a pair is how many times both values were drawn together, plus one.
+
+    Parameters
+    ----------
+    game_types : Sequence[GameType]
+        Game types to be generated.
+    numbers : np.ndarray
+        An array of number values to be chosen.
+    stars : np.ndarray
+        An array of star values to be chosen.
+
+    Returns
+    -------
+    Dict[GameType, Tuple[np.ndarray, np.ndarray]]
+        Affinities of the pairs of numbers and of stars, indexed as the values, for each game type chosen by affinity.
+    """
+    if GameType.co_occurrence not in game_types:
+        return {}
+
+    numbers_affinity, stars_affinity = CooccurrenceTable.from_snapshot().affinity()
+    return {
+        GameType.co_occurrence: (
+            numbers_affinity[np.ix_(numbers - 1, numbers - 1)], stars_affinity[np.ix_(stars - 1, stars - 1)]
+        )
+    }
+
+
+def get_games_and_stats() -> Tuple[np.ndarray, ...]:
+    """Retrieve all games stored and calculate main statistics.
+
+    Returns
+    -------
+    Tuple[np.ndarray, ...]
+        The function returns:
+        - An array with all games stored into the database
+
+        - The statistics of numbers and stars (see `get_stats`)
+
+    """
+    return (get_games(), ) + get_stats()
+
+
+def choose_numbers(
+    values: np.ndarray,
+    k: int,
+    probability: Optional[np.ndarray] = None,
+    rng: Optional[np.random.Generator] = None
+) -> np.ndarray:
     """Choose k number from an array considering a given probability.
 
     Parameters
@@ -80,20 +258,24 @@ def choose_numbers(values: np.ndarray, k: int, probability: Optional[np.ndarray]
         Number of values to be chosen.
     probability : Optional[np.ndarray], optional
         The probability to be chosen for each value, by default None (all values have the same probability).
+    rng : Optional[np.random.Generator], optional
+        Random number generator, by default None (a new generator).
 
     Returns
     -------
     np.ndarray
         An array with the chosen values.
     """
-    return np.sort(np.random.choice(values, k, replace=False, p=probability))
+    rng = rng or np.random.default_rng()
+    return np.sort(rng.choice(values, k, replace=False, p=probability))
 
 
 def gen_game_weighted(
     numbers: np.ndarray,
     stars: np.ndarray,
     numbers_prob: Optional[np.ndarray] = None,
-    stars_prob: Optional[np.ndarray] = None
+    stars_prob: Optional[np.ndarray] = None,
+    rng: Optional[np.random.Generator] = None
 ) -> np.ndarray:
     """Generate a game based on probabilities.
 
@@ -107,63 +289,1024 @@ def gen_game_weighted(
         An array of probabilities for each number value, by default None.
     stars_prob : Optional[np.ndarray], optional
         An array of probabilities for each star value, by default None.
+    rng : Optional[np.random.Generator], optional
+        Random number generator, by default None (a new generator).
 
     Returns
     -------
     np.ndarray
         A game where the last two values are stars.
     """
+    rng = rng or np.random.default_rng()
     return np.concatenate((
-        choose_numbers(numbers, K_NUMBERS, numbers_prob),
-        choose_numbers(stars, K_STARS, stars_prob)
+        choose_numbers(numbers, K_NUMBERS, numbers_prob, rng),
+        choose_numbers(stars, K_STARS, stars_prob, rng)
     ))
 
 
-def generate_multiple_games(game_types: List[GameType], number_of_games: int) -> List[Tuple[GameType, np.ndarray]]:
-    """Generate multiple games based on type.
+def _choose_numbers_affinity_batch(
+    values: np.ndarray,
+    k: int,
+    size: int,
+    probability: Optional[np.ndarray],
+    affinity: np.ndarray,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """Choose k values one by one for many games at once, each one with its affinity to the values already chosen."""
+    rows = np.arange(size)[:, None]
+    chosen = np.empty((size, k), dtype=np.int64)
+
+    scores = np.broadcast_to(np.ones(len(values)) if probability is None else probability, (size, len(values)))
+    for i in range(k):
+        cdf = np.cumsum(scores, axis=1)
+        u = rng.random(size) * cdf[:, -1]
+        chosen[:, i] = np.minimum((cdf <= u[:, None]).sum(axis=1), len(values) - 1)
+
+        # The values already chosen can't be chosen again
+        if i == 0:
+            scores = affinity[chosen[:, 0]]
+        else:
+            scores += affinity[chosen[:, i]]
+        scores[rows, chosen[:, :i + 1]] = 0
+
+    return np.sort(values[chosen], axis=1)
+
+
+def choose_numbers_batch(
+    values: np.ndarray,
+    k: int,
+    size: int,
+    probability: Optional[np.ndarray] = None,
+    rng: Optional[np.random.Generator] = None,
+    affinity: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Choose k numbers from an array, for many games at once, considering a given probability.
+
+    Each row is a sample without replacement, with the same distribution as `choose_numbers`.
+    The weighted case uses an exponential race: the k values with the smallest `E / p`,
+    where `E` is exponentially distributed, are the k values drawn one by one without replacement.
+
+    With an affinity, the values are chosen one by one: the first value with the given probability
+    and each next value with the sum of its affinities to the values already chosen.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        List of all possible values to be chosen.
+    k : int
+        Number of values to be chosen for each game.
+    size : int
+        Number of games.
+    probability : Optional[np.ndarray], optional
+        The probability to be chosen for each value, by default None (all values have the same probability).
+    rng : Optional[np.random.Generator], optional
+        Random number generator, by default None (a new generator).
+    affinity : Optional[np.ndarray], optional
+        Affinity of each pair of values with shape (len(values), len(values)) and zero on the diagonal,
+        by default None (the values are chosen only by their probability).
+
+    Returns
+    -------
+    np.ndarray
+        An array with shape (size, k) with the chosen values sorted on each row.
+    """
+    rng = rng or np.random.default_rng()
+    if affinity is not None:
+        return _choose_numbers_affinity_batch(values, k, size, probability, affinity, rng)
+
+    if probability is None:
+        keys = rng.random((size, len(values)))
+    else:
+        keys = rng.standard_exponential((size, len(values))) / probability
+
+    idx = np.argpartition(keys, k - 1, axis=1)[:, :k]
+    return np.sort(values[idx], axis=1)
+
+
+def gen_games_weighted_batch(
+    size: int,
+    numbers: np.ndarray,
+    stars: np.ndarray,
+    numbers_prob: Optional[np.ndarray] = None,
+    stars_prob: Optional[np.ndarray] = None,
+    rng: Optional[np.random.Generator] = None,
+    numbers_affinity: Optional[np.ndarray] = None,
+    stars_affinity: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Generate a block of games based on probabilities.
+
+    Parameters
+    ----------
+    size : int
+        Number of games to generate.
+    numbers : np.ndarray
+        An array of number values to be chosen.
+    stars : np.ndarray
+        An array of star values to be chosen.
+    numbers_prob : Optional[np.ndarray], optional
+        An array of probabilities for each number value, by default None.
+    stars_prob : Optional[np.ndarray], optional
+        An array of probabilities for each star value, by default None.
+    rng : Optional[np.random.Generator], optional
+        Random number generator, by default None (a new generator).
+    numbers_affinity : Optional[np.ndarray], optional
+        Affinity of each pair of number values, by default None (see `choose_numbers_batch`).
+    stars_affinity : Optional[np.ndarray], optional
+        Affinity of each pair of star values, by default None (see `choose_numbers_batch`).
+
+    Returns
+    -------
+    np.ndarray
+        An array with shape (size, 7), one game per row where the last two values are stars.
+    """
+    rng = rng or np.random.default_rng()
+    return np.concatenate((
+        choose_numbers_batch(numbers, K_NUMBERS, size, numbers_prob, rng, numbers_affinity),
+        choose_numbers_batch(stars, K_STARS, size, stars_prob, rng, stars_affinity)
+    ), axis=1)
+
+
+def filter_games(
+    candidates: np.ndarray,
+    games_to_avoid: Sequence[DrawnGameIndex] = (),
+    rules: Optional[RuleSet] = None
+) -> np.ndarray:
+    """Keep only the games of a block that pass all the rules.
+
+    Parameters
+    ----------
+    candidates : np.ndarray
+        Block of games to be checked, one game per row.
+    games_to_avoid : Sequence[DrawnGameIndex], optional
+        Indexes of games that must not be repeated, by default ().
+    rules : Optional[RuleSet], optional
+        Rules to check, it counts the games rejected by each rule, by default None (the default rules).
+
+    Returns
+    -------
+    np.ndarray
+        The candidates that pass all rules, without repeated games.
+    """
+    keys = game_keys(candidates)
+
+    mask = (rules or RuleSet()).check(candidates)
+    for index in games_to_avoid:
+        mask &= ~index.contains_keys(keys)
+
+    # Keep only the first occurrence of games repeated inside the block
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    is_first = np.zeros(len(candidates), dtype=bool)
+    is_first[order[np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]]] = True
+
+    return candidates[mask & is_first]
+
+
+def generate_games_batch(
+    number_of_games: int,
+    numbers: np.ndarray,
+    stars: np.ndarray,
+    numbers_prob: Optional[np.ndarray] = None,
+    stars_prob: Optional[np.ndarray] = None,
+    games_to_avoid: Sequence[DrawnGameIndex] = (),
+    rules: Optional[RuleSet] = None,
+    rng: Optional[np.random.Generator] = None,
+    numbers_affinity: Optional[np.ndarray] = None,
+    stars_affinity: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Generate a number of games that pass all the rules.
+
+    The games are sampled in blocks, the block is filtered by the rules and
+    only the rejected games are sampled again until the number of games is reached.
 
     Parameters
     ----------
-    game_types : List[GameType]
-        List of game types to be generated.
     number_of_games : int
-        Number of games to generate for each game type.
+        Number of games to generate.
+    numbers : np.ndarray
+        An array of number values to be chosen.
+    stars : np.ndarray
+        An array of star values to be chosen.
+    numbers_prob : Optional[np.ndarray], optional
+        An array of probabilities for each number value, by default None.
+    stars_prob : Optional[np.ndarray], optional
+        An array of probabilities for each star value, by default None.
+    games_to_avoid : Sequence[DrawnGameIndex], optional
+        Indexes of games that must not be repeated, by default ().
+    rules : Optional[RuleSet], optional
+        Rules to check, by default None (the default rules).
+    rng : Optional[np.random.Generator], optional
+        Random number generator, by default None (a new generator).
+    numbers_affinity : Optional[np.ndarray], optional
+        Affinity of each pair of number values, by default None (see `choose_numbers_batch`).
+    stars_affinity : Optional[np.ndarray], optional
+        Affinity of each pair of star values, by default None (see `choose_numbers_batch`).
 
     Returns
     -------
-    List[Tuple[GameType, np.ndarray]]
-        List of games generated grouped by type.
+    np.ndarray
+        An array with shape (number_of_games, 7), one game per row.
+
+    Raises
+    ------
+    NotEnoughGamesError
+        If MAX_REJECTED_IN_ROW candidates in a row are rejected, there are no games left that pass the rules.
     """
-    games_drawn, nums, p_nums, pinv_nums, stars, p_stars, pinv_stars = get_games_and_stats()
+    rules = rules or RuleSet()
+    rng = rng or np.random.default_rng()
+    games = np.empty((0, K_NUMBERS + K_STARS), dtype=numbers.dtype)
+    games_generated = DrawnGameIndex()
+    rejected_in_row = 0
 
-    generated_games_by_type: List[Tuple[GameType, np.ndarray]] = []
-    all_games_generated: List[np.ndarray] = []
+    while len(games) < number_of_games:
+        candidates = gen_games_weighted_batch(
+            number_of_games - len(games), numbers, stars, numbers_prob, stars_prob, rng,
+            numbers_affinity, stars_affinity
+        )
+        accepted = filter_games(candidates, (games_generated, *games_to_avoid), rules)
+        count("candidates", len(candidates))
+        count("candidates_rejected", len(candidates) - len(accepted))
 
-    for gt in game_types:
-        ng = 0
-        game_lst = []
-        while ng < number_of_games:
-            game = {
-                GameType.random: gen_game_weighted(nums, stars),
-                GameType.high_frequency: gen_game_weighted(nums, stars, p_nums, p_stars),
-                GameType.low_frequency: gen_game_weighted(nums, stars, pinv_nums, pinv_stars)
-            }[gt]
+        rejected_in_row = rejected_in_row + len(candidates) if len(accepted) == 0 else 0
+        if rejected_in_row >= MAX_REJECTED_IN_ROW:
+            raise NotEnoughGamesError(
+                f"Only {len(games)} games could be generated following the rules, {number_of_games} requested."
+            )
 
-            # Check the rules
-            if has_only_even(game[:K_NUMBERS]):
-                continue
-            if has_only_odd(game[:K_NUMBERS]):
-                continue
-            if already_happen(game, games_drawn):
-                continue
-            if already_happen(game, all_games_generated):
+        games_generated.add(accepted)
+        games = np.concatenate((games, accepted))
+
+    return games
+
+
+def combination_probabilities(
+    values: np.ndarray,
+    k: int,
+    max_value: int,
+    probability: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Calculate the probability of each combination of k values to be chosen by `choose_numbers`.
+
+    The values are chosen one by one without replacement, so a combination S is chosen with probability
+    (inclusion-exclusion over the subsets A of S, where w(A) is the sum of the probabilities of A):
+
+        P(S) = sum over A != {} of (-1)^(|A| + 1) * w(A) / (w(A) + 1 - w(S))
+
+    Parameters
+    ----------
+    values : np.ndarray
+        List of all possible values to be chosen, from 1 to max_value.
+    k : int
+        Number of values to be chosen.
+    max_value : int
+        Highest possible value.
+    probability : Optional[np.ndarray], optional
+        The probability to be chosen for each value, by default None (all values have the same probability).
+
+    Returns
+    -------
+    np.ndarray
+        Array indexed by the rank of the combination (see `codec`) with its probability.
+    """
+    weights = np.zeros(max_value + 1)
+    weights[values] = 1 if probability is None else probability
+
+    combinations = combinations_table(max_value, k)
+    if probability is None:
+        # All combinations of the values have the same probability
+        if np.all(weights[1:] > 0):
+            return np.full(len(combinations), 1 / len(combinations))
+
+        possible = np.all(weights[combinations] > 0, axis=1)
+        return possible / np.count_nonzero(possible)
+
+    # One row for each position of the combination, so the rows are contiguous
+    value_weights = np.ascontiguousarray(weights[combinations.T])
+    rest = weights.sum() - value_weights.sum(axis=0)
+
+    prob = np.zeros(len(combinations))
+    subset = np.zeros(len(combinations))
+    term = np.empty(len(combinations))
+
+    # Walk the subsets in Gray code order, so each one adds or removes a single value from the previous one
+    previous = 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i in range(1, 2 ** k):
+            gray = i ^ (i >> 1)
+            bit = (gray ^ previous).bit_length() - 1
+            previous = gray
+
+            if gray >> bit & 1:
+                subset += value_weights[bit]
+            else:
+                subset -= value_weights[bit]
+
+            np.divide(subset, subset + rest, out=term)
+            if bin(gray).count('1') % 2:
+                prob += term
+            else:
+                prob -= term
+
+    prob[np.any(value_weights == 0, axis=0)] = 0
+    return np.maximum(prob, 0, out=prob)
+
+
+def affinity_combination_probabilities(
+    values: np.ndarray,
+    k: int,
+    max_value: int,
+    probability: Optional[np.ndarray],
+    affinity: np.ndarray
+) -> np.ndarray:
+    """Calculate the probability of each combination of k values to be chosen by `choose_numbers_batch` with affinity.
+
+    A combination S is chosen by any order of its values, so its probability adds up all orders one value
+    at a time over the subsets T of S, where a(T, v) is the sum of the affinities of v to the values of T:
+
+        Q({v}) = p(v)
+        Q(T + {v}) += Q(T) * a(T, v) / (sum over u not in T of a(T, u))
+
+    and P(S) = Q(S). The sum over the values not in T is the sum of the affinities of the values of T
+    minus the affinities between the values of T.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        List of all possible values to be chosen, from 1 to max_value.
+    k : int
+        Number of values to be chosen.
+    max_value : int
+        Highest possible value.
+    probability : Optional[np.ndarray]
+        The probability of each value to be the first chosen, None for the same probability.
+    affinity : np.ndarray
+        Affinity of each pair of values with shape (len(values), len(values)) and zero on the diagonal.
+
+    Returns
+    -------
+    np.ndarray
+        Array indexed by the rank of the combination (see `codec`) with its probability.
+    """
+    weights = np.zeros(max_value + 1)
+    weights[values] = 1 / len(values) if probability is None else probability
+    pairs = np.zeros((max_value + 1, max_value + 1))
+    pairs[np.ix_(values, values)] = affinity
+    totals = pairs.sum(axis=1)
+
+    combinations = combinations_table(max_value, k)
+    members = {mask: [i for i in range(k) if mask >> i & 1] for mask in range(1, 2 ** k)}
+    prob = np.empty(len(combinations))
+
+    # Blocks of combinations, so the partial sums of all subsets fit in memory
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for start in range(0, len(combinations), AFFINITY_BLOCK_SIZE):
+            rows = combinations[start:start + AFFINITY_BLOCK_SIZE].T.astype(np.intp)
+            links = {(i, j): pairs[rows[i], rows[j]] for i in range(k) for j in range(k) if i != j}
+            row_totals = totals[rows]
+
+            level = {1 << i: weights[rows[i]] for i in range(k)}
+            for _ in range(k - 1):
+                following: Dict[int, np.ndarray] = {}
+                for mask, partial in level.items():
+                    chosen = members[mask]
+                    inside = sum(links[i, j] for i in chosen for j in chosen if i != j)
+                    rest = row_totals[chosen].sum(axis=0) - inside
+                    ratio = np.where(rest > 0, partial / rest, 0)
+
+                    for v in range(k):
+                        if mask >> v & 1:
+                            continue
+                        subset = mask | 1 << v
+                        term = ratio * sum(links[i, v] for i in chosen)
+                        following[subset] = following[subset] + term if subset in following else term
+
+                level = following
+
+            prob[start:start + AFFINITY_BLOCK_SIZE] = level[2 ** k - 1]
+
+    return prob
+
+
+def _load_weights() -> Optional[Any]:
+    """Open the file of the combination weights, None if it doesn't exist or can't be read."""
+    if not WEIGHTS_FILE.exists():
+        return None
+
+    try:
+        return np.load(WEIGHTS_FILE)
+    except (OSError, ValueError, zipfile.BadZipFile):
+        return None
+
+
+def get_combination_weights(
+    numbers: np.ndarray,
+    stars: np.ndarray,
+    probabilities: Dict[GameType, Tuple[Optional[np.ndarray], Optional[np.ndarray]]],
+    affinities: Optional[Dict[GameType, Tuple[np.ndarray, np.ndarray]]] = None
+) -> Dict[GameType, Tuple[np.ndarray, np.ndarray]]:
+    """Get the probability of each combination of numbers and stars for each game type.
+
+    The probabilities of the weighted types are stored on a file and only calculated again
+    when the probabilities, or the affinities, of the numbers and stars of the type change.
+
+    Parameters
+    ----------
+    numbers : np.ndarray
+        An array of number values to be chosen.
+    stars : np.ndarray
+        An array of star values to be chosen.
+    probabilities : Dict[GameType, Tuple[Optional[np.ndarray], Optional[np.ndarray]]]
+        Probabilities of each number and star value for each game type, None for the same probability.
+    affinities : Optional[Dict[GameType, Tuple[np.ndarray, np.ndarray]]], optional
+        Affinities of the pairs of numbers and of stars of the game types chosen by affinity,
+        by default None (see `get_type_affinities`).
+
+    Returns
+    -------
+    Dict[GameType, Tuple[np.ndarray, np.ndarray]]
+        Probabilities of the combinations of numbers and of the combinations of stars, indexed by rank.
+    """
+    affinities = affinities or {}
+    weights: Dict[GameType, Tuple[np.ndarray, np.ndarray]] = {}
+    new: Dict[str, np.ndarray] = {}
+
+    data = _load_weights()
+    try:
+        for gt, (numbers_prob, stars_prob) in probabilities.items():
+            if numbers_prob is None and stars_prob is None:
+                # Cheap to calculate, no need to store it
+                weights[gt] = (
+                    combination_probabilities(numbers, K_NUMBERS, MAX_NUMBER),
+                    combination_probabilities(stars, K_STARS, MAX_STAR)
+                )
                 continue
 
-            # Add game to list if pass all rules
-            game_lst.append(game)
-            all_games_generated.append(game)
-            ng = ng + 1
+            digest = hashlib.sha1()
+            for array in (numbers, stars, numbers_prob, stars_prob) + affinities.get(gt, ()):
+                digest.update(b'-' if array is None else np.ascontiguousarray(array).tobytes())
+            stamp = digest.hexdigest()
+
+            if data is not None and f"{gt.value}-stamp" in data.files:
+                try:
+                    if str(data[f"{gt.value}-stamp"]) == stamp:
+                        weights[gt] = (data[gt.value].astype(np.float64), data[f"{gt.value}-stars"])
+                        continue
+                except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+                    # A damaged file is calculated again, without the types it stored
+                    data.close()
+                    data = None
+
+            if gt in affinities:
+                numbers_affinity, stars_affinity = affinities[gt]
+                weights[gt] = (
+                    affinity_combination_probabilities(numbers, K_NUMBERS, MAX_NUMBER, numbers_prob, numbers_affinity),
+                    affinity_combination_probabilities(stars, K_STARS, MAX_STAR, stars_prob, stars_affinity)
+                )
+            else:
+                weights[gt] = (
+                    combination_probabilities(numbers, K_NUMBERS, MAX_NUMBER, numbers_prob),
+                    combination_probabilities(stars, K_STARS, MAX_STAR, stars_prob)
+                )
+            # Single precision is enough for sampling and halves the file
+            new[gt.value] = weights[gt][0].astype(np.float32)
+            new[f"{gt.value}-stars"] = weights[gt][1]
+            new[f"{gt.value}-stamp"] = np.array(stamp)
+
+        # The other types stored are kept
+        stored = {}
+        if new and data is not None:
+            try:
+                stored = {name: data[name] for name in data.files if name not in new and name != 'stamp'}
+            except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+                stored = {}
+    finally:
+        if data is not None:
+            data.close()
+
+    if new:
+        stored.update(new)
+        tmp = WEIGHTS_FILE.with_name(f"{WEIGHTS_FILE.name}.{os.getpid()}.tmp")
+        with open(tmp, 'wb') as f:
+            np.savez(f, **stored)
+        os.replace(tmp, WEIGHTS_FILE)
+
+    return weights
+
+
+class ConstrainedSampler:
+    """Sample games directly from the games that pass the rules and were not drawn or generated yet.
+
+    The combination of numbers is chosen with its probability times the probability of its
+    combinations of stars still available, then the stars are chosen among the available ones,
+    so no game is rejected and the games follow the same distribution as sampling and rejecting.
+
+    Parameters
+    ----------
+    valid_numbers : np.ndarray
+        Boolean mask indexed by the rank of the combination of numbers, True if it passes the rules.
+    games_to_avoid : Optional[np.ndarray], optional
+        Games that must not be generated (e.g. the games drawn), one game per row, by default None.
+    """
+
+    def __init__(self, valid_numbers: np.ndarray, games_to_avoid: Optional[np.ndarray] = None):
+        """Initialize the sampler with the combinations that pass the rules."""
+        self.valid_numbers = valid_numbers
+        # Sorted ranks of the games that can't be generated
+        self._blocked = np.empty(0, dtype=np.int64)
+
+        if games_to_avoid is not None and len(games_to_avoid):
+            self.block(rank_games(games_to_avoid))
+
+    @property
+    def blocked(self) -> np.ndarray:
+        """Return the sorted ranks of the games that can't be generated."""
+        return self._blocked
+
+    def is_blocked(self, ranks: np.ndarray) -> np.ndarray:
+        """Check which games, by rank, can't be generated.
+
+        Parameters
+        ----------
+        ranks : np.ndarray
+            Ranks of the games to be checked.
+
+        Returns
+        -------
+        np.ndarray
+            Boolean mask, True for each game that was drawn or generated.
+        """
+        if len(self._blocked) == 0:
+            return np.zeros(len(ranks), dtype=bool)
+
+        idx = np.searchsorted(self._blocked, ranks)
+        idx[idx == len(self._blocked)] = 0
+        return self._blocked[idx] == ranks
+
+    def block(self, ranks: np.ndarray):
+        """Add games, by rank, to the games that can't be generated.
+
+        Parameters
+        ----------
+        ranks : np.ndarray
+            Ranks of the games.
+        """
+        ranks = np.sort(np.asarray(ranks, dtype=np.int64))
+        ranks = ranks[np.r_[True, ranks[1:] != ranks[:-1]] & ~self.is_blocked(ranks)]
+
+        # Both arrays are sorted, a stable sort only has to merge them
+        self._blocked = np.sort(np.concatenate((self._blocked, ranks)), kind='stable')
+
+    def remaining(self, number_weights: np.ndarray, star_weights: np.ndarray) -> int:
+        """Count how many games can still be generated.
+
+        Parameters
+        ----------
+        number_weights : np.ndarray
+            Probability of each combination of numbers, indexed by rank.
+        star_weights : np.ndarray
+            Probability of each combination of stars, indexed by rank.
+
+        Returns
+        -------
+        int
+            Number of games that pass the rules, have a probability to be chosen and were not drawn or generated.
+        """
+        possible = self.valid_numbers & (number_weights > 0)
+        number_ranks, star_ranks = np.divmod(self._blocked, STAR_COMBINATIONS)
+        blocked = np.count_nonzero(possible[number_ranks] & (star_weights[star_ranks] > 0))
+
+        return int(np.count_nonzero(possible)) * int(np.count_nonzero(star_weights)) - int(blocked)
+
+    def _available_weights(self, valid_weights: np.ndarray, star_weights: np.ndarray) -> np.ndarray:
+        """Get the probability of each combination of numbers times the probability of its stars still available."""
+        weights = valid_weights.copy()
+        if len(self._blocked) == 0:
+            return weights
+
+        # The ranks are sorted, so the games of the same combination of numbers are next to each other
+        number_ranks, star_ranks = np.divmod(self._blocked, STAR_COMBINATIONS)
+        starts = np.flatnonzero(np.r_[True, number_ranks[1:] != number_ranks[:-1]])
+        blocked = number_ranks[starts]
+
+        mass = np.add.reduceat(star_weights[star_ranks], starts)
+        count = np.add.reduceat((star_weights[star_ranks] > 0).astype(np.int64), starts)
+
+        weights[blocked] *= np.maximum(star_weights.sum() - mass, 0)
+        # All the stars of the combination were used (the mass may not be zero due to rounding)
+        weights[blocked[count >= np.count_nonzero(star_weights)]] = 0
+
+        return weights
+
+    def check_remaining(self, number_of_games: int, number_weights: np.ndarray, star_weights: np.ndarray):
+        """Check if a number of games can still be generated.
+
+        Parameters
+        ----------
+        number_of_games : int
+            Number of games to generate.
+        number_weights : np.ndarray
+            Probability of each combination of numbers, indexed by rank.
+        star_weights : np.ndarray
+            Probability of each combination of stars, indexed by rank.
+
+        Raises
+        ------
+        NotEnoughGamesError
+            If there are fewer games left than the number of games.
+        """
+        remaining = self.remaining(number_weights, star_weights)
+        if number_of_games > remaining:
+            raise NotEnoughGamesError(
+                f"Only {remaining} games can still be generated following the rules, {number_of_games} requested."
+            )
+
+    def sample(
+        self,
+        number_of_games: int,
+        number_weights: np.ndarray,
+        star_weights: np.ndarray,
+        rng: Optional[np.random.Generator] = None
+    ) -> np.ndarray:
+        """Generate games that pass the rules, without repeating games drawn or generated.
+
+        The games generated are added to the games that can't be generated.
+
+        Parameters
+        ----------
+        number_of_games : int
+            Number of games to generate.
+        number_weights : np.ndarray
+            Probability of each combination of numbers, indexed by rank.
+        star_weights : np.ndarray
+            Probability of each combination of stars, indexed by rank.
+        rng : Optional[np.random.Generator], optional
+            Random number generator, by default None (a new generator).
 
-        generated_games_by_type.append((gt, game_lst))
+        Returns
+        -------
+        np.ndarray
+            An array with shape (number_of_games, 7), one game per row.
 
-    return generated_games_by_type
+        Raises
+        ------
+        NotEnoughGamesError
+            If there are fewer games left than the number of games.
+        """
+        return unrank_games(self.sample_ranks(number_of_games, number_weights, star_weights, rng))
+
+    def sample_ranks(
+        self,
+        number_of_games: int,
+        number_weights: np.ndarray,
+        star_weights: np.ndarray,
+        rng: Optional[np.random.Generator] = None
+    ) -> np.ndarray:
+        """Generate games, by rank, that pass the rules, without repeating games drawn or generated (see `sample`).
+
+        Parameters
+        ----------
+        number_of_games : int
+            Number of games to generate.
+        number_weights : np.ndarray
+            Probability of each combination of numbers, indexed by rank.
+        star_weights : np.ndarray
+            Probability of each combination of stars, indexed by rank.
+        rng : Optional[np.random.Generator], optional
+            Random number generator, by default None (a new generator).
+
+        Returns
+        -------
+        np.ndarray
+            Ranks of the games generated, in the order they were generated.
+
+        Raises
+        ------
+        NotEnoughGamesError
+            If there are fewer games left than the number of games.
+        """
+        self.check_remaining(number_of_games, number_weights, star_weights)
+        rng = rng or np.random.default_rng()
+
+        valid_weights = np.where(self.valid_numbers, number_weights, 0)
+        star_cdf = np.cumsum(star_weights)
+        star_offsets = np.arange(STAR_COMBINATIONS)
+        ranks = np.empty(0, dtype=np.int64)
+
+        # Each round adds at least one game, the games repeated inside the round are dropped
+        while len(ranks) < number_of_games:
+            size = number_of_games - len(ranks)
+            number_cdf = np.cumsum(self._available_weights(valid_weights, star_weights))
+
+            # Searching sorted values walks the large cumulative array in order, much faster than random access
+            u = rng.random(size) * number_cdf[-1]
+            order = np.argsort(u)
+            number_ranks = np.empty(size, dtype=np.int64)
+            number_ranks[order] = np.searchsorted(number_cdf, u[order], side='right')
+            number_ranks = np.minimum(number_ranks, NUMBER_COMBINATIONS - 1)
+            star_ranks = np.searchsorted(star_cdf, rng.random(size) * star_cdf[-1], side='right')
+            star_ranks = np.minimum(star_ranks, STAR_COMBINATIONS - 1)
+
+            candidates = number_ranks * STAR_COMBINATIONS + star_ranks
+
+            # Stars not available for the combination: choose again among the available ones only
+            taken = np.flatnonzero(self.is_blocked(candidates))
+            if len(taken):
+                rows = number_ranks[taken, None] * STAR_COMBINATIONS + star_offsets
+                available = ~self.is_blocked(rows.ravel()).reshape(rows.shape)
+                row_cdf = np.cumsum(np.where(available, star_weights, 0), axis=1)
+                v = rng.random(len(taken)) * row_cdf[:, -1]
+                candidates[taken] = rows[np.arange(len(taken)), (row_cdf <= v[:, None]).sum(axis=1)]
+
+            # Keep only the first occurrence of games repeated inside the round
+            order = np.argsort(candidates, kind='stable')
+            sorted_candidates = candidates[order]
+            is_first = np.zeros(size, dtype=bool)
+            is_first[order[np.r_[True, sorted_candidates[1:] != sorted_candidates[:-1]]]] = True
+
+            new = candidates[is_first]
+            self.block(new)
+            ranks = np.concatenate((ranks, new))
+
+            count("candidates", size)
+            count("candidates_stars_redrawn", len(taken))
+            count("candidates_rejected", size - len(new))
+
+        return ranks
+
+
+# Rules and probabilities of the worker processes, set once when the pool starts
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(
+    valid_numbers: np.ndarray,
+    weights: Dict[GameType, Tuple[np.ndarray, np.ndarray]],
+    profile: bool = False
+):
+    """Keep the combinations of numbers that pass the rules and the probabilities on the worker process."""
+    _worker_state['valid_numbers'] = valid_numbers
+    _worker_state['weights'] = weights
+    _worker_state['profile'] = profile
+
+    # A forked worker starts with a copy of the profiler of the parent, its counters are sent back instead
+    disable()
+
+
+def _sample_ranks_worker(
+    game_type: GameType,
+    blocked: np.ndarray,
+    number_of_games: int,
+    seed: np.random.SeedSequence
+) -> Tuple[np.ndarray, Dict[str, float]]:
+    """Generate games, by rank, on a worker process with its own random stream.
+
+    It also returns the counters of the sampling, empty if the parent is not profiling.
+    """
+    profiler = enable() if _worker_state['profile'] else None
+
+    sampler = ConstrainedSampler(_worker_state['valid_numbers'])
+    sampler.block(blocked)
+    ranks = sampler.sample_ranks(number_of_games, *_worker_state['weights'][game_type], np.random.default_rng(seed))
+
+    disable()
+    return ranks, profiler.counters if profiler is not None else {}
+
+
+def sample_in_parallel(
+    executor: ProcessPoolExecutor,
+    sampler: ConstrainedSampler,
+    game_type: GameType,
+    number_of_games: int,
+    weights: Tuple[np.ndarray, np.ndarray],
+    seed: np.random.SeedSequence,
+    workers: int
+) -> np.ndarray:
+    """Generate games on a pool of processes, each worker with its own random stream.
+
+    Each worker generates its share of the games avoiding the games blocked on the sampler.
+    The shares are merged in the worker order, dropping the games already generated by a previous
+    worker, the same as repeated games on a single stream, so the games follow the same distribution.
+    The missing games are generated again with new streams, spawned from the seed.
+    The counters of the workers are added to the counters of the parent process.
+
+    Parameters
+    ----------
+    executor : ProcessPoolExecutor
+        Pool of processes started with `_init_worker`.
+    sampler : ConstrainedSampler
+        Sampler with the games that can't be generated, the games generated are added to it.
+    game_type : GameType
+        Type of the games.
+    number_of_games : int
+        Number of games to generate.
+    weights : Tuple[np.ndarray, np.ndarray]
+        Probabilities of the combinations of numbers and stars of the game type.
+    seed : np.random.SeedSequence
+        Seed of the random streams, the same seed and workers always give the same games.
+    workers : int
+        Number of shares, one for each worker.
+
+    Returns
+    -------
+    np.ndarray
+        An array with shape (number_of_games, 7), one game per row.
+
+    Raises
+    ------
+    NotEnoughGamesError
+        If there are fewer games left than the number of games.
+    """
+    sampler.check_remaining(number_of_games, *weights)
+    ranks = np.empty(0, dtype=np.int64)
+
+    while len(ranks) < number_of_games:
+        share, extra = divmod(number_of_games - len(ranks), workers)
+        sizes = [share + (i < extra) for i in range(workers) if share + (i < extra)]
+
+        futures = [
+            executor.submit(_sample_ranks_worker, game_type, sampler.blocked, size, child)
+            for size, child in zip(sizes, seed.spawn(len(sizes)))
+        ]
+
+        for future in futures:
+            new, counters = future.result()
+            for name, value in counters.items():
+                count(name, value)
+
+            taken = sampler.is_blocked(new)
+            count("candidates_rejected", int(np.count_nonzero(taken)))
+            new = new[~taken]
+
+            sampler.block(new)
+            ranks = np.concatenate((ranks, new))
+
+    return unrank_games(ranks)
+
+
+def _batch_sizes(number_of_games: int, batch_size: Optional[int] = None) -> Iterator[int]:
+    """Split a number of games into batches, one batch with all the games if the size is None."""
+    batch_size = batch_size or number_of_games
+    for start in range(0, number_of_games, batch_size):
+        yield min(batch_size, number_of_games - start)
+
+
+def iter_multiple_games(
+    game_types: List[GameType],
+    number_of_games: int,
+    rules: Optional[RuleSet] = None,
+    seed: Optional[int] = None,
+    workers: int = 1,
+    batch_size: Optional[int] = None,
+    window: int = WINDOW_DAYS,
+    half_life: float = HALF_LIFE_DAYS
+) -> Iterator[Tuple[GameType, np.ndarray]]:
+    """Generate multiple games based on type, in batches.
+
+    Only the batch being generated and the ranks of the games already generated
+    (8 bytes per game, to not repeat them) are kept in memory.
+
+    Parameters
+    ----------
+    game_types : List[GameType]
+        List of game types to be generated.
+    number_of_games : int
+        Number of games to generate for each game type.
+    rules : Optional[RuleSet], optional
+        Rules to check, it counts the games rejected by each rule, by default None (the default rules).
+    seed : Optional[int], optional
+        Seed of the random streams, by default None (a new seed).
+        The same seed, workers, batch size and database always give the same games.
+    workers : int, optional
+        Number of processes generating games at the same time, by default 1.
+    batch_size : Optional[int], optional
+        Maximum number of games on each batch, by default None (one batch for each game type).
+    window : int, optional
+        Days before the last draw used by the recent frequency types, by default WINDOW_DAYS.
+    half_life : float, optional
+        Days for the weight of a draw to halve on the decayed frequency types, by default HALF_LIFE_DAYS.
+
+    Yields
+    ------
+    Iterator[Tuple[GameType, np.ndarray]]
+        The game type and a batch of its games, one game per row.
+        The batches come in the order of the game types.
+
+    Raises
+    ------
+    NotEnoughGamesError
+        If there are fewer games left that pass the rules than the number of games of a type,
+        it is raised before the first batch of that type.
+    """
+    rules = rules or RuleSet()
+    with stage("load"):
+        games, *stats = get_games_and_stats()
+    nums, _, _, stars, _, _ = stats
+
+    with stage("probabilities"):
+        probabilities = get_type_probabilities(game_types, tuple(stats), window, half_life)
+        affinities = get_type_affinities(game_types, nums, stars)
+
+    # One independent stream for each game type
+    seeds = np.random.SeedSequence(seed).spawn(len(game_types))
+
+    if rules.numbers_only:
+        with stage("weights"):
+            weights = get_combination_weights(nums, stars, probabilities, affinities)
+        with stage("rules"):
+            valid_numbers = rules.valid_numbers()
+            sampler = ConstrainedSampler(valid_numbers, games)
+
+        executor = None
+        if workers > 1:
+            executor = ProcessPoolExecutor(
+                workers, initializer=_init_worker, initargs=(valid_numbers, weights, is_enabled())
+            )
+
+        try:
+            for gt, type_seed in zip(game_types, seeds):
+                sampler.check_remaining(number_of_games, *weights[gt])
+                rng = np.random.default_rng(type_seed)
+
+                for size in _batch_sizes(number_of_games, batch_size):
+                    # The batch is timed before it is yielded, so the time of the caller is not added
+                    with stage("sampling"):
+                        if executor is None:
+                            batch = sampler.sample(size, *weights[gt], rng)
+                        else:
+                            batch = sample_in_parallel(executor, sampler, gt, size, weights[gt], type_seed, workers)
+
+                    count("games_generated", len(batch))
+                    yield gt, batch
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return
+
+    # Rules that look at the stars are checked on blocks of candidates, on a single process
+    games_drawn = DrawnGameIndex(games)
+    all_games_generated = DrawnGameIndex()
+
+    for gt, type_seed in zip(game_types, seeds):
+        numbers_prob, stars_prob = probabilities[gt]
+        numbers_affinity, stars_affinity = affinities.get(gt, (None, None))
+        rng = np.random.default_rng(type_seed)
+
+        for size in _batch_sizes(number_of_games, batch_size):
+            with stage("sampling"):
+                batch = generate_games_batch(
+                    size, nums, stars, numbers_prob, stars_prob, (games_drawn, all_games_generated), rules, rng,
+                    numbers_affinity, stars_affinity
+                )
+                all_games_generated.add(batch)
+
+            count("games_generated", len(batch))
+            yield gt, batch
+
+
+def generate_multiple_games(
+    game_types: List[GameType],
+    number_of_games: int,
+    rules: Optional[RuleSet] = None,
+    seed: Optional[int] = None,
+    workers: int = 1,
+    window: int = WINDOW_DAYS,
+    half_life: float = HALF_LIFE_DAYS
+) -> List[Tuple[GameType, np.ndarray]]:
+    """Generate multiple games based on type.
+
+    Parameters
+    ----------
+    game_types : List[GameType]
+        List of game types to be generated.
+    number_of_games : int
+        Number of games to generate for each game type.
+    rules : Optional[RuleSet], optional
+        Rules to check, it counts the games rejected by each rule, by default None (the default rules).
+    seed : Optional[int], optional
+        Seed of the random streams, by default None (a new seed).
+        The same seed, workers and database always give the same games.
+    workers : int, optional
+        Number of processes generating games at the same time, by default 1.
+    window : int, optional
+        Days before the last draw used by the recent frequency types, by default WINDOW_DAYS.
+    half_life : float, optional
+        Days for the weight of a draw to halve on the decayed frequency types, by default HALF_LIFE_DAYS.
+
+    Returns
+    -------
+    List[Tuple[GameType, np.ndarray]]
+        List of games generated grouped by type.
+
+    Raises
+    ------
+    NotEnoughGamesError
+        If there are fewer games left that pass the rules than the number of games.
+    """
+    if number_of_games <= 0:
+        return [(gt, np.empty((0, K_NUMBERS + K_STARS), dtype=np.int64)) for gt in game_types]
+
+    # A single batch for each game type
+    return list(iter_multiple_games(
+        game_types, number_of_games, rules, seed, workers, window=window, half_life=half_life
+    ))
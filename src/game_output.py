@@ -0,0 +1,233 @@
+"""Module to read and write games and the backtest results, in bulk for the machine readable formats."""
+import csv
+import json
+from itertools import islice
+from typing import (
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple
+)
+
+import numpy as np
+import typer
+
+from constants import (
+    K_NUMBERS,
+    K_STARS,
+    MAX_NUMBER,
+    MAX_STAR,
+    GameType,
+    OutputFormat
+)
+from game_backtest import (
+    TIER_NAMES,
+    BacktestSummary
+)
+from profiling import (
+    count,
+    stage
+)
+from utils import print_game
+
+GAME_COLUMNS = ('type', 'n1', 'n2', 'n3', 'n4', 'n5', 's1', 's2')
+SUMMARY_COLUMNS = ('strategy', 'window', 'games', 'draws', 'plays', 'wins') + TIER_NAMES
+
+
+def _row_template(game_type: GameType, file_format: OutputFormat) -> str:
+    """Build the printf style template of one game."""
+    if file_format == OutputFormat.csv:
+        return game_type.value + ',%d' * (K_NUMBERS + K_STARS) + '\n'
+
+    # Same text as json.dumps
+    return (
+        '{"type": "' + game_type.value + '", ' +
+        '"numbers": [' + ', '.join(['%d'] * K_NUMBERS) + '], ' +
+        '"stars": [' + ', '.join(['%d'] * K_STARS) + ']}\n'
+    )
+
+
+def format_games(game_type: GameType, games: np.ndarray, file_format: OutputFormat) -> str:
+    """Format a batch of games as CSV rows or NDJSON lines.
+
+    The template of a row is repeated for all games and filled at once,
+    much faster than formatting each game on its own.
+
+    Parameters
+    ----------
+    game_type : GameType
+        Type of the games.
+    games : np.ndarray
+        Batch of games, one game per row.
+    file_format : OutputFormat
+        CSV or NDJSON.
+
+    Returns
+    -------
+    str
+        The text of all games, one line per game.
+    """
+    return (_row_template(game_type, file_format) * len(games)) % tuple(np.asarray(games).ravel().tolist())
+
+
+def write_games(
+    batches: Iterable[Tuple[GameType, np.ndarray]],
+    file_format: OutputFormat = OutputFormat.text,
+    stream: Optional[TextIO] = None
+) -> int:
+    """Write batches of games as they are generated.
+
+    Parameters
+    ----------
+    batches : Iterable[Tuple[GameType, np.ndarray]]
+        Game type and a batch of its games (see `iter_multiple_games`).
+    file_format : OutputFormat, optional
+        Text for people, with colors on a terminal, or CSV or NDJSON, by default OutputFormat.text.
+    stream : Optional[TextIO], optional
+        Where to write the games, by default None (standard output).
+
+    Returns
+    -------
+    int
+        Number of games written.
+    """
+    stream = stream or typer.get_text_stream('stdout')
+    if file_format == OutputFormat.csv:
+        stream.write(','.join(GAME_COLUMNS) + '\n')
+
+    total = 0
+    last_type: Optional[GameType] = None
+    for game_type, games in batches:
+        total += len(games)
+
+        with stage("write"):
+            if file_format != OutputFormat.text:
+                stream.write(format_games(game_type, games, file_format))
+                continue
+
+            if game_type != last_type:
+                typer.echo(
+                    "Games of type " + typer.style(game_type.value, fg=typer.colors.GREEN, bold=True), file=stream
+                )
+                last_type = game_type
+
+            for game in games.tolist():
+                print_game(game, file=stream)
+
+    stream.flush()
+    count("rows_written", total)
+    return total
+
+
+def read_games(stream: TextIO, batch_size: int = 100000) -> Iterator[Tuple[str, np.ndarray]]:
+    """Read games from a CSV file written with `write_games`, in batches.
+
+    Parameters
+    ----------
+    stream : TextIO
+        CSV file with the columns type, n1 to n5, s1 and s2.
+    batch_size : int, optional
+        Maximum number of games on each batch, by default 100000.
+
+    Yields
+    ------
+    Iterator[Tuple[str, np.ndarray]]
+        The type of the games and a batch of games of that type, one game per row.
+
+    Raises
+    ------
+    ValueError
+        If the file doesn't have the expected columns or a game is not valid.
+    """
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None or tuple(header) != GAME_COLUMNS:
+        raise ValueError(f"The games file must have the columns {', '.join(GAME_COLUMNS)}.")
+
+    while True:
+        rows = list(islice(reader, batch_size))
+        if not rows:
+            return
+
+        types = [row[0] for row in rows]
+        error = f"Invalid game on the lines {reader.line_num - len(rows) + 1} to {reader.line_num}."
+        try:
+            games = np.array([row[1:] for row in rows], dtype=np.int64).reshape(len(rows), K_NUMBERS + K_STARS)
+        except ValueError:
+            raise ValueError(error)
+
+        # Numbers and stars out of range or repeated would give wrong prizes (or fail) on the backtest
+        numbers = np.sort(games[:, :K_NUMBERS], axis=1)
+        stars = np.sort(games[:, K_NUMBERS:], axis=1)
+        if (
+            (numbers[:, 0] < 1).any() or (numbers[:, -1] > MAX_NUMBER).any() or
+            (stars[:, 0] < 1).any() or (stars[:, -1] > MAX_STAR).any() or
+            (np.diff(numbers, axis=1) == 0).any() or (np.diff(stars, axis=1) == 0).any()
+        ):
+            raise ValueError(error)
+
+        # Split the batch where the type changes, keeping the order of the file
+        starts = [i for i in range(len(types)) if i == 0 or types[i] != types[i - 1]]
+        for start, stop in zip(starts, starts[1:] + [len(types)]):
+            yield types[start], games[start:stop]
+
+
+def _summary_record(summary: BacktestSummary) -> List:
+    """Get the values of a backtest summary as a row, on the same order of the columns."""
+    return [
+        summary.strategy, summary.window, summary.games, summary.draws, summary.plays, summary.wins
+    ] + list(summary.tiers)
+
+
+def write_backtest(
+    summaries: Iterable[BacktestSummary],
+    file_format: OutputFormat = OutputFormat.text,
+    stream: Optional[TextIO] = None
+):
+    """Write the results of the backtest.
+
+    Parameters
+    ----------
+    summaries : Iterable[BacktestSummary]
+        Results of each strategy on each time window.
+    file_format : OutputFormat, optional
+        Text table for people, or CSV or NDJSON, by default OutputFormat.text.
+    stream : Optional[TextIO], optional
+        Where to write the results, by default None (standard output).
+    """
+    stream = stream or typer.get_text_stream('stdout')
+
+    if file_format == OutputFormat.csv:
+        writer = csv.writer(stream, lineterminator='\n')
+        writer.writerow(SUMMARY_COLUMNS)
+        writer.writerows(_summary_record(summary) for summary in summaries)
+
+    elif file_format == OutputFormat.ndjson:
+        for summary in summaries:
+            record = dict(zip(SUMMARY_COLUMNS[:6], _summary_record(summary)))
+            record['tiers'] = dict(zip(TIER_NAMES, summary.tiers))
+            stream.write(json.dumps(record) + '\n')
+
+    else:
+        header = f"{'Window':<8}{'Draws':>7}{'Wins':>12}{'Rate':>8}" + ''.join(f"{name:>9}" for name in TIER_NAMES)
+        strategy = None
+        for summary in summaries:
+            if summary.strategy != strategy:
+                strategy = summary.strategy
+                typer.echo(
+                    "Games of type " + typer.style(strategy, fg=typer.colors.GREEN, bold=True) +
+                    f" ({summary.games} games)",
+                    file=stream
+                )
+                typer.echo(header, file=stream)
+
+            rate = summary.wins / summary.plays if summary.plays else 0
+            typer.echo(
+                f"{summary.window:<8}{summary.draws:>7}{summary.wins:>12}{rate:>8.2%}" +
+                ''.join(f"{count:>9}" for count in summary.tiers),
+                file=stream
+            )
+
+    stream.flush()
@@ -1,53 +1,428 @@
 """Module with rules to generate a game."""
+from typing import (
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Union
+)
 
 import numpy as np
 
+from codec import combinations_table
+from constants import (
+    K_NUMBERS,
+    MAX_NUMBER
+)
+from game_array import (
+    Game,
+    GameArray,
+    game_keys
+)
 
-def already_happen(game: np.ndarray, games: np.ndarray) -> bool:
+# Numbers up to this value are low, the others are high
+LOW_NUMBER_LIMIT = MAX_NUMBER // 2
+
+
+class DrawnGameIndex:
+    """Index of games to check, in constant time, if a game already happened.
+
+    Parameters
+    ----------
+    games : Optional[Union[np.ndarray, GameArray]], optional
+        Games to be indexed, one game per row, by default None.
+    """
+
+    def __init__(self, games: Optional[Union[np.ndarray, GameArray]] = None):
+        """Initialize the index with the given games."""
+        self._keys: Set[int] = set()
+        self._sorted_keys = np.empty(0, dtype=np.uint64)
+
+        if games is not None:
+            self.add(games)
+
+    def __len__(self) -> int:
+        """Return the number of games indexed."""
+        return len(self._keys)
+
+    def __contains__(self, game: Union[np.ndarray, Game]) -> bool:
+        """Check if a game is indexed."""
+        return int(game_keys(game)) in self._keys
+
+    @property
+    def games(self) -> GameArray:
+        """Return the games indexed, sorted by bit mask."""
+        return GameArray(self._sorted_keys)
+
+    def add(self, games: Union[np.ndarray, GameArray]):
+        """Add games to the index.
+
+        Parameters
+        ----------
+        games : Union[np.ndarray, GameArray]
+            Game to be added, or a block of games with one game per row.
+        """
+        keys = np.sort(np.atleast_1d(game_keys(games)))
+        keys = keys[np.r_[True, keys[1:] != keys[:-1]] & ~self.contains_keys(keys)]
+
+        self._keys.update(keys.tolist())
+        # Both arrays are sorted, a stable sort only has to merge them
+        self._sorted_keys = np.sort(np.concatenate((self._sorted_keys, keys)), kind='stable')
+
+    def contains(self, candidates: Union[np.ndarray, GameArray]) -> np.ndarray:
+        """Check which games of a block are indexed.
+
+        Parameters
+        ----------
+        candidates : Union[np.ndarray, GameArray]
+            Block of games to be checked, one game per row.
+
+        Returns
+        -------
+        np.ndarray
+            Boolean mask, True for each candidate that is indexed.
+        """
+        return self.contains_keys(game_keys(candidates))
+
+    def contains_keys(self, keys: np.ndarray) -> np.ndarray:
+        """Check which game keys are indexed.
+
+        Parameters
+        ----------
+        keys : np.ndarray
+            Keys of the games to be checked (see `game_keys`).
+
+        Returns
+        -------
+        np.ndarray
+            Boolean mask, True for each key that is indexed.
+        """
+        if len(self._sorted_keys) == 0:
+            return np.zeros(len(keys), dtype=bool)
+
+        idx = np.searchsorted(self._sorted_keys, keys)
+        idx[idx == len(self._sorted_keys)] = 0
+        return self._sorted_keys[idx] == keys
+
+
+def already_happen(game: np.ndarray, games: Union[np.ndarray, DrawnGameIndex]) -> bool:
     """Check if a game exists in a list of games.
 
     Parameters
     ----------
     game : np.ndarray
         Game to be checked.
-    games : np.ndarray
-        List of existing games.
+    games : Union[np.ndarray, DrawnGameIndex]
+        List of existing games, or an index of existing games.
 
     Returns
     -------
     bool
         True if the given game exists in the list, otherwise False.
     """
+    if isinstance(games, DrawnGameIndex):
+        return game in games
+
     return next((True for g in games if all(g == game)), False)
 
 
-def has_only_even(game: np.ndarray) -> bool:
+def has_only_even(game: np.ndarray) -> np.ndarray:
     """Check if a game has only even numbers.
 
     Parameters
     ----------
     game : np.ndarray
-        Game to be checked.
+        Game to be checked, or a block of games with one game per row.
 
     Returns
     -------
-    bool
+    np.ndarray
         True if the game has only even number, otherwise False.
+        For a block of games, one value per row.
     """
-    return all(map(lambda x: x % 2 == 0, game))
+    return np.all(np.asarray(game) % 2 == 0, axis=-1)
 
 
-def has_only_odd(game: np.ndarray) -> bool:
+def has_only_odd(game: np.ndarray) -> np.ndarray:
     """Check if a game has only odd numbers.
 
     Parameters
     ----------
     game : np.ndarray
-        Game to be checked.
+        Game to be checked, or a block of games with one game per row.
 
     Returns
     -------
-    bool
+    np.ndarray
         True if the game has only odd number, otherwise False.
+        For a block of games, one value per row.
     """
-    return all(map(lambda x: x % 2 != 0, game))
+    return np.all(np.asarray(game) % 2 != 0, axis=-1)
+
+
+class Rule(NamedTuple):
+    """Rule that a generated game must pass.
+
+    Parameters
+    ----------
+    name : str
+        Name of the rule with its arguments, as given on the command line (e.g. `sum=95-160`).
+    check : Callable[[np.ndarray], np.ndarray]
+        Vectorized predicate, it takes a block of games with shape (N, 7) and
+        returns a boolean mask, True for each game that passes the rule.
+    numbers_only : bool, optional
+        The rule only looks at the numbers, not at the stars, by default True.
+    """
+
+    name: str
+    check: Callable[[np.ndarray], np.ndarray]
+    numbers_only: bool = True
+
+
+# Functions that build a rule from its integer arguments, by rule name
+RULES: Dict[str, Callable[..., Rule]] = {}
+
+
+def register_rule(name: str) -> Callable[[Callable[..., Rule]], Callable[..., Rule]]:
+    """Register a function that builds a rule, so it can be enabled by name.
+
+    Parameters
+    ----------
+    name : str
+        Name of the rule.
+
+    Returns
+    -------
+    Callable[[Callable[..., Rule]], Callable[..., Rule]]
+        Decorator that adds the function to `RULES`.
+    """
+    def decorator(factory: Callable[..., Rule]) -> Callable[..., Rule]:
+        RULES[name] = factory
+        return factory
+
+    return decorator
+
+
+def _sorted_numbers(games: np.ndarray) -> np.ndarray:
+    """Get the numbers of a block of games sorted on each row."""
+    return np.sort(np.asarray(games)[:, :K_NUMBERS], axis=1)
+
+
+def _row_sum(values: np.ndarray) -> np.ndarray:
+    """Sum each row adding one column at a time, much faster than a reduction over short rows."""
+    total = np.zeros(len(values), dtype=np.int64)
+    for column in values.T:
+        total += column
+
+    return total
+
+
+@register_rule("parity")
+def parity_rule() -> Rule:
+    """Build the rule: the numbers must not be all even or all odd."""
+    def check(games: np.ndarray) -> np.ndarray:
+        # Same as has_only_even and has_only_odd, counting the odd numbers once
+        odd = _row_sum(np.asarray(games)[:, :K_NUMBERS] % 2)
+        return (odd > 0) & (odd < K_NUMBERS)
+
+    return Rule("parity", check)
+
+
+@register_rule("sum")
+def sum_rule(low: int = 75, high: int = 180) -> Rule:
+    """Build the rule: the sum of the numbers must be between `low` and `high` (inclusive)."""
+    if low > high:
+        raise ValueError(f"the minimum sum {low} is greater than the maximum {high}")
+
+    def check(games: np.ndarray) -> np.ndarray:
+        total = _row_sum(np.asarray(games)[:, :K_NUMBERS])
+        return (total >= low) & (total <= high)
+
+    return Rule(f"sum={low}-{high}", check)
+
+
+@register_rule("max-run")
+def max_run_rule(limit: int = 2) -> Rule:
+    """Build the rule: there must not be more than `limit` consecutive numbers (e.g. 7, 8, 9 is a run of 3)."""
+    if limit < 1:
+        raise ValueError("the longest run must be at least 1")
+
+    def check(games: np.ndarray) -> np.ndarray:
+        consecutive = np.diff(_sorted_numbers(games), axis=1) == 1
+
+        # Length of the run ending on each number, one column at a time for all games
+        run = np.zeros(len(consecutive), dtype=np.int64)
+        longest = np.zeros(len(consecutive), dtype=np.int64)
+        for column in consecutive.T:
+            run = (run + 1) * column
+            np.maximum(longest, run, out=longest)
+
+        return longest + 1 <= limit
+
+    return Rule(f"max-run={limit}", check)
+
+
+@register_rule("decades")
+def decades_rule(minimum: int = 3) -> Rule:
+    """Build the rule: the numbers must be on at least `minimum` decades (1-10, 11-20, ..., 41-50)."""
+    most = min(K_NUMBERS, MAX_NUMBER // 10)
+    if not 1 <= minimum <= most:
+        raise ValueError(f"the minimum number of decades must be between 1 and {most}")
+
+    def check(games: np.ndarray) -> np.ndarray:
+        decades = (_sorted_numbers(games) - 1) // 10
+        return 1 + _row_sum(np.diff(decades, axis=1) != 0) >= minimum
+
+    return Rule(f"decades={minimum}", check)
+
+
+@register_rule("low-high")
+def low_high_rule(minimum: int = 1) -> Rule:
+    """Build the rule: there must be at least `minimum` low (1-25) and `minimum` high (26-50) numbers."""
+    if 2 * minimum > K_NUMBERS:
+        raise ValueError(f"a game can't have {minimum} low and {minimum} high numbers")
+
+    def check(games: np.ndarray) -> np.ndarray:
+        low = _row_sum(np.asarray(games)[:, :K_NUMBERS] <= LOW_NUMBER_LIMIT)
+        return (low >= minimum) & (K_NUMBERS - low >= minimum)
+
+    return Rule(f"low-high={minimum}", check)
+
+
+# Rules applied to all games generated
+DEFAULT_RULES = ("parity",)
+
+
+def parse_rule(spec: str) -> Rule:
+    """Build a rule from its name and arguments.
+
+    Parameters
+    ----------
+    spec : str
+        Name of the rule, optionally followed by `=` and its arguments
+        separated by `-`, e.g. `parity`, `max-run=2` or `sum=95-160`.
+
+    Returns
+    -------
+    Rule
+        The rule.
+
+    Raises
+    ------
+    ValueError
+        If the rule doesn't exist or the arguments are not valid.
+    """
+    name, _, arguments = spec.strip().partition('=')
+    if name not in RULES:
+        raise ValueError(f"Unknown rule '{name}', the rules are: {', '.join(sorted(RULES))}.")
+
+    try:
+        values = [int(value) for value in arguments.split('-')] if arguments else []
+        return RULES[name](*values)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid arguments for rule '{name}' [{e}].") from None
+
+
+class RuleSet:
+    """Rules checked together on blocks of games, counting how many games each rule rejects.
+
+    Parameters
+    ----------
+    rules : Sequence[Rule], optional
+        Rules to check, by default None (the `DEFAULT_RULES`).
+    """
+
+    def __init__(self, rules: Optional[Sequence[Rule]] = None):
+        """Initialize the set with the given rules."""
+        if rules is None:
+            rules = [parse_rule(spec) for spec in DEFAULT_RULES]
+
+        self.rules: List[Rule] = list(rules)
+        self.rejections: Dict[str, int] = {rule.name: 0 for rule in self.rules}
+        # Combinations of numbers that break each rule, filled by `valid_numbers`
+        self.exclusions: Dict[str, int] = {}
+
+    @classmethod
+    def from_specs(cls, specs: Sequence[str] = ()) -> 'RuleSet':
+        """Build the default rules plus the rules given by name (see `parse_rule`).
+
+        Parameters
+        ----------
+        specs : Sequence[str], optional
+            Names and arguments of the extra rules, by default ().
+
+        Returns
+        -------
+        RuleSet
+            The set of rules, without repeated rules.
+        """
+        rules: Dict[str, Rule] = {}
+        for spec in (*DEFAULT_RULES, *specs):
+            rule = parse_rule(spec)
+            rules.setdefault(rule.name, rule)
+
+        return cls(list(rules.values()))
+
+    @property
+    def names(self) -> List[str]:
+        """Return the names of the rules."""
+        return [rule.name for rule in self.rules]
+
+    def check(self, candidates: np.ndarray) -> np.ndarray:
+        """Check a block of games against all the rules.
+
+        Parameters
+        ----------
+        candidates : np.ndarray
+            Block of games to be checked, one game per row.
+
+        Returns
+        -------
+        np.ndarray
+            Boolean mask, True for each game that passes all the rules.
+        """
+        mask = np.ones(len(candidates), dtype=bool)
+        for rule in self.rules:
+            passed = rule.check(candidates)
+            self.rejections[rule.name] += len(passed) - int(np.count_nonzero(passed))
+            mask &= passed
+
+        return mask
+
+    @property
+    def numbers_only(self) -> bool:
+        """Check if all the rules only look at the numbers."""
+        return all(rule.numbers_only for rule in self.rules)
+
+    def valid_numbers(self) -> np.ndarray:
+        """Check all possible combinations of numbers against the rules.
+
+        It also counts the combinations that break each rule on `exclusions`.
+
+        Returns
+        -------
+        np.ndarray
+            Boolean mask indexed by the rank of the combination of numbers (see `codec`),
+            True for each combination that passes all the rules.
+
+        Raises
+        ------
+        ValueError
+            If a rule also looks at the stars.
+        """
+        not_numbers_only = [rule.name for rule in self.rules if not rule.numbers_only]
+        if not_numbers_only:
+            raise ValueError(f"Rules that look at the stars can't be checked alone [{', '.join(not_numbers_only)}].")
+
+        numbers = combinations_table(MAX_NUMBER, K_NUMBERS)
+
+        mask = np.ones(len(numbers), dtype=bool)
+        for rule in self.rules:
+            passed = rule.check(numbers)
+            self.exclusions[rule.name] = len(passed) - int(np.count_nonzero(passed))
+            mask &= passed
+
+        return mask
@@ -0,0 +1,524 @@
+"""Module to generate games on a long running process, with the data loaded once.
+
+The draws, their statistics, the ranks of the games drawn and the probabilities of the combinations
+are kept in memory and only loaded again when the database changes, so each request only samples.
+"""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import (
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar
+)
+
+import numpy as np
+
+from codec import (
+    NUMBER_COMBINATIONS,
+    STAR_COMBINATIONS,
+    rank_games,
+    unrank_games
+)
+from constants import (
+    HALF_LIFE_DAYS,
+    K_NUMBERS,
+    K_STARS,
+    WINDOW_DAYS,
+    GameType
+)
+from game_generator import (
+    ConstrainedSampler,
+    NotEnoughGamesError,
+    generate_multiple_games,
+    get_combination_weights,
+    get_stats,
+    get_type_affinities,
+    get_type_probabilities
+)
+from game_rules import RuleSet
+from profiling import (
+    count,
+    stage
+)
+from snapshot import load_snapshot
+from sqlite import (
+    DBFILE,
+    close_connection,
+    get_data_stamp
+)
+
+# Probabilities of the combinations kept for each game type, window and half life (17 MB each)
+WEIGHTS_CACHE_SIZE = 16
+
+# Cumulative probabilities of each game type with each set of rules kept (17 MB each)
+PREPARED_CACHE_SIZE = 16
+
+# Combinations of numbers that pass each set of rules kept (2 MB each)
+RULES_CACHE_SIZE = 16
+
+# Games of a request up to which only the probabilities of their combinations of numbers are corrected,
+# with more games correcting all the probabilities again (`ConstrainedSampler.sample`) is faster
+PREPARED_MAX_GAMES = 10000
+
+_STAR_OFFSETS = np.arange(STAR_COMBINATIONS)
+
+T = TypeVar('T')
+
+
+def _cached(cache: 'OrderedDict[Hashable, T]', key: Hashable, size: int, build: Callable[[], T]) -> T:
+    """Get a value from a cache with the least recently used values dropped, building it if missing."""
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+
+    cache[key] = build()
+    while len(cache) > size:
+        cache.popitem(last=False)
+
+    return cache[key]
+
+
+class DatabaseWatcher:
+    """Detect the changes on the database made by other processes.
+
+    `PRAGMA data_version` changes each time another connection commits to the database,
+    and the size, modification time and inode of the database file (and of its WAL journal)
+    change when the file is written or replaced, e.g. by `database init --overwrite`.
+
+    Parameters
+    ----------
+    filename : pathlib.Path, optional
+        Database file, by default DBFILE.
+    """
+
+    def __init__(self, filename=DBFILE):
+        """Take the state of the database as the state without changes."""
+        self.filename = filename
+        self.connection: Optional[sqlite3.Connection] = None
+        self.state: Optional[Tuple] = None
+        self.changed()
+
+    def _file_state(self) -> Tuple:
+        """Get the inode, size and modification time of the database file and of its journal."""
+        state = []
+        for filename in (self.filename, self.filename.with_name(self.filename.name + '-wal')):
+            try:
+                stat = os.stat(filename)
+                state.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+            except FileNotFoundError:
+                state.append(None)
+
+        return tuple(state)
+
+    def _data_version(self, reopen: bool) -> Optional[int]:
+        """Get the data version of the database, None if the file doesn't exist."""
+        if reopen and self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+        if self.connection is None:
+            if not self.filename.exists():
+                return None
+            # Read only, so a missing file is not created
+            self.connection = sqlite3.connect(f"file:{self.filename}?mode=ro", uri=True)
+
+        try:
+            return self.connection.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            self.connection.close()
+            self.connection = None
+            return None
+
+    def changed(self) -> bool:
+        """Check if the database changed since the last check.
+
+        Returns
+        -------
+        bool
+            True if the data version or the files changed.
+        """
+        file_state = self._file_state()
+        # A file replaced needs a new connection, the old one still reads the old file
+        reopen = self.state is None or file_state[0] != self.state[0][0]
+
+        state = (file_state, self._data_version(reopen))
+        changed = state != self.state
+        self.state = state
+
+        return changed
+
+    def close(self):
+        """Close the connection to the database."""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class PreparedType:
+    """Probabilities of the games of a type that pass the rules and were not drawn, calculated once for many requests.
+
+    A request only corrects the cumulative probabilities of the few combinations of numbers of the games
+    it generated, instead of adding up the probabilities of the 2 million combinations again on each request.
+    The games follow the same distribution as `ConstrainedSampler.sample`, and are the same games with the
+    same random numbers, but for rounding differences.
+
+    Parameters
+    ----------
+    valid_numbers : np.ndarray
+        Boolean mask indexed by the rank of the combination of numbers, True if it passes the rules.
+    number_weights : np.ndarray
+        Probability of each combination of numbers, indexed by rank.
+    star_weights : np.ndarray
+        Probability of each combination of stars, indexed by rank.
+    drawn : ConstrainedSampler
+        Sampler with the games drawn blocked.
+    """
+
+    def __init__(
+        self,
+        valid_numbers: np.ndarray,
+        number_weights: np.ndarray,
+        star_weights: np.ndarray,
+        drawn: ConstrainedSampler
+    ):
+        """Calculate the cumulative probabilities of the combinations of numbers with the games drawn blocked."""
+        self.valid_numbers = valid_numbers
+        self.number_weights = number_weights
+        self.star_weights = star_weights
+        self.star_cdf = np.cumsum(star_weights)
+        self.drawn = drawn
+
+        weights = np.where(valid_numbers, number_weights, 0)
+        blocked = np.unique(drawn.blocked // STAR_COMBINATIONS)
+        weights[blocked] = self.available_weights(drawn, blocked)
+        self.cdf = np.cumsum(weights)
+
+        self.remaining = drawn.remaining(number_weights, star_weights)
+
+    def available_weights(self, sampler: ConstrainedSampler, number_ranks: np.ndarray) -> np.ndarray:
+        """Get the probability of some combinations of numbers times the probability of their stars still available.
+
+        Parameters
+        ----------
+        sampler : ConstrainedSampler
+            Sampler with the games that can't be generated.
+        number_ranks : np.ndarray
+            Ranks of the combinations of numbers.
+
+        Returns
+        -------
+        np.ndarray
+            The probability of each combination of numbers, zero if all its stars were used.
+        """
+        rows = number_ranks[:, None] * STAR_COMBINATIONS + _STAR_OFFSETS
+        blocked = sampler.is_blocked(rows.ravel()).reshape(rows.shape)
+
+        mass = np.where(blocked, self.star_weights, 0).sum(axis=1)
+        used = np.count_nonzero(blocked & (self.star_weights > 0), axis=1)
+
+        weights = np.where(self.valid_numbers[number_ranks], self.number_weights[number_ranks], 0)
+        weights *= np.maximum(self.star_weights.sum() - mass, 0)
+        weights[used >= np.count_nonzero(self.star_weights)] = 0
+
+        return weights
+
+    def _search(self, u: np.ndarray, number_ranks: np.ndarray, corrections: np.ndarray) -> np.ndarray:
+        """Find the combination of numbers of each random value on the cumulative probabilities corrected.
+
+        Between two combinations corrected, the cumulative probabilities are the ones calculated
+        plus the corrections added up so far, so the value is searched on the right segment.
+        """
+        offsets = np.cumsum(corrections)
+        segment = np.searchsorted(self.cdf[number_ranks] + offsets, u, side='right')
+
+        shift = np.r_[0.0, offsets][segment]
+        low = np.r_[-1, number_ranks][segment] + 1
+        high = np.r_[number_ranks, NUMBER_COMBINATIONS - 1][segment]
+
+        return np.clip(np.searchsorted(self.cdf, u - shift, side='right'), low, high)
+
+    def sample_ranks(
+        self,
+        number_of_games: int,
+        sampler: ConstrainedSampler,
+        rng: np.random.Generator
+    ) -> np.ndarray:
+        """Generate games, by rank, that pass the rules, without repeating games drawn or generated.
+
+        Parameters
+        ----------
+        number_of_games : int
+            Number of games to generate.
+        sampler : ConstrainedSampler
+            Sampler with the games drawn and the games generated by the request blocked,
+            the games generated are added to it.
+        rng : np.random.Generator
+            Random number generator.
+
+        Returns
+        -------
+        np.ndarray
+            Ranks of the games generated, in the order they were generated.
+
+        Raises
+        ------
+        NotEnoughGamesError
+            If there are fewer games left than the number of games.
+        """
+        generated = np.setdiff1d(sampler.blocked, self.drawn.blocked, assume_unique=True)
+        number_ranks, star_ranks = np.divmod(generated, STAR_COMBINATIONS)
+        possible = self.valid_numbers[number_ranks] & (self.number_weights[number_ranks] > 0)
+        remaining = self.remaining - int(np.count_nonzero(possible & (self.star_weights[star_ranks] > 0)))
+        if number_of_games > remaining:
+            raise NotEnoughGamesError(
+                f"Only {remaining} games can still be generated following the rules, {number_of_games} requested."
+            )
+
+        ranks = np.empty(0, dtype=np.int64)
+
+        while len(ranks) < number_of_games:
+            # Combinations of numbers with games generated by the request
+            generated = np.setdiff1d(sampler.blocked, self.drawn.blocked, assume_unique=True)
+            number_ranks = np.unique(generated // STAR_COMBINATIONS)
+            corrections = (
+                self.available_weights(sampler, number_ranks) - self.available_weights(self.drawn, number_ranks)
+            )
+
+            # The same steps and random numbers as `ConstrainedSampler.sample_ranks`
+            size = number_of_games - len(ranks)
+            u = rng.random(size) * (self.cdf[-1] + corrections.sum())
+            order = np.argsort(u)
+            chosen = np.empty(size, dtype=np.int64)
+            chosen[order] = self._search(u[order], number_ranks, corrections)
+            star_choice = np.searchsorted(self.star_cdf, rng.random(size) * self.star_cdf[-1], side='right')
+            star_choice = np.minimum(star_choice, STAR_COMBINATIONS - 1)
+
+            candidates = chosen * STAR_COMBINATIONS + star_choice
+
+            # Stars not available for the combination: choose again among the available ones only
+            taken = np.flatnonzero(sampler.is_blocked(candidates))
+            if len(taken):
+                rows = chosen[taken, None] * STAR_COMBINATIONS + _STAR_OFFSETS
+                available = ~sampler.is_blocked(rows.ravel()).reshape(rows.shape)
+                row_cdf = np.cumsum(np.where(available, self.star_weights, 0), axis=1)
+                v = rng.random(len(taken)) * row_cdf[:, -1]
+                candidates[taken] = rows[np.arange(len(taken)), (row_cdf <= v[:, None]).sum(axis=1)]
+
+            # Keep only the first occurrence of games repeated inside the round
+            order = np.argsort(candidates, kind='stable')
+            sorted_candidates = candidates[order]
+            is_first = np.zeros(size, dtype=bool)
+            is_first[order[np.r_[True, sorted_candidates[1:] != sorted_candidates[:-1]]]] = True
+
+            new = candidates[is_first]
+            sampler.block(new)
+            ranks = np.concatenate((ranks, new))
+
+            count("candidates", size)
+            count("candidates_stars_redrawn", len(taken))
+            count("candidates_rejected", size - len(new))
+
+        return ranks
+
+
+class GameService:
+    """Generate games with the draws, the statistics and the probabilities kept in memory.
+
+    The same request generates the same games as the `game` command with the same seed,
+    as long as the games of each type fit on a single batch.
+    The requests can be served by many threads at once.
+    """
+
+    def __init__(self):
+        """Load the draws stored."""
+        self._lock = threading.Lock()
+        self.stamp: Optional[str] = None
+        self.games = np.empty((0, K_NUMBERS + K_STARS), dtype=np.uint8)
+        self.dates = np.empty(0, dtype="datetime64[D]")
+        self.stats: Tuple[np.ndarray, ...] = ()
+        # Sorted ranks of the games drawn, they are never generated
+        self.drawn_ranks = np.empty(0, dtype=np.int64)
+        self.reloads = 0
+
+        self._weights: 'OrderedDict[Hashable, Tuple[np.ndarray, np.ndarray]]' = OrderedDict()
+        self._prepared: 'OrderedDict[Hashable, PreparedType]' = OrderedDict()
+        # Combinations of numbers that pass the rules, combinations excluded by rule and sampler with the games drawn
+        self._rules: 'OrderedDict[Hashable, Tuple[np.ndarray, Dict[str, int], ConstrainedSampler]]' = OrderedDict()
+        # Reloads seen by the connection of each thread
+        self._local = threading.local()
+
+        self.reload()
+
+    def reload(self) -> bool:
+        """Load the draws again if the database changed.
+
+        When the draws loaded before are still the same, only the new draws are added
+        to the games drawn. The probabilities of the combinations are calculated again
+        on the next request (from the files stored, if the frequencies didn't change).
+
+        Returns
+        -------
+        bool
+            True if the database changed.
+        """
+        with self._lock, stage("reload"):
+            # The file may have been replaced, the connection opened before would still read the old one
+            close_connection()
+            self._local.reloads = self.reloads
+            stamp = get_data_stamp()
+            if stamp == self.stamp:
+                return False
+
+            draws, dates = load_snapshot()
+            draws, dates = np.array(draws), np.array(dates)
+
+            loaded = np.isin(dates, self.dates)
+            if np.count_nonzero(loaded) == len(self.dates) and np.array_equal(draws[loaded], self.games):
+                self.drawn_ranks = np.union1d(self.drawn_ranks, rank_games(draws[~loaded]))
+            else:
+                self.drawn_ranks = np.unique(rank_games(draws))
+
+            self.games, self.dates = draws, dates
+            self.stats = get_stats()
+            self._weights.clear()
+            self._prepared.clear()
+            self._rules.clear()
+            self.stamp = stamp
+            self.reloads += 1
+            self._local.reloads = self.reloads
+
+        return True
+
+    def _reconnect(self):
+        """Open a new connection on the current thread if the draws were loaded again since its last request.
+
+        The database file may have been replaced, and a connection opened before still reads the old file.
+        """
+        if getattr(self._local, 'reloads', None) != self.reloads:
+            close_connection()
+            self._local.reloads = self.reloads
+
+    def _prepare_rules(self, rules: RuleSet) -> Tuple[np.ndarray, Dict[str, int], ConstrainedSampler]:
+        """Find the combinations of numbers that pass the rules and block the games drawn."""
+        valid_numbers = rules.valid_numbers()
+        drawn = ConstrainedSampler(valid_numbers)
+        drawn.block(self.drawn_ranks)
+
+        return valid_numbers, dict(rules.exclusions), drawn
+
+    def _get_weights(
+        self,
+        game_types: Sequence[GameType],
+        window: int,
+        half_life: float
+    ) -> Dict[GameType, Tuple[np.ndarray, np.ndarray]]:
+        """Get the probabilities of the combinations of each game type, calculating the missing ones."""
+        keys = {gt: (gt, window, half_life) for gt in game_types}
+        missing = [gt for gt, key in keys.items() if key not in self._weights]
+
+        computed = {}
+        if missing:
+            nums, _, _, stars, _, _ = self.stats
+            with stage("probabilities"):
+                probabilities = get_type_probabilities(missing, self.stats, window, half_life)
+                affinities = get_type_affinities(missing, nums, stars)
+            with stage("weights"):
+                computed = get_combination_weights(nums, stars, probabilities, affinities)
+
+        return {
+            gt: _cached(self._weights, key, WEIGHTS_CACHE_SIZE, lambda: computed[key[0]])
+            for gt, key in keys.items()
+        }
+
+    def generate(
+        self,
+        game_types: Sequence[GameType],
+        number_of_games: int,
+        rules: Optional[RuleSet] = None,
+        seed: Optional[int] = None,
+        window: int = WINDOW_DAYS,
+        half_life: float = HALF_LIFE_DAYS
+    ) -> List[Tuple[GameType, np.ndarray]]:
+        """Generate multiple games based on type (see `game_generator.generate_multiple_games`).
+
+        Parameters
+        ----------
+        game_types : Sequence[GameType]
+            List of game types to be generated.
+        number_of_games : int
+            Number of games to generate for each game type.
+        rules : Optional[RuleSet], optional
+            Rules to check, the combinations excluded by each rule are set on it, by default None (the default rules).
+        seed : Optional[int], optional
+            Seed of the random streams, by default None (a new seed).
+        window : int, optional
+            Days before the last draw used by the recent frequency types, by default WINDOW_DAYS.
+        half_life : float, optional
+            Days for the weight of a draw to halve on the decayed frequency types, by default HALF_LIFE_DAYS.
+
+        Returns
+        -------
+        List[Tuple[GameType, np.ndarray]]
+            List of games generated grouped by type.
+
+        Raises
+        ------
+        NotEnoughGamesError
+            If there are fewer games left that pass the rules than the number of games.
+        """
+        rules = rules or RuleSet()
+        if number_of_games <= 0 or not rules.numbers_only:
+            # Rules that look at the stars are checked on blocks of candidates, nothing to keep
+            with self._lock:
+                self._reconnect()
+            return generate_multiple_games(list(game_types), number_of_games, rules, seed, 1, window, half_life)
+
+        rules_key = tuple(rules.names)
+        with self._lock:
+            self._reconnect()
+            with stage("rules"):
+                valid_numbers, exclusions, drawn = _cached(
+                    self._rules, rules_key, RULES_CACHE_SIZE, lambda: self._prepare_rules(rules)
+                )
+
+            missing = [gt for gt in game_types if (gt, window, half_life, rules_key) not in self._prepared]
+            weights = self._get_weights(missing, window, half_life)
+            with stage("weights"):
+                prepared = {
+                    gt: _cached(
+                        self._prepared, (gt, window, half_life, rules_key), PREPARED_CACHE_SIZE,
+                        lambda: PreparedType(valid_numbers, *weights[gt], drawn)
+                    )
+                    for gt in game_types
+                }
+
+        rules.exclusions.update(exclusions)
+
+        sampler = ConstrainedSampler(valid_numbers)
+        sampler.block(drawn.blocked)
+
+        # The same streams as `iter_multiple_games`, one for each game type
+        seeds = np.random.SeedSequence(seed).spawn(len(game_types))
+
+        results = []
+        for gt, type_seed in zip(game_types, seeds):
+            rng = np.random.default_rng(type_seed)
+            generated = len(sampler.blocked) - len(drawn.blocked)
+
+            with stage("sampling"):
+                if generated + number_of_games <= PREPARED_MAX_GAMES:
+                    batch = unrank_games(prepared[gt].sample_ranks(number_of_games, sampler, rng))
+                else:
+                    batch = sampler.sample(number_of_games, prepared[gt].number_weights, prepared[gt].star_weights, rng)
+
+            count("games_generated", len(batch))
+            results.append((gt, batch))
+
+        return results
@@ -0,0 +1,183 @@
+"""Module to measure where the time of a command goes.
+
+The stages add up their time and their number of calls, and the counters add up values,
+e.g. the games generated or the bytes read from the server. Profiling is disabled by default:
+then `stage` returns a shared context manager that does nothing and `count` returns at once,
+so the code measured only pays a function call.
+
+It only imports the standard library, so the commands can enable it before loading numpy.
+"""
+import json
+import pathlib
+import threading
+import time
+from contextlib import (
+    contextmanager,
+    nullcontext
+)
+from typing import (
+    Any,
+    ContextManager,
+    Dict,
+    Iterator,
+    Optional
+)
+
+# Context manager of the stages when profiling is disabled
+_NO_STAGE = nullcontext()
+
+
+class Profiler:
+    """Time of each stage and value of each counter of a run.
+
+    The stages and the counters can be updated by many threads,
+    the time of a stage is then the time added up by all threads.
+    """
+
+    def __init__(self):
+        """Start the clock of the run."""
+        self.started = time.perf_counter()
+        # Seconds, number of calls and longest call of each stage
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Measure the time of a block of code as a stage.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage, the time of all blocks with the same name is added up.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float):
+        """Add the time of a call to a stage.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage.
+        seconds : float
+            Time of the call.
+        """
+        with self._lock:
+            stage = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0, 'max_seconds': 0.0})
+            stage['seconds'] += seconds
+            stage['calls'] += 1
+            stage['max_seconds'] = max(stage['max_seconds'], seconds)
+
+    def count(self, name: str, value: float = 1):
+        """Add a value to a counter.
+
+        Parameters
+        ----------
+        name : str
+            Name of the counter.
+        value : float, optional
+            Value to be added, by default 1.
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self) -> Dict[str, Any]:
+        """Get the time of the run, of each stage and the counters.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The report, with the stages and the counters sorted by name.
+        """
+        with self._lock:
+            return {
+                'total_seconds': time.perf_counter() - self.started,
+                'stages': {name: dict(self.stages[name]) for name in sorted(self.stages)},
+                'counters': {name: self.counters[name] for name in sorted(self.counters)}
+            }
+
+
+# Profiler of the running command, None when profiling is disabled
+_profiler: Optional[Profiler] = None
+
+
+def enable() -> Profiler:
+    """Start profiling the running command.
+
+    Returns
+    -------
+    Profiler
+        The profiler that collects the stages and the counters.
+    """
+    global _profiler
+    _profiler = Profiler()
+    return _profiler
+
+
+def disable():
+    """Stop profiling."""
+    global _profiler
+    _profiler = None
+
+
+def is_enabled() -> bool:
+    """Check if profiling is enabled."""
+    return _profiler is not None
+
+
+def stage(name: str) -> ContextManager[None]:
+    """Measure the time of a block of code as a stage, if profiling is enabled.
+
+    Parameters
+    ----------
+    name : str
+        Name of the stage.
+
+    Returns
+    -------
+    ContextManager[None]
+        Context manager around the block of code.
+    """
+    if _profiler is None:
+        return _NO_STAGE
+    return _profiler.stage(name)
+
+
+def count(name: str, value: float = 1):
+    """Add a value to a counter, if profiling is enabled.
+
+    Parameters
+    ----------
+    name : str
+        Name of the counter.
+    value : float, optional
+        Value to be added, by default 1.
+    """
+    if _profiler is not None:
+        _profiler.count(name, value)
+
+
+def write_report(filename: pathlib.Path, command: str):
+    """Write the report of the profiler as JSON and stop profiling.
+
+    Parameters
+    ----------
+    filename : pathlib.Path
+        File to be written.
+    command : str
+        Name of the command profiled.
+    """
+    if _profiler is None:
+        return
+
+    report = {'command': command, **_profiler.report()}
+    disable()
+
+    with open(filename, 'w') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
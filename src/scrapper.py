@@ -1,31 +1,508 @@
 """Module to extrac Euromillions result."""
-from datetime import date
-from urllib.request import urlopen
+import hashlib
+import http.client
+import importlib.util
+import json
+import os
+import pathlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor
+)
+from datetime import (
+    date,
+    timedelta
+)
+from html.parser import HTMLParser
 from typing import (
     Any,
+    Deque,
     Dict,
-    Optional
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple
+)
+from urllib.parse import (
+    urljoin,
+    urlsplit
 )
 
-import numpy as np
-import pandas as pd
 import typer
-from bs4 import BeautifulSoup
+
+from profiling import (
+    count,
+    stage
+)
 
 BALLS_DIV_ID = "ballsDrawn"
+PRIZES_TABLE_CLASSES = {"table", "breakdown", "mobFormat"}
+
+# Number of characters of the page sent to the parser at once
+PARSER_CHUNK_SIZE = 8192
+
+# lxml is optional, it is faster than the standard library parser
+HAS_LXML = importlib.util.find_spec("lxml") is not None
 
 
 # Euromillions main URL for scrapy the results
 EURO_MAIN_URL = "https://www.euro-millions.com/results/"
 
+# HTTP status that are worth trying again
+RETRY_STATUS = {429, 500, 502, 503, 504}
+REDIRECT_STATUS = {301, 302, 303, 307, 308}
+MAX_REDIRECTS = 5
+
+# Folder with the web pages already read, relative to the working directory like the database
+CACHE_DIR = pathlib.Path("cache")
+
+# Results are final some days after the draw, pages read after that never change
+FINAL_AFTER = timedelta(days=7)
+
+# Seconds a page of a recent draw is used before asking the server if it changed
+RECENT_TTL = 3600
+
+
+class FetchError(Exception):
+    """Error raised when a web page can't be read."""
+
+
+class RateLimiter:
+    """Limit the number of requests per second shared by many threads.
+
+    Parameters
+    ----------
+    rate : Optional[float]
+        Maximum number of requests per second, None or 0 means no limit.
+    """
+
+    def __init__(self, rate: Optional[float] = None):
+        """Initialize the limiter with the given rate."""
+        self.interval = 1 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until a new request is allowed."""
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+
+        if start > now:
+            time.sleep(start - now)
+
+
+class HttpSession:
+    """HTTP client that keeps connections alive and reuses them.
+
+    Each thread has its own connection to each host,
+    so the session can be shared by the threads of a pool.
+
+    Parameters
+    ----------
+    rate_limit : Optional[float], optional
+        Maximum number of requests per second for all threads, by default None (no limit).
+    retries : int, optional
+        Number of times to try again a failed request, by default 3.
+    backoff : float, optional
+        Seconds to wait before the first retry, it doubles on each retry, by default 0.5.
+    timeout : float, optional
+        Seconds to wait for the server, by default 30.
+    """
+
+    def __init__(self, rate_limit: Optional[float] = None, retries: int = 3, backoff: float = 0.5, timeout: float = 30):
+        """Initialize the session."""
+        self.limiter = RateLimiter(rate_limit)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        """Get the connection of the current thread to a host."""
+        connections = self._local.__dict__.setdefault('connections', {})
+        key = (scheme, netloc)
+        if key not in connections:
+            cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            connections[key] = cls(netloc, timeout=self.timeout)
+
+        return connections[key]
+
+    def _drop_connection(self, scheme: str, netloc: str):
+        """Close the connection of the current thread to a host."""
+        connection = self._local.__dict__.get('connections', {}).pop((scheme, netloc), None)
+        if connection is not None:
+            connection.close()
+
+    def _request(self, url: str, headers: Dict[str, str]) -> Tuple[int, http.client.HTTPMessage, bytes]:
+        """Make one GET request and return the status, the response headers and the body."""
+        parts = urlsplit(url)
+        path = parts.path + ('?' + parts.query if parts.query else '')
+
+        with stage("http_wait_rate_limit"):
+            self.limiter.wait()
+        connection = self._connection(parts.scheme, parts.netloc)
+        try:
+            with stage("http_request"):
+                connection.request(
+                    'GET', path or '/',
+                    headers={'User-Agent': 'euromillions', 'Connection': 'keep-alive', **headers}
+                )
+                response = connection.getresponse()
+                body = response.read()
+        except (http.client.HTTPException, OSError):
+            self._drop_connection(parts.scheme, parts.netloc)
+            count("http_errors")
+            raise
+
+        count("http_requests")
+        count("http_bytes", len(body))
+
+        if response.will_close:
+            self._drop_connection(parts.scheme, parts.netloc)
+
+        return response.status, response.msg, body
+
+    def fetch(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, bytes, http.client.HTTPMessage]:
+        """Read a web page, following redirects and trying again on failures.
+
+        Parameters
+        ----------
+        url : str
+            Address of the web page.
+        headers : Optional[Dict[str, str]], optional
+            Extra request headers, e.g. for conditional requests, by default None.
+
+        Returns
+        -------
+        Tuple[int, bytes, http.client.HTTPMessage]
+            Status (200, or 304 when the page didn't change), content and headers of the response.
+
+        Raises
+        ------
+        FetchError
+            If the page can't be read after all the retries.
+        """
+        attempt = 0
+        redirects = 0
+        while True:
+            try:
+                status, response_headers, body = self._request(url, headers or {})
+            except (http.client.HTTPException, OSError) as e:
+                error = FetchError(repr(e))
+            else:
+                if status in (200, 304):
+                    return status, body, response_headers
+
+                location = response_headers.get('Location')
+                if status in REDIRECT_STATUS and location and redirects < MAX_REDIRECTS:
+                    url = urljoin(url, location)
+                    redirects += 1
+                    continue
+
+                error = FetchError(f"HTTP Error {status}")
+                if status not in RETRY_STATUS:
+                    raise error
 
-def get_euro_millions_result(draw_date: date) -> Optional[Dict[str, Any]]:
+            if attempt >= self.retries:
+                raise error
+
+            time.sleep(self.backoff * 2 ** attempt)
+            attempt += 1
+            count("http_retries")
+
+    def get(self, url: str) -> bytes:
+        """Read a web page, following redirects and trying again on failures.
+
+        Parameters
+        ----------
+        url : str
+            Address of the web page.
+
+        Returns
+        -------
+        bytes
+            Content of the web page.
+
+        Raises
+        ------
+        FetchError
+            If the page can't be read after all the retries.
+        """
+        status, body, _ = self.fetch(url)
+        if status != 200:
+            raise FetchError(f"HTTP Error {status}")
+
+        return body
+
+
+class PageCache:
+    """Results web pages stored on disk.
+
+    The content of the pages is stored by its SHA-256 hash, so identical pages are stored once,
+    and an index file for each draw date keeps the hash, the address, the validators
+    (ETag and Last-Modified) and the time the page was read.
+
+    Pages read when the result was already final never expire.
+    Pages of recent draws are used for `ttl` seconds and then checked with the server
+    by a conditional request, a `304 Not Modified` answer keeps the stored page.
+
+    Parameters
+    ----------
+    directory : pathlib.Path, optional
+        Folder of the cache, by default CACHE_DIR.
+    ttl : float, optional
+        Seconds a page of a recent draw is used without checking it, by default RECENT_TTL.
+    offline : bool, optional
+        Only use the stored pages and never read from the server, by default False.
+    """
+
+    def __init__(self, directory: pathlib.Path = CACHE_DIR, ttl: float = RECENT_TTL, offline: bool = False):
+        """Initialize the cache on the given folder."""
+        self.directory = pathlib.Path(directory)
+        self.ttl = ttl
+        self.offline = offline
+
+    def _blob_path(self, digest: str) -> pathlib.Path:
+        """Get the file with the content of a page."""
+        return self.directory / "objects" / digest[:2] / digest
+
+    def _index_path(self, draw_date: date) -> pathlib.Path:
+        """Get the index file of a draw date."""
+        return self.directory / "index" / f"{draw_date:%Y-%m-%d}.json"
+
+    @staticmethod
+    def _write(path: pathlib.Path, data: bytes):
+        """Write a file atomically, so other threads and processes never read half of it."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def lookup(self, draw_date: date) -> Optional[Dict[str, Any]]:
+        """Get the index entry of a draw date.
+
+        Parameters
+        ----------
+        draw_date : date
+            Euromillions draw date.
+
+        Returns
+        -------
+        Optional[Dict[str, Any]]
+            Hash, address, validators and time the page was read.
+            Returns None if the page is not stored.
+        """
+        try:
+            entry = json.loads(self._index_path(draw_date).read_text())
+        except (OSError, ValueError):
+            return None
+
+        return entry if self._blob_path(entry['sha256']).exists() else None
+
+    def read(self, entry: Dict[str, Any]) -> bytes:
+        """Read the content of a stored page."""
+        return self._blob_path(entry['sha256']).read_bytes()
+
+    def store(
+        self,
+        draw_date: date,
+        url: str,
+        page: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Store a page read from the server.
+
+        Parameters
+        ----------
+        draw_date : date
+            Euromillions draw date.
+        url : str
+            Address of the page.
+        page : bytes
+            Content of the page.
+        etag : Optional[str], optional
+            ETag header of the response, by default None.
+        last_modified : Optional[str], optional
+            Last-Modified header of the response, by default None.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The new index entry.
+        """
+        digest = hashlib.sha256(page).hexdigest()
+        blob = self._blob_path(digest)
+        if not blob.exists():
+            self._write(blob, page)
+
+        entry = {
+            'sha256': digest,
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched': time.time()
+        }
+        self._write(self._index_path(draw_date), json.dumps(entry).encode())
+
+        return entry
+
+    def is_fresh(self, draw_date: date, entry: Dict[str, Any]) -> bool:
+        """Check if a stored page can be used without asking the server.
+
+        Parameters
+        ----------
+        draw_date : date
+            Euromillions draw date.
+        entry : Dict[str, Any]
+            Index entry of the page.
+
+        Returns
+        -------
+        bool
+            True if the page was read when the result was final or less than `ttl` seconds ago.
+        """
+        if date.fromtimestamp(entry['fetched']) - draw_date >= FINAL_AFTER:
+            return True
+
+        return time.time() - entry['fetched'] < self.ttl
+
+    def fetch(self, session: HttpSession, draw_date: date, url: str) -> bytes:
+        """Get the page of a draw from the cache or from the server.
+
+        Parameters
+        ----------
+        session : HttpSession
+            Session used to read from the server.
+        draw_date : date
+            Euromillions draw date.
+        url : str
+            Address of the page.
+
+        Returns
+        -------
+        bytes
+            Content of the page.
+
+        Raises
+        ------
+        FetchError
+            If the page can't be read, or it is not stored when offline.
+        """
+        entry = self.lookup(draw_date)
+        if entry is not None and entry['url'] != url:
+            entry = None
+
+        if entry is not None and (self.offline or self.is_fresh(draw_date, entry)):
+            count("cache_hits")
+            return self.read(entry)
+
+        if self.offline:
+            raise FetchError(f"Page not found on cache [{url}]")
+
+        headers = {}
+        if entry is not None and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry is not None and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        status, page, response_headers = session.fetch(url, headers)
+        if status == 304:
+            if entry is None:
+                raise FetchError("HTTP Error 304")
+
+            page = self.read(entry)
+            count("cache_not_modified")
+
+        self.store(
+            draw_date, url, page,
+            response_headers.get('ETag') or (entry or {}).get('etag'),
+            response_headers.get('Last-Modified') or (entry or {}).get('last_modified')
+        )
+
+        return page
+
+
+def result_url(draw_date: date, base_url: str = EURO_MAIN_URL) -> str:
+    """Build the address of the web page with the result of a draw.
+
+    Parameters
+    ----------
+    draw_date : date
+        Euromillions draw date.
+    base_url : str, optional
+        Main address of the results, by default EURO_MAIN_URL.
+
+    Returns
+    -------
+    str
+        Address of the web page.
+    """
+    return base_url + '{:%d-%m-%Y}'.format(draw_date)
+
+
+def fetch_result_page(
+    draw_date: date,
+    session: HttpSession,
+    base_url: str = EURO_MAIN_URL,
+    cache: Optional[PageCache] = None
+) -> bytes:
+    """Read the web page with the result of a draw.
+
+    Parameters
+    ----------
+    draw_date : date
+        Euromillions draw date.
+    session : HttpSession
+        Session used to read from the server.
+    base_url : str, optional
+        Main address of the results, by default EURO_MAIN_URL.
+    cache : Optional[PageCache], optional
+        Pages stored on disk, by default None (always read from the server).
+
+    Returns
+    -------
+    bytes
+        Content of the web page.
+    """
+    url = result_url(draw_date, base_url)
+    if cache is None:
+        return session.get(url)
+
+    return cache.fetch(session, draw_date, url)
+
+
+def get_euro_millions_result(
+    draw_date: date,
+    session: Optional[HttpSession] = None,
+    base_url: str = EURO_MAIN_URL,
+    cache: Optional[PageCache] = None
+) -> Optional[Dict[str, Any]]:
     """Extract the result from a web page.
 
     Parameters
     ----------
     draw_date : date
         Euromillions draw date.
+    session : Optional[HttpSession], optional
+        Session to reuse connections, by default None (a new session).
+    base_url : str, optional
+        Main address of the results, by default EURO_MAIN_URL.
+    cache : Optional[PageCache], optional
+        Pages stored on disk, by default None (always read from the server).
 
     Returns
     -------
@@ -33,9 +510,9 @@ def get_euro_millions_result(draw_date: date) -> Optional[Dict[str, Any]]:
         Numbers drawn where the last two are the star numbers.
         Number of winners and main prize value.
     """
-    url = EURO_MAIN_URL + '{:%d-%m-%Y}'.format(draw_date)
+    session = session or HttpSession(retries=0)
     try:
-        page = urlopen(url)
+        page = fetch_result_page(draw_date, session, base_url, cache)
     except Exception as e:
         typer.echo(
             typer.style("ERROR: ", fg=typer.colors.RED, bold=True) +
@@ -43,45 +520,282 @@ def get_euro_millions_result(draw_date: date) -> Optional[Dict[str, Any]]:
         )
         return None
 
-    soup = BeautifulSoup(page, 'html.parser')
-    balls = soup.find('div', {'id': BALLS_DIV_ID})
-    if balls is None:
+    return parse_result_page(page)
+
+
+class ResultPageTarget:
+    """Collect the balls drawn and the prize table while a parser reads a results web page.
+
+    It follows the parser target interface of lxml (start, end, data and close),
+    so it works with lxml and, through `_StdlibPageParser`, with the standard library parser.
+    The page is read in a single pass and nothing else is kept in memory.
+    """
+
+    def __init__(self):
+        """Initialize an empty result."""
+        self.found_balls = False
+        self.numbers: List[int] = []
+        self.stars: List[int] = []
+
+        self.found_prizes = False
+        self.prize_row: Optional[List[str]] = None
+
+        # Depth of the div tags inside the balls div, zero when outside of it
+        self._balls_depth = 0
+        self._ball_kind: Optional[str] = None
+        self._in_prizes = False
+        self._row: Optional[List[str]] = None
+        self._row_has_data = False
+        self._text: Optional[List[str]] = None
+
+    def start(self, tag: str, attrib: Dict[str, str]):
+        """Handle an opening tag."""
+        if self._balls_depth:
+            if tag == 'div':
+                self._balls_depth += 1
+            elif tag == 'li':
+                classes = (attrib.get('class') or '').split()
+                self._ball_kind = classes[1] if len(classes) > 1 else None
+                self._text = []
+        elif tag == 'div' and attrib.get('id') == BALLS_DIV_ID and not self.found_balls:
+            self.found_balls = True
+            self._balls_depth = 1
+        elif tag == 'table' and not self.found_prizes:
+            if PRIZES_TABLE_CLASSES <= set((attrib.get('class') or '').split()):
+                self.found_prizes = True
+                self._in_prizes = True
+        elif self._in_prizes and self.prize_row is None:
+            if tag == 'tr':
+                self._row = []
+                self._row_has_data = False
+            elif tag in ('td', 'th') and self._row is not None:
+                self._text = []
+                self._row_has_data = self._row_has_data or tag == 'td'
+
+    def data(self, text: str):
+        """Handle the text inside a tag."""
+        if self._text is not None:
+            self._text.append(text)
+
+    def end(self, tag: str):
+        """Handle a closing tag."""
+        if self._balls_depth:
+            if tag == 'li' and self._text is not None:
+                value = ''.join(self._text).strip()
+                if value.isdigit() and self._ball_kind == 'ball':
+                    self.numbers.append(int(value))
+                elif value.isdigit() and self._ball_kind == 'lucky-star':
+                    self.stars.append(int(value))
+                self._text = None
+            elif tag == 'div':
+                self._balls_depth -= 1
+        elif self._in_prizes:
+            if tag in ('td', 'th') and self._text is not None and self._row is not None:
+                self._row.append(' '.join(''.join(self._text).split()))
+                self._text = None
+            elif tag == 'tr' and self._row is not None:
+                # The first row with data cells, the header only has th cells
+                if self._row_has_data:
+                    self.prize_row = self._row
+                self._row = None
+            elif tag == 'table':
+                self._in_prizes = False
+
+    @property
+    def done(self) -> bool:
+        """Check if everything needed was found, so the rest of the page can be skipped."""
+        return self.found_balls and not self._balls_depth and self.prize_row is not None
+
+    def close(self) -> 'ResultPageTarget':
+        """Finish the parsing."""
+        return self
+
+
+class _StdlibPageParser(HTMLParser):
+    """Standard library HTML parser that sends the events to a `ResultPageTarget`."""
+
+    def __init__(self, target: ResultPageTarget):
+        """Initialize the parser with the target."""
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        """Handle an opening tag."""
+        self.target.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        """Handle a self closing tag."""
+        self.target.start(tag, dict(attrs))
+        self.target.end(tag)
+
+    def handle_endtag(self, tag: str):
+        """Handle a closing tag."""
+        self.target.end(tag)
+
+    def handle_data(self, data: str):
+        """Handle the text inside a tag."""
+        self.target.data(data)
+
+
+def _parse_winners(text: str) -> int:
+    """Read the number of winners, zero when there is no number (e.g. rollover)."""
+    value = text.replace(',', '')
+    return int(value) if value.isdigit() else 0
+
+
+def read_result_page(page: bytes, use_lxml: Optional[bool] = None) -> ResultPageTarget:
+    """Read a results web page in a single pass.
+
+    Parameters
+    ----------
+    page : bytes
+        Content of the web page.
+    use_lxml : Optional[bool], optional
+        Use the lxml parser, by default None (use it if it is installed).
+
+    Returns
+    -------
+    ResultPageTarget
+        The balls drawn and the prize table found on the page.
+    """
+    text = page.decode('utf-8', errors='replace') if isinstance(page, bytes) else page
+    target = ResultPageTarget()
+
+    if use_lxml is None:
+        use_lxml = HAS_LXML
+
+    if use_lxml:
+        from lxml import etree
+
+        parser = etree.HTMLParser(target=target)
+    else:
+        parser = _StdlibPageParser(target)
+
+    # Stop reading the page as soon as the balls and the prizes are found
+    for start in range(0, len(text), PARSER_CHUNK_SIZE):
+        parser.feed(text[start:start + PARSER_CHUNK_SIZE])
+        if target.done:
+            return target
+
+    parser.close()
+    return target
+
+
+def parse_result_page(page: bytes, use_lxml: Optional[bool] = None) -> Optional[Dict[str, Any]]:
+    """Extract the result from the content of a web page.
+
+    Parameters
+    ----------
+    page : bytes
+        Content of the web page.
+    use_lxml : Optional[bool], optional
+        Use the lxml parser, by default None (use it if it is installed).
+
+    Returns
+    -------
+    Optional[Dict[str, Any]]
+        Numbers drawn where the last two are the star numbers.
+        Number of winners and main prize value.
+    """
+    with stage("parse"):
+        target = read_result_page(page, use_lxml)
+    if not target.found_balls:
         typer.echo(
             typer.style("ERROR: ", fg=typer.colors.RED, bold=True) +
-            f"Unable do find results on web page."
+            "Unable do find results on web page."
         )
         return None
 
-    numbers = []
-    stars = []
-    for li in balls.findAll('li'):
-        if li.attrs['class'][1] == 'ball':
-            numbers.append(int(li.getText()))
-        elif li.attrs['class'][1] == 'lucky-star':
-            stars.append(int(li.getText()))
+    draw = tuple(target.numbers) + tuple(target.stars)
 
-    prizes = soup.find('table', {'class': "table breakdown mobFormat"})
-    if prizes is None:
+    if not target.found_prizes:
         typer.echo(
             typer.style("WARNING: ", fg=typer.colors.YELLOW, bold=True) +
-            f"Unable do find prize and winners on web page."
+            "Unable do find prize and winners on web page."
         )
-        return {'draw': tuple(numbers) + tuple(stars)}
+        return {'draw': draw}
 
     try:
-        df = pd.read_html(str(prizes), flavor='bs4')[0]
+        if target.prize_row is None:
+            raise ValueError("the prize table has no rows")
 
-        main_prize = int(float(df.iloc[0][1][1:].replace(',', '')))
-        winners = 0 if type(df.iloc[0][4]) != np.int64 else int(df.iloc[0][4])
+        # The prize value starts with the currency symbol
+        main_prize = int(float(target.prize_row[1][1:].replace(',', '')))
+        winners = _parse_winners(target.prize_row[4])
     except Exception as e:
         typer.echo(
             typer.style("WARNING: ", fg=typer.colors.YELLOW, bold=True) +
             f"Unable do find prize and winners on web page [{repr(e)}]."
         )
-        return {'draw': tuple(numbers) + tuple(stars)}
+        return {'draw': draw}
 
     return {
-        'draw': tuple(numbers) + tuple(stars),
+        'draw': draw,
         'winners': winners,
         'prize': main_prize
     }
+
+
+def fetch_euro_millions_results(
+    draw_dates: Iterable[date],
+    workers: int = 4,
+    rate_limit: Optional[float] = None,
+    retries: int = 3,
+    base_url: str = EURO_MAIN_URL,
+    cache: Optional[PageCache] = None
+) -> Iterator[Tuple[date, Optional[Dict[str, Any]], Optional[str]]]:
+    """Extract the results of many draws using a pool of threads, telling the pages not read apart.
+
+    The web pages are read by the threads while the caller parses and consumes
+    the results, so the network, the parsing and the caller work overlap.
+    The results are yielded in the same order of the dates.
+
+    Parameters
+    ----------
+    draw_dates : Iterable[date]
+        Euromillions draw dates.
+    workers : int, optional
+        Maximum number of threads reading web pages at the same time, by default 4.
+    rate_limit : Optional[float], optional
+        Maximum number of requests per second, by default None (no limit).
+    retries : int, optional
+        Number of times to try again a failed request, by default 3.
+    base_url : str, optional
+        Main address of the results, by default EURO_MAIN_URL.
+    cache : Optional[PageCache], optional
+        Pages stored on disk, by default None (always read from the server).
+
+    Yields
+    ------
+    Iterator[Tuple[date, Optional[Dict[str, Any]], Optional[str]]]
+        The draw date, its result (see `get_euro_millions_result`), None if the page has no result,
+        and the error if the page couldn't be read, otherwise None.
+    """
+    session = HttpSession(rate_limit=rate_limit, retries=retries)
+    pending: Deque[Tuple[date, Future]] = deque()
+
+    def next_result() -> Tuple[date, Optional[Dict[str, Any]], Optional[str]]:
+        dt, future = pending.popleft()
+        try:
+            # Time the caller waits for the pages read by the threads
+            with stage("fetch_wait"):
+                page = future.result()
+        except Exception as e:
+            typer.echo(
+                typer.style("ERROR: ", fg=typer.colors.RED, bold=True) +
+                f"Unable do read web page with results [{repr(e)}]."
+            )
+            return dt, None, repr(e)
+
+        return dt, parse_result_page(page), None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for draw_date in draw_dates:
+            pending.append((draw_date, executor.submit(fetch_result_page, draw_date, session, base_url, cache)))
+
+            # Keep a bounded number of pages in flight
+            if len(pending) >= 2 * workers:
+                yield next_result()
+
+        while pending:
+            yield next_result()
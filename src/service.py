@@ -0,0 +1,569 @@
+"""Module with the command to serve the generation of games over HTTP, with the data kept in memory.
+
+The draws, the statistics and the probabilities of the combinations are loaded once (see `game_service`)
+and loaded again only when the database changes, so each request only samples its games.
+
+Endpoints:
+    GET /status             Draws loaded and requests served.
+    GET /games?type=...     Generate games, with the parameters on the query string.
+    POST /games             Generate games, with the parameters on a JSON object.
+
+The parameters are the options of the `game` command: `type` and `rule` (one value or a list),
+`games` (number of games of each type), `seed`, `window`, `half_life` and `format` (json, csv or ndjson).
+"""
+import asyncio
+import io
+import json
+import pathlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple
+)
+from urllib.parse import (
+    parse_qs,
+    urlsplit
+)
+
+import typer
+
+from constants import (
+    HALF_LIFE_DAYS,
+    WINDOW_DAYS,
+    GameType,
+    OutputFormat
+)
+
+# Largest request line, header line and body accepted
+MAX_LINE_SIZE = 8 * 1024
+MAX_HEADERS = 100
+MAX_BODY_SIZE = 64 * 1024
+
+# Formats written as by the `game` command, the default format is a JSON object
+CONTENT_TYPES = {
+    OutputFormat.csv.value: "text/csv; charset=utf-8",
+    OutputFormat.ndjson.value: "application/x-ndjson",
+}
+JSON_CONTENT_TYPE = "application/json"
+
+
+class RequestError(Exception):
+    """Error raised when a request can't be served, with the HTTP status of the answer."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        """Keep the status of the answer."""
+        super().__init__(message)
+        self.status = status
+
+
+def _single(params: Dict[str, Any], name: str, default: Any, cast: type) -> Any:
+    """Get a parameter with a single value, the last one if it was given many times."""
+    value = params.get(name, default)
+    if isinstance(value, list):
+        value = value[-1] if value else default
+    if value is None or value is default:
+        return value
+
+    try:
+        # JSON booleans are ints, but not valid numbers here
+        if isinstance(value, bool):
+            raise ValueError
+        return cast(value)
+    except (TypeError, ValueError):
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid value for '{name}': {value!r}.")
+
+
+def _multiple(params: Dict[str, Any], name: str) -> List[str]:
+    """Get a parameter that can have many values."""
+    value = params.get(name, [])
+    values = value if isinstance(value, list) else [value]
+    if not all(isinstance(v, str) for v in values):
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid value for '{name}': {value!r}.")
+
+    return values
+
+
+def parse_games_request(params: Dict[str, Any], max_games: int) -> Dict[str, Any]:
+    """Validate the parameters of a request of games.
+
+    Parameters
+    ----------
+    params : Dict[str, Any]
+        Parameters of the query string (lists of values) or of the JSON object.
+    max_games : int
+        Largest number of games of each type.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The arguments of `GameService.generate` plus the format of the games (None for JSON).
+
+    Raises
+    ------
+    RequestError
+        If a parameter is unknown or has an invalid value.
+    """
+    unknown = sorted(set(params) - {'type', 'rule', 'games', 'seed', 'window', 'half_life', 'format'})
+    if unknown:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Unknown parameters: {', '.join(unknown)}.")
+
+    try:
+        game_types = [GameType(value) for value in _multiple(params, 'type')]
+    except ValueError as e:
+        raise RequestError(HTTPStatus.BAD_REQUEST, str(e))
+
+    output_format = _single(params, 'format', 'json', str)
+    if output_format not in ('json', *CONTENT_TYPES):
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid value for 'format': {output_format!r}.")
+
+    request = {
+        'game_types': game_types or [GameType.random, GameType.high_frequency, GameType.low_frequency],
+        'number_of_games': _single(params, 'games', 1, int),
+        'rules': _multiple(params, 'rule'),
+        'seed': _single(params, 'seed', None, int),
+        'window': _single(params, 'window', WINDOW_DAYS, int),
+        'half_life': _single(params, 'half_life', HALF_LIFE_DAYS, float),
+        'output_format': None if output_format == 'json' else OutputFormat(output_format),
+    }
+
+    if not 0 <= request['number_of_games'] <= max_games:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"The number of games must be between 0 and {max_games}.")
+    if request['seed'] is not None and request['seed'] < 0:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "The seed must not be negative.")
+    if request['window'] < 1:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "The window must be at least 1 day.")
+    if not request['half_life'] > 0:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "The half life must be greater than zero.")
+
+    return request
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """Read a HTTP/1.x request.
+
+    Parameters
+    ----------
+    reader : asyncio.StreamReader
+        Stream of the connection.
+
+    Returns
+    -------
+    Optional[Tuple[str, str, Dict[str, str], bytes]]
+        The method, the target, the headers (names in lower case) and the body,
+        None if the client closed the connection.
+
+    Raises
+    ------
+    RequestError
+        If the request is malformed or too large.
+    """
+    async def read_line() -> str:
+        try:
+            line = await reader.readline()
+        except ValueError:
+            raise RequestError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Line too long.")
+        if len(line) > MAX_LINE_SIZE:
+            raise RequestError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Line too long.")
+        return line.decode('latin-1').rstrip('\r\n')
+
+    request_line = await read_line()
+    if not request_line:
+        return None
+
+    parts = request_line.split()
+    if len(parts) != 3 or not parts[2].startswith('HTTP/1.'):
+        raise RequestError(HTTPStatus.BAD_REQUEST, "Malformed request line.")
+    method, target, version = parts
+
+    headers = {'connection': 'keep-alive' if version != 'HTTP/1.0' else 'close'}
+    for _ in range(MAX_HEADERS + 1):
+        line = await read_line()
+        if not line:
+            break
+        name, sep, value = line.partition(':')
+        if not sep:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Malformed header.")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise RequestError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Too many headers.")
+
+    if 'transfer-encoding' in headers:
+        raise RequestError(HTTPStatus.NOT_IMPLEMENTED, "Transfer encodings are not supported.")
+
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length.")
+    if not 0 <= length <= MAX_BODY_SIZE:
+        raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"The body must have at most {MAX_BODY_SIZE} bytes.")
+
+    body = await reader.readexactly(length) if length else b''
+    return method, target, headers, body
+
+
+def write_response(
+    writer: asyncio.StreamWriter,
+    status: HTTPStatus,
+    content_type: str,
+    body: bytes,
+    keep_alive: bool,
+    head: bool = False
+):
+    """Write a HTTP/1.1 response.
+
+    Parameters
+    ----------
+    writer : asyncio.StreamWriter
+        Stream of the connection.
+    status : HTTPStatus
+        Status of the response.
+    content_type : str
+        Type of the body.
+    body : bytes
+        Body of the response.
+    keep_alive : bool
+        Keep the connection open for the next request.
+    head : bool, optional
+        Answer to a HEAD request, only the headers are written, by default False.
+    """
+    writer.write((
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    ).encode('latin-1') + (b'' if head else body))
+
+
+def _json(value: Any) -> bytes:
+    """Encode a value as the body of a response."""
+    return (json.dumps(value) + '\n').encode()
+
+
+class GameServer:
+    """Serve the requests of games with a `GameService`, generating the games on a pool of threads.
+
+    The database is checked for changes before each request of games and every poll,
+    and the draws are loaded again, once, when it changed.
+
+    Parameters
+    ----------
+    service : game_service.GameService
+        Service with the draws loaded.
+    watcher : game_service.DatabaseWatcher
+        Watcher of the database.
+    threads : int
+        Number of requests generating games at the same time.
+    max_games : int
+        Largest number of games of each type on a request.
+    """
+
+    def __init__(self, service, watcher, threads: int, max_games: int):
+        """Initialize the server, without listening yet."""
+        self.service = service
+        self.watcher = watcher
+        self.executor = ThreadPoolExecutor(threads)
+        self.max_games = max_games
+
+        self.started = time.monotonic()
+        self.requests = 0
+        self.games_generated = 0
+        self._reload: Optional[asyncio.Future] = None
+
+    async def refresh(self):
+        """Load the draws again if the database changed, waiting for a reload already running."""
+        loop = asyncio.get_event_loop()
+        if self._reload is None and self.watcher.changed():
+            self._reload = loop.run_in_executor(self.executor, self.service.reload)
+
+        reload = self._reload
+        if reload is None:
+            return
+
+        try:
+            if await reload:
+                typer.echo(f"Draws loaded again [{self.service.stamp}].")
+        except Exception:
+            # Checked again on the next request
+            self.watcher.state = None
+            raise
+        finally:
+            if self._reload is reload:
+                self._reload = None
+
+    async def watch(self, poll: float):
+        """Check the database for changes every poll seconds.
+
+        Parameters
+        ----------
+        poll : float
+            Seconds between checks.
+        """
+        while True:
+            await asyncio.sleep(poll)
+            try:
+                await self.refresh()
+            except Exception as e:
+                typer.echo(typer.style("ERROR: ", fg=typer.colors.RED, bold=True) + f"Reload failed: {e}", err=True)
+
+    def status(self) -> Dict[str, Any]:
+        """Get the draws loaded and the requests served."""
+        dates = self.service.dates
+        return {
+            'stamp': self.service.stamp,
+            'draws': len(dates),
+            'last_draw': str(dates[-1]) if len(dates) else None,
+            'reloads': self.service.reloads,
+            'requests': self.requests,
+            'games_generated': self.games_generated,
+            'uptime_seconds': round(time.monotonic() - self.started, 3),
+        }
+
+    def generate(self, request: Dict[str, Any]) -> Tuple[str, bytes, int]:
+        """Generate the games of a request, on a thread of the pool.
+
+        Parameters
+        ----------
+        request : Dict[str, Any]
+            Parameters of the request (see `parse_games_request`).
+
+        Returns
+        -------
+        Tuple[str, bytes, int]
+            The content type and the body of the response, and the number of games generated.
+
+        Raises
+        ------
+        RequestError
+            If a rule is invalid or there are fewer games left than the number of games.
+        """
+        from game_generator import NotEnoughGamesError
+        from game_output import (
+            format_games,
+            write_games
+        )
+        from game_rules import RuleSet
+
+        started = time.perf_counter()
+        try:
+            rule_set = RuleSet.from_specs(request['rules'])
+        except ValueError as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, str(e))
+
+        try:
+            results = self.service.generate(
+                request['game_types'], request['number_of_games'], rule_set, request['seed'],
+                request['window'], request['half_life']
+            )
+        except NotEnoughGamesError as e:
+            raise RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+
+        output_format = request['output_format']
+        if output_format is not None:
+            stream = io.StringIO()
+            total = write_games(results, output_format, stream)
+            return CONTENT_TYPES[output_format.value], stream.getvalue().encode(), total
+
+        header = {
+            'stamp': self.service.stamp,
+            'seconds': round(time.perf_counter() - started, 6),
+            'excluded_by_rule' if rule_set.exclusions else 'rejected_by_rule': (
+                rule_set.exclusions or rule_set.rejections
+            ),
+        }
+        # The games are the same objects as the NDJSON lines, formatted at once
+        lines = [format_games(gt, games, OutputFormat.ndjson).replace('\n', ', ') for gt, games in results]
+        games = ''.join(lines)[:-2]
+
+        total = sum(len(games) for _, games in results)
+
+        return JSON_CONTENT_TYPE, (json.dumps(header)[:-1] + ', "games": [' + games + ']}\n').encode(), total
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[HTTPStatus, str, bytes]:
+        """Answer a request.
+
+        Parameters
+        ----------
+        method : str
+            Method of the request.
+        target : str
+            Path and query string of the request.
+        body : bytes
+            Body of the request.
+
+        Returns
+        -------
+        Tuple[HTTPStatus, str, bytes]
+            The status, the content type and the body of the response.
+        """
+        url = urlsplit(target)
+        routes = {'/status': ('GET', 'HEAD'), '/games': ('GET', 'POST')}
+        if url.path not in routes:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown path: {url.path}.")
+        if method not in routes[url.path]:
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, f"Method not allowed: {method}.")
+
+        self.requests += 1
+        await self.refresh()
+
+        if url.path == '/status':
+            return HTTPStatus.OK, JSON_CONTENT_TYPE, _json(self.status())
+
+        if method == 'POST':
+            try:
+                params = json.loads(body or b'{}')
+            except ValueError as e:
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid JSON: {e}.")
+            if not isinstance(params, dict):
+                raise RequestError(HTTPStatus.BAD_REQUEST, "The body must be a JSON object.")
+        else:
+            params = parse_qs(url.query, keep_blank_values=True)
+
+        request = parse_games_request(params, self.max_games)
+        content_type, payload, total = await asyncio.get_event_loop().run_in_executor(
+            self.executor, self.generate, request
+        )
+        self.games_generated += total
+
+        return HTTPStatus.OK, content_type, payload
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve the requests of a connection, until the client or an error closes it.
+
+        Parameters
+        ----------
+        reader : asyncio.StreamReader
+            Stream to read the requests.
+        writer : asyncio.StreamWriter
+            Stream to write the responses.
+        """
+        try:
+            while True:
+                # Errors before the end of the request leave the stream on an unknown position
+                request, keep_alive = None, False
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+
+                    method, target, headers, body = request
+                    keep_alive = headers['connection'].lower() != 'close'
+                    status, content_type, payload = await self.dispatch(method, target, body)
+                except RequestError as e:
+                    status, content_type, payload = e.status, JSON_CONTENT_TYPE, _json({'error': str(e)})
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                except Exception as e:
+                    typer.echo(typer.style("ERROR: ", fg=typer.colors.RED, bold=True) + repr(e), err=True)
+                    status, content_type, payload = (
+                        HTTPStatus.INTERNAL_SERVER_ERROR, JSON_CONTENT_TYPE, _json({'error': str(e)})
+                    )
+
+                head = request is not None and request[0] == 'HEAD'
+                write_response(writer, status, content_type, payload, keep_alive, head)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def run(self, host: str, port: int, socket: Optional[pathlib.Path], poll: float):
+        """Listen for requests until the process is stopped.
+
+        Parameters
+        ----------
+        host : str
+            Address to listen on.
+        port : int
+            Port to listen on.
+        socket : Optional[pathlib.Path]
+            Unix socket to listen on, instead of the host and the port.
+        poll : float
+            Seconds between checks of the database, 0 to check only on each request.
+        """
+        if socket is not None:
+            server = await asyncio.start_unix_server(self.handle, str(socket), limit=MAX_LINE_SIZE * 2)
+            address = f"unix:{socket}"
+        else:
+            server = await asyncio.start_server(self.handle, host, port, limit=MAX_LINE_SIZE * 2)
+            address = f"http://{host}:{port}"
+
+        watcher = asyncio.ensure_future(self.watch(poll)) if poll > 0 else None
+        typer.echo(f"Serving games on {address} [{self.service.stamp}], press CTRL+C to stop.")
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            self.executor.shutdown(wait=False)
+
+
+def serve(
+    host: str = typer.Option(
+        "127.0.0.1", "--host", show_default=True,
+        help="Address to listen on."
+    ),
+    port: int = typer.Option(
+        8000, "--port", "-p", min=0, max=65535, show_default=True,
+        help="Port to listen on."
+    ),
+    socket: Optional[pathlib.Path] = typer.Option(
+        None, "--socket", dir_okay=False,
+        help="Unix socket to listen on, instead of the host and port."
+    ),
+    threads: int = typer.Option(
+        4, "--threads", min=1, show_default=True,
+        help="Number of requests generating games at the same time."
+    ),
+    poll: float = typer.Option(
+        1.0, "--poll", min=0, show_default=True,
+        help="Seconds between checks of the database for changes. With 0 it is only checked on each request."
+    ),
+    max_games: int = typer.Option(
+        1000000, "--max-games", min=1, show_default=True,
+        help="Largest number of games of each type on a request."
+    )
+):
+    """Serve the generation of games over HTTP, with the draws and the probabilities kept in memory."""
+    # Imported here, so the help and the option parsing don't load numpy
+    from game_service import (
+        DatabaseWatcher,
+        GameService
+    )
+    from sqlite import DatabaseNotInitializedError
+
+    if socket is not None and socket.exists():
+        typer.echo(typer.style("ERROR: ", fg=typer.colors.RED, bold=True) + f"{socket} already exists.")
+        raise typer.Exit(code=1)
+
+    try:
+        service = GameService()
+    except DatabaseNotInitializedError as e:
+        typer.echo(typer.style("ERROR: ", fg=typer.colors.RED, bold=True) + str(e))
+        raise typer.Exit(code=1)
+
+    server = GameServer(service, DatabaseWatcher(), threads, max_games)
+    try:
+        asyncio.run(server.run(host, port, socket, poll))
+    except KeyboardInterrupt:
+        typer.echo("Service stopped.")
+    finally:
+        server.watcher.close()
+        if socket is not None and socket.exists():
+            socket.unlink()
+
+
+if __name__ == "__main__":
+    app = typer.Typer(add_completion=False)
+    app.command()(serve)
+    app()
@@ -0,0 +1,91 @@
+"""Module with a compact binary snapshot of the draws stored on the database.
+
+The snapshot is a uint8 array with one draw per row, numbers and stars sorted,
+plus an array with the draw dates. Both are NumPy files that many processes
+can map on memory and share the same page cache, instead of each one reading the database.
+"""
+import os
+import pathlib
+from typing import Tuple
+
+import numpy as np
+
+from constants import (
+    K_NUMBERS,
+    K_STARS
+)
+from sqlite import (
+    DBFILE,
+    get_data_stamp,
+    get_dated_draws
+)
+
+
+def snapshot_files() -> Tuple[pathlib.Path, pathlib.Path, pathlib.Path]:
+    """Get the files of the snapshot, stored next to the database.
+
+    Returns
+    -------
+    Tuple[pathlib.Path, pathlib.Path, pathlib.Path]
+        The draws file, the dates file and the stamp file.
+    """
+    return (
+        DBFILE.with_suffix(".draws.npy"),
+        DBFILE.with_suffix(".dates.npy"),
+        DBFILE.with_suffix(".snapshot")
+    )
+
+
+def _save_array(filename: pathlib.Path, values: np.ndarray):
+    """Save an array replacing the file atomically, so readers never see a partial file."""
+    tmp = filename.with_name(f"{filename.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, values)
+    os.replace(tmp, filename)
+
+
+def write_snapshot() -> str:
+    """Write the snapshot of the draws stored on the database.
+
+    Returns
+    -------
+    str
+        The stamp of the data on the snapshot.
+    """
+    draws_file, dates_file, stamp_file = snapshot_files()
+
+    # The stamp is read first, if the data changes meanwhile the next load will write it again
+    stamp = get_data_stamp()
+    rows = get_dated_draws()
+
+    draws = np.array([row[1:] for row in rows], dtype=np.uint8).reshape(-1, K_NUMBERS + K_STARS)
+    draws = np.concatenate((np.sort(draws[:, :K_NUMBERS], axis=1), np.sort(draws[:, K_NUMBERS:], axis=1)), axis=1)
+    dates = np.array([row[0] for row in rows], dtype="datetime64[D]")
+
+    _save_array(draws_file, draws)
+    _save_array(dates_file, dates)
+
+    tmp = stamp_file.with_name(f"{stamp_file.name}.{os.getpid()}.tmp")
+    tmp.write_text(stamp)
+    os.replace(tmp, stamp_file)
+
+    return stamp
+
+
+def load_snapshot() -> Tuple[np.ndarray, np.ndarray]:
+    """Load the snapshot of the draws, writing it again if the database changed.
+
+    The arrays are memory mapped and read only.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The draws, with shape (N, 7) where the last two values are stars, and the draw dates.
+    """
+    draws_file, dates_file, stamp_file = snapshot_files()
+
+    stamp = stamp_file.read_text() if stamp_file.exists() else None
+    if stamp != get_data_stamp() or not draws_file.exists() or not dates_file.exists():
+        write_snapshot()
+
+    return np.load(draws_file, mmap_mode="r"), np.load(dates_file, mmap_mode="r")
@@ -1,19 +1,42 @@
 """Functions to deal with database."""
+import atexit
 import csv
+import gzip
+import json
+import os
 import pathlib
 import sqlite3
+import threading
 
+from collections import Counter
 from contextlib import contextmanager
-from datetime import date
+from datetime import (
+    date,
+    datetime
+)
+from enum import Enum
 from typing import (
     Any,
     Dict,
+    Iterable,
+    Iterator,
+    List,
     Optional,
+    Set,
     Tuple
 )
 
 import typer
 
+from constants import (
+    MAX_NUMBER,
+    MAX_STAR
+)
+from profiling import (
+    count,
+    stage
+)
+
 DBFILE = pathlib.Path("database.db")
 
 CREATE_EURO_RESULTS_TABLE = """
@@ -37,26 +60,124 @@ CREATE_EURO_LAST_DRAW_TABLE = """
     )
 """
 
+CREATE_FREQUENCY_TABLE = """
+    CREATE TABLE {name} (
+        value int NOT NULL PRIMARY KEY,
+        frequency int NOT NULL
+    )
+"""
+
+# Incremented each time results are inserted, to detect changes on the data
+CREATE_DATA_VERSION_TABLE = """
+    CREATE TABLE data_version (
+        version int NOT NULL
+    )
+"""
+
+# Last time the result of each date was read from the web, to retry only the dates missing or failed
+CREATE_FETCH_JOURNAL_TABLE = """
+    CREATE TABLE fetch_journal (
+        dt date NOT NULL PRIMARY KEY,
+        status text NOT NULL,
+        attempts int NOT NULL,
+        last_error text,
+        last_attempt timestamp NOT NULL
+    )
+"""
+
+NUMBER_COLUMNS = ('n1', 'n2', 'n3', 'n4', 'n5')
+STAR_COLUMNS = ('s1', 's2')
+
+# Table name, columns of the results table counted and highest value
+FREQUENCY_TABLES = (
+    ('number_frequency', NUMBER_COLUMNS, MAX_NUMBER),
+    ('star_frequency', STAR_COLUMNS, MAX_STAR)
+)
+
+# Maximum number of parameters on a single query for old SQLite versions
+MAX_QUERY_PARAMETERS = 999
+
+# Number of rows read at once when exporting the results
+EXPORT_CHUNK_SIZE = 1000
+
+# Number of prepared statements kept by each connection
+STATEMENT_CACHE_SIZE = 256
+
+# Connection of each thread, reused by all functions
+_local = threading.local()
+
+
+class DatabaseNotInitializedError(Exception):
+    """Error raised when the database has no results table, so it must be initialized first."""
+
+
+def open_connection() -> sqlite3.Connection:
+    """Open a new SQLite3 connection.
+
+    Returns
+    -------
+    sqlite3.Connection
+        A new connection to the database file, the caller must close it.
+    """
+    connection = sqlite3.connect(
+        DBFILE,
+        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+        cached_statements=STATEMENT_CACHE_SIZE
+    )
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def get_connection() -> sqlite3.Connection:
+    """Get the connection of the current thread and process.
+
+    The connection is opened on the first call and reused by the next calls,
+    so the prepared statements are kept between calls. When the database file changes,
+    the connection to the previous file is closed and a new one is opened.
+
+    Returns
+    -------
+    sqlite3.Connection
+        The shared connection to the database file.
+    """
+    key = (os.getpid(), DBFILE)
+    if getattr(_local, 'key', None) != key:
+        close_connection()
+        _local.connection = open_connection()
+        _local.key = key
+
+    return _local.connection
+
+
+def close_connection():
+    """Close the connection of the current thread, if it is open."""
+    if getattr(_local, 'key', None) is not None:
+        if _local.key[0] == os.getpid():
+            _local.connection.close()
+        _local.key = None
+        _local.connection = None
+
+
+atexit.register(close_connection)
+
 
 @contextmanager
-def connect():
+def connect(connection: Optional[sqlite3.Connection] = None):
     """Yield a SQLite3 connection.
 
-    With a context manager will, automatically, close the connection.
+    The connection is not closed at the end, so it can be reused.
+
+    Parameters
+    ----------
+    connection : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
     """
-    try:
-        connection = sqlite3.connect(
-            DBFILE,
-            detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
-        )
-        connection.row_factory = sqlite3.Row
-        yield connection
-    finally:
-        connection.close()
+    yield connection or get_connection()
 
 
 def delete_database():
     """Delete the existing database file."""
+    close_connection()
     if DBFILE.exists():
         DBFILE.unlink()
 
@@ -68,59 +189,410 @@ def init_database() -> bool:
     -------
     bool
         If database already exists it will return False.
+        A file without the results table (e.g. an empty file) is initialized.
     """
-    if DBFILE.exists():
+    if DBFILE.exists() and 'euro_results' in get_tables():
         return False
 
     create_tables()
     return True
 
 
-def export_database(filename: str) -> bool:
-    """Export the results table to CSV file.
+class ExportFormat(str, Enum):
+    """Class of file formats to export the results."""
+
+    csv = "csv"
+    csv_gz = "csv-gz"
+    ndjson = "ndjson"
+    npz = "npz"
+    parquet = "parquet"
+
+
+class FetchStatus(str, Enum):
+    """Class of outcomes of reading the result of a date from the web."""
+
+    saved = "saved"
+    empty = "empty"
+    failed = "failed"
+
+
+def _result_chunks(cursor: sqlite3.Cursor, chunk_size: int) -> Iterator[List[sqlite3.Row]]:
+    """Yield the rows of a cursor in chunks."""
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        count("rows_written", len(rows))
+        yield rows
+
+
+def _export_text(
+    fn: pathlib.Path,
+    file_format: ExportFormat,
+    columns: List[str],
+    chunks: Iterator[List[sqlite3.Row]]
+):
+    """Export the results to a text file (CSV, compressed CSV or NDJSON)."""
+    opener = gzip.open if file_format == ExportFormat.csv_gz else open
+
+    with opener(fn, "wt", newline="") as text_file:
+        if file_format == ExportFormat.ndjson:
+            for rows in chunks:
+                text_file.writelines(json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows)
+            return
+
+        csv_writer = csv.writer(text_file, delimiter=",")
+        csv_writer.writerow(columns)
+        for rows in chunks:
+            csv_writer.writerows(rows)
+
+
+def _export_columnar(
+    fn: pathlib.Path,
+    file_format: ExportFormat,
+    columns: List[str],
+    chunks: Iterator[List[sqlite3.Row]]
+):
+    """Export the results to a columnar binary file (NumPy npz or Parquet)."""
+    import numpy as np
+
+    # Compact types, the numbers and stars fit on one byte, missing values are -1
+    dtypes = {col: np.uint8 for col in NUMBER_COLUMNS + STAR_COLUMNS}
+    dtypes.update({'dt': 'datetime64[D]', 'winners': np.int32, 'prize': np.int64})
+
+    def to_arrays(rows: List[sqlite3.Row]) -> Dict[str, np.ndarray]:
+        values = list(zip(*rows))
+        return {
+            col: np.array([-1 if v is None else v for v in values[i]], dtype=dtypes[col])
+            for i, col in enumerate(columns)
+        }
+
+    if file_format == ExportFormat.npz:
+        parts = [to_arrays(rows) for rows in chunks]
+        with open(fn, "wb") as npz_file:
+            np.savez(npz_file, **{
+                col: np.concatenate([p[col] for p in parts]) if parts else np.empty(0, dtype=dtypes[col])
+                for col in columns
+            })
+        return
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        (col, pa.date32() if col == 'dt' else pa.from_numpy_dtype(np.dtype(dtypes[col])))
+        for col in columns
+    ])
+    with pq.ParquetWriter(str(fn), schema) as writer:
+        for rows in chunks:
+            arrays = to_arrays(rows)
+            writer.write_table(pa.table({
+                col: pa.array(arrays[col], mask=(arrays[col] == -1) if col in ('winners', 'prize') else None)
+                for col in columns
+            }, schema=schema))
+
+
+def export_database(
+    filename: str,
+    file_format: ExportFormat = ExportFormat.csv,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    con: Optional[sqlite3.Connection] = None
+) -> bool:
+    """Export the results table to a file.
+
+    The rows are read from the database in chunks, so the whole table is never loaded in memory
+    (except for the npz format that needs all the values of each column).
 
     Parameters
     ----------
     filename : str
-        File name and path to the CSV file.
+        File name and path to the file.
+    file_format : ExportFormat, optional
+        Format of the file, by default ExportFormat.csv.
+    chunk_size : int, optional
+        Number of rows read from the database at once, by default EXPORT_CHUNK_SIZE.
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
 
     Returns
     -------
     bool
-        Returns True if the CSV file was generated.
+        Returns True if the file was generated.
     """
     if not DBFILE.exists():
         return False
 
     fn = pathlib.Path(filename)
 
-    with connect() as con:
-        rows = con.execute("SELECT * FROM euro_results").fetchall()
+    with connect(con) as con:
+        cursor = con.execute("SELECT * FROM euro_results ORDER BY dt")
+        columns = [col[0] for col in cursor.description]
+        chunks = _result_chunks(cursor, chunk_size)
+
+        try:
+            with stage("export"):
+                if file_format in (ExportFormat.npz, ExportFormat.parquet):
+                    _export_columnar(fn, file_format, columns, chunks)
+                else:
+                    _export_text(fn, file_format, columns, chunks)
+        except ImportError as e:
+            typer.echo(
+                typer.style("ERROR: ", fg=typer.colors.RED, bold=True) +
+                f"Unable to export the format {file_format.value} [{repr(e)}]."
+            )
+            return False
+        finally:
+            cursor.close()
 
-    if rows is None:
-        return False
+    return True
 
-    with open(fn, "w") as csv_file:
-        csv_writer = csv.writer(csv_file, delimiter=",")
-        csv_writer.writerow([key for key in rows[0].keys()])
-        csv_writer.writerows(rows)
 
-    return True
+def create_tables(con: Optional[sqlite3.Connection] = None):
+    """Create the tables for a new database.
+
+    Parameters
+    ----------
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
+    """
+    with connect(con) as con:
+        tables = get_tables(con)
+        if 'euro_results' not in tables:
+            con.execute(CREATE_EURO_RESULTS_TABLE)
+        if 'last_draw' not in tables:
+            con.execute(CREATE_EURO_LAST_DRAW_TABLE)
+        ensure_tables(con)
+
+
+def rebuild_frequency_tables(con: Optional[sqlite3.Connection] = None):
+    """Count again how many times each number and star was drawn.
+
+    Parameters
+    ----------
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
+    """
+    with connect(con) as con:
+        with con:
+            for table, columns, max_value in FREQUENCY_TABLES:
+                matches = ' + '.join(f"({col} = value)" for col in columns)
+
+                con.execute(f"DROP TABLE IF EXISTS {table}")
+                con.execute(CREATE_FREQUENCY_TABLE.format(name=table))
+                con.executemany(f"INSERT INTO {table} VALUES(?, 0)", ((v, ) for v in range(1, max_value + 1)))
+                con.execute(f"UPDATE {table} SET frequency = (SELECT COALESCE(SUM({matches}), 0) FROM euro_results)")
+
+
+def get_tables(con: Optional[sqlite3.Connection] = None) -> Set[str]:
+    """Get the names of the tables on the database.
+
+    Parameters
+    ----------
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
+
+    Returns
+    -------
+    Set[str]
+        Name of each table.
+    """
+    with connect(con) as con:
+        return {row['name'] for row in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def check_database(con: Optional[sqlite3.Connection] = None) -> Set[str]:
+    """Check the database was initialized, without changing it.
+
+    Parameters
+    ----------
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
+
+    Returns
+    -------
+    Set[str]
+        Name of each table on the database.
+
+    Raises
+    ------
+    DatabaseNotInitializedError
+        If the database file doesn't exist or it has no results table.
+    """
+    # Connecting to a file that doesn't exist would create it
+    tables = get_tables(con) if con is not None or DBFILE.exists() else set()
+
+    if 'euro_results' not in tables:
+        raise DatabaseNotInitializedError(
+            f"There is no results table on {DBFILE}, initialize the database first (database init)."
+        )
+
+    return tables
+
+
+def ensure_tables(con: Optional[sqlite3.Connection] = None):
+    """Create the tables missing on databases created by older versions.
+
+    The frequency tables are filled from the results stored. Only the commands that write
+    on the database call it, the functions that read treat the tables missing as no data.
+
+    Parameters
+    ----------
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
+    """
+    tables = check_database(con)
+
+    with connect(con) as con:
+        if any(table not in tables for table, _, _ in FREQUENCY_TABLES):
+            rebuild_frequency_tables(con)
+
+        if 'data_version' not in tables:
+            with con:
+                con.execute(CREATE_DATA_VERSION_TABLE)
+                con.execute("INSERT INTO data_version VALUES(0)")
+
+        if 'fetch_journal' not in tables:
+            with con:
+                con.execute(CREATE_FETCH_JOURNAL_TABLE)
+
+
+def increment_data_version(con: Optional[sqlite3.Connection] = None):
+    """Mark the data as changed.
+
+    It doesn't commit, so it can be part of the transaction that changes the data.
+
+    Parameters
+    ----------
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
+    """
+    with connect(con) as con:
+        con.execute("UPDATE data_version SET version = version + 1")
 
 
-def create_tables():
-    """Create the tables for a new database."""
-    with connect() as con:
-        con.execute(CREATE_EURO_RESULTS_TABLE)
-        con.execute(CREATE_EURO_LAST_DRAW_TABLE)
+def get_data_stamp(con: Optional[sqlite3.Connection] = None) -> str:
+    """Get a stamp that changes each time the results stored change.
+
+    Parameters
+    ----------
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
 
+    Returns
+    -------
+    str
+        The data version, the number of results and the last draw date.
+
+    Raises
+    ------
+    DatabaseNotInitializedError
+        If the database has no results table.
+    """
+    # Databases created by older versions have no data version until they are written again
+    version = "(SELECT version FROM data_version)" if 'data_version' in check_database(con) else "0"
+    query = f"SELECT {version} AS version, count(1) AS n, MAX(dt) AS last FROM euro_results"
+
+    with connect(con) as con:
+        row = con.execute(query).fetchone()
+
+    return f"{row['version']}-{row['n']}-{row['last']}"
+
+
+def increment_frequencies(draws: Iterable[Tuple[int, ...]], con: Optional[sqlite3.Connection] = None):
+    """Add new draws to the number and star frequencies.
+
+    It doesn't commit, so it can be part of the transaction that inserts the draws.
+
+    Parameters
+    ----------
+    draws : Iterable[Tuple[int, ...]]
+        Numbers drawn where the last two are the star numbers.
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
+    """
+    numbers: Counter = Counter()
+    stars: Counter = Counter()
+    for draw in draws:
+        numbers.update(draw[:len(NUMBER_COLUMNS)])
+        stars.update(draw[len(NUMBER_COLUMNS):])
+
+    with connect(con) as con:
+        con.executemany("UPDATE number_frequency SET frequency = frequency + ? WHERE value = ?", (
+            (cnt, value) for value, cnt in numbers.items()
+        ))
+        con.executemany("UPDATE star_frequency SET frequency = frequency + ? WHERE value = ?", (
+            (cnt, value) for value, cnt in stars.items()
+        ))
+
+
+def get_frequencies(
+    con: Optional[sqlite3.Connection] = None
+) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+    """Get how many times each number and star was drawn.
+
+    Parameters
+    ----------
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
 
-def update_last_draw_date():
+    Returns
+    -------
+    Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]
+        The number frequencies and the star frequencies, as (value, frequency) sorted by value.
+        Values never drawn are not returned.
+
+    Raises
+    ------
+    DatabaseNotInitializedError
+        If the database has no results table.
+    """
+    tables = check_database(con)
+    frequencies = []
+
+    with connect(con) as con:
+        for table, columns, _ in FREQUENCY_TABLES:
+            if table in tables:
+                query = f"SELECT value, frequency FROM {table} WHERE frequency > 0 ORDER BY value"
+            else:
+                # Databases created by older versions, counted from the results without changing the database
+                drawn = " UNION ALL ".join(f"SELECT {col} AS value FROM euro_results" for col in columns)
+                query = f"SELECT value, count(1) AS frequency FROM ({drawn}) GROUP BY value ORDER BY value"
+
+            frequencies.append([tuple(row) for row in con.execute(query)])
+
+    return frequencies[0], frequencies[1]
+
+
+def get_dated_draws(con: Optional[sqlite3.Connection] = None) -> List[Tuple[Any, ...]]:
+    """Get the dates and the numbers of all draws stored.
+
+    Parameters
+    ----------
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
+
+    Returns
+    -------
+    List[Tuple[Any, ...]]
+        Date of each draw followed by its numbers where the last two are the stars, sorted by date.
+    """
+    query = f"SELECT dt, {', '.join(NUMBER_COLUMNS + STAR_COLUMNS)} FROM euro_results ORDER BY dt"
+
+    with connect(con) as con:
+        return [tuple(row) for row in con.execute(query)]
+
+
+def update_last_draw_date(con: Optional[sqlite3.Connection] = None):
     """Update the last draw date.
 
     The last draw date will be highest date value on the results table.
+
+    Parameters
+    ----------
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
     """
-    with connect() as con:
+    with connect(con) as con:
         row = con.execute("SELECT MAX(dt) AS last FROM euro_results").fetchone()
         if row:
             con.execute("DELETE FROM last_draw")
@@ -128,28 +600,35 @@ def update_last_draw_date():
             con.commit()
 
 
-def get_last_draw_date() -> Optional[date]:
+def get_last_draw_date(con: Optional[sqlite3.Connection] = None) -> Optional[date]:
     """Get the last draw date stored.
 
+    Parameters
+    ----------
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
+
     Returns
     -------
     Optional[date]
         The date of tha last draw. Returns None if there is no date.
     """
-    with connect() as con:
+    with connect(con) as con:
         row = con.execute("SELECT dt FROM last_draw").fetchone()
         dt = row['dt'] if row else None
 
     return dt
 
 
-def get_result_by_date(dt: date) -> Optional[Tuple[int, ...]]:
+def get_result_by_date(dt: date, con: Optional[sqlite3.Connection] = None) -> Optional[Tuple[int, ...]]:
     """Get the result for a given date.
 
     Parameters
     ----------
     dt : date
         Date when the draw happened.
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
 
     Returns
     -------
@@ -159,15 +638,94 @@ def get_result_by_date(dt: date) -> Optional[Tuple[int, ...]]:
     """
     query = f"SELECT n1, n2, n3, n4, n5, s1, s2 FROM euro_results where dt = ?"
 
-    with connect() as con:
+    with connect(con) as con:
         row = con.execute(query, (dt,)).fetchone()
 
     return tuple(row) if row else None
 
 
-def get_number_of_results() -> int:
+def get_result_dates(con: Optional[sqlite3.Connection] = None) -> Set[date]:
+    """Get the dates of all results stored.
+
+    Parameters
+    ----------
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
+
+    Returns
+    -------
+    Set[date]
+        The draw dates stored.
+    """
+    with connect(con) as con:
+        return {row['dt'] for row in con.execute("SELECT dt FROM euro_results")}
+
+
+def record_fetches(
+    entries: Iterable[Tuple[date, FetchStatus, Optional[str]]],
+    con: Optional[sqlite3.Connection] = None
+):
+    """Record on the fetch journal the outcome of reading the results of some dates.
+
+    Each record keeps the last status and error of the date. The attempts are the records in a row
+    with the same status: one more if the status didn't change, otherwise they start again at one,
+    so the failures of a date that had no result before are counted from its first failure.
+
+    Parameters
+    ----------
+    entries : Iterable[Tuple[date, FetchStatus, Optional[str]]]
+        Date, outcome of reading its result and the error, if it failed.
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
+    """
+    now = datetime.now()
+    rows = [(dt, FetchStatus(status).value, error, now) for dt, status, error in entries]
+    if not rows:
+        return
+
+    with connect(con) as con:
+        with stage("journal"), con:
+            con.executemany(
+                "INSERT OR IGNORE INTO fetch_journal VALUES(?, ?, 0, NULL, ?)",
+                ((dt, status, at) for dt, status, _, at in rows)
+            )
+            # The expressions see the values before the update, so the status compared is the previous one
+            con.executemany(
+                "UPDATE fetch_journal SET attempts = CASE WHEN status = ? THEN attempts + 1 ELSE 1 END, "
+                "status = ?, last_error = ?, last_attempt = ? WHERE dt = ?",
+                ((status, status, error, at, dt) for dt, status, error, at in rows)
+            )
+
+
+def get_fetch_journal(con: Optional[sqlite3.Connection] = None) -> Dict[date, sqlite3.Row]:
+    """Get the fetch journal of all dates.
+
+    Parameters
+    ----------
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
+
+    Returns
+    -------
+    Dict[date, sqlite3.Row]
+        Entry of each date read before, with its status, attempts, last_error and last_attempt.
+        Empty if the database has no fetch journal yet.
+    """
+    with connect(con) as con:
+        if 'fetch_journal' not in get_tables(con):
+            return {}
+
+        return {row['dt']: row for row in con.execute("SELECT * FROM fetch_journal")}
+
+
+def get_number_of_results(con: Optional[sqlite3.Connection] = None) -> int:
     """Get the total of results stored.
 
+    Parameters
+    ----------
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
+
     Returns
     -------
     int
@@ -175,13 +733,13 @@ def get_number_of_results() -> int:
     """
     query = "SELECT count(1) AS n from euro_results"
 
-    with connect() as con:
+    with connect(con) as con:
         row = con.execute(query).fetchone()
 
     return row['n']
 
 
-def insert_new_result(draw_date: date, result: Dict[str, Any]) -> bool:
+def insert_new_result(draw_date: date, result: Dict[str, Any], con: Optional[sqlite3.Connection] = None) -> bool:
     """Insert a new Euromillions results into the database.
 
     Parameters
@@ -191,6 +749,8 @@ def insert_new_result(draw_date: date, result: Dict[str, Any]) -> bool:
     result : Dict[str, Any]
         Numbers drawn where the last two are the star numbers.
         Number of winners and main prize value (Optional).
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
 
     Returns
     -------
@@ -202,9 +762,12 @@ def insert_new_result(draw_date: date, result: Dict[str, Any]) -> bool:
     values = (draw_date, ) + result['draw'] + (result.get('winners'), result.get('prize'))
 
     try:
-        with connect() as con:
-            con.execute(query, values)
-            con.commit()
+        with connect(con) as con:
+            # Commit on success and rollback on error, the connection may be reused
+            with stage("insert"), con:
+                con.execute(query, values)
+                increment_frequencies([result['draw']], con)
+                increment_data_version(con)
     except sqlite3.IntegrityError:
         typer.echo(
             typer.style("ERROR: ", fg=typer.colors.RED, bold=True) +
@@ -218,6 +781,92 @@ def insert_new_result(draw_date: date, result: Dict[str, Any]) -> bool:
         )
         return False
 
-    update_last_draw_date()
+    update_last_draw_date(con)
+    count("rows_inserted")
 
     return True
+
+
+def insert_results_bulk(
+    results: Iterable[Tuple[date, Dict[str, Any]]],
+    fast: bool = False,
+    con: Optional[sqlite3.Connection] = None
+) -> List[bool]:
+    """Insert many Euromillions results into the database in a single transaction.
+
+    The last draw date is updated once, after all results are inserted.
+
+    Parameters
+    ----------
+    results : Iterable[Tuple[date, Dict[str, Any]]]
+        Date of the draw and its result (see `insert_new_result`).
+    fast : bool, optional
+        Use the WAL journal and a relaxed disk synchronization during the load, faster for batch loads,
+        by default False.
+    con : Optional[sqlite3.Connection], optional
+        Connection to be used, by default None (the connection of the current thread).
+
+    Returns
+    -------
+    List[bool]
+        For each result, True if it was inserted, False if the date was already collected.
+    """
+    query = f"INSERT INTO euro_results VALUES({','.join('?' * 10)})"
+
+    rows = [
+        (draw_date, ) + tuple(result['draw']) + (result.get('winners'), result.get('prize'))
+        for draw_date, result in results
+    ]
+    dates = [row[0] for row in rows]
+
+    try:
+        with connect(con) as con:
+            journal_mode = con.execute("PRAGMA journal_mode").fetchone()[0]
+            synchronous = con.execute("PRAGMA synchronous").fetchone()[0]
+            if fast:
+                con.execute("PRAGMA journal_mode=WAL")
+                con.execute("PRAGMA synchronous=NORMAL")
+
+            try:
+                existing = set()
+                for i in range(0, len(dates), MAX_QUERY_PARAMETERS):
+                    chunk = dates[i:i + MAX_QUERY_PARAMETERS]
+                    existing.update(
+                        row['dt'] for row in
+                        con.execute(f"SELECT dt FROM euro_results WHERE dt IN ({','.join('?' * len(chunk))})", chunk)
+                    )
+
+                inserted = []
+                for dt in dates:
+                    inserted.append(dt not in existing)
+                    existing.add(dt)
+
+                with stage("insert"), con:
+                    con.executemany(query, (row for row, ok in zip(rows, inserted) if ok))
+                    increment_frequencies((row[1:8] for row, ok in zip(rows, inserted) if ok), con)
+                    if any(inserted):
+                        # Only when the data changed, so the snapshot and the service are not loaded again for nothing
+                        increment_data_version(con)
+                        con.execute("DELETE FROM last_draw")
+                        con.execute("INSERT INTO last_draw SELECT MAX(dt) FROM euro_results")
+            finally:
+                # The connection and the database file are shared, so they go back to the previous settings
+                if fast:
+                    con.execute(f"PRAGMA journal_mode={journal_mode}")
+                con.execute(f"PRAGMA synchronous={synchronous}")
+    except Exception as e:
+        typer.echo(
+            typer.style("ERROR: ", fg=typer.colors.RED, bold=True) +
+            f"Unable save results on database [{repr(e)}]."
+        )
+        return [False] * len(rows)
+
+    count("rows_inserted", sum(inserted))
+    for dt, ok in zip(dates, inserted):
+        if not ok:
+            typer.echo(
+                typer.style("ERROR: ", fg=typer.colors.RED, bold=True) +
+                f"Unable save result of {dt:%Y-%m-%d} on database [this date was already collected]."
+            )
+
+    return inserted
@@ -5,12 +5,14 @@ from datetime import (
 )
 from typing import (
     Iterator,
+    Optional,
+    TextIO,
     Tuple
 )
 
 import typer
 
-from game_generator import K_NUMBERS
+from constants import K_NUMBERS
 
 
 def days_between(start: datetime, end: datetime) -> Iterator[Tuple[int, datetime]]:
@@ -54,17 +56,21 @@ def format_numbers(nums: Tuple) -> str:
     return ', '.join(map(lambda x: f"{x:2d}", nums))
 
 
-def print_game(result: Tuple[int, ...]):
+def print_game(result: Tuple[int, ...], file: Optional[TextIO] = None):
     """Print the Euromillions game.
 
     Parameters
     ----------
     result : Tuple[int, ...]
         Tuple with the seven numbers where the last two are the stars.
+    file : Optional[TextIO], optional
+        Where to print the game, by default None (standard output).
+        The colors are removed if it is not a terminal.
     """
     typer.echo(
         "\tNumbers: " +
         typer.style(format_numbers(result[:K_NUMBERS]), fg=typer.colors.GREEN) +
         "\tStars  : " +
-        typer.style(format_numbers(result[K_NUMBERS:]), fg=typer.colors.GREEN)
+        typer.style(format_numbers(result[K_NUMBERS:]), fg=typer.colors.GREEN),
+        file=file
     )